@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark for DOCX skeleton templates
+Compares per-document setup cost (margins, title, header slot, footer) and
+full render cost with a fresh Document() versus a cloned skeleton, for all
+six document types. Runs in-process; no OpenAI or GCS calls are made.
+
+    python benchmark_docx_skeletons.py [iterations]
+"""
+
+import io
+import sys
+import time
+from docx import Document
+from PIL import Image
+from services.business_proposal_service import business_proposal_pipeline
+from services.contract_service import contract_pipeline
+from services.docx_renderer import new_document, render_docx
+from services.logo_cache import prepare_logo
+from services.nda_service import nda_pipeline
+from services.partnership_agreement_service import partnership_agreement_pipeline
+from services.privacy_policy_service import privacy_policy_pipeline
+from services.terms_of_service_service import terms_of_service_pipeline
+
+PIPELINES = [
+    business_proposal_pipeline,
+    contract_pipeline,
+    privacy_policy_pipeline,
+    terms_of_service_pipeline,
+    partnership_agreement_pipeline,
+    nda_pipeline,
+]
+
+DATA = {
+    "contract_type": "Service",
+    "disclosing_party": "Acme",
+    "receiving_party": "Globex",
+    "effective_date": "2025-01-01",
+}
+
+CONTENT = "\n".join(
+    f"{section}. Section {section}\n" + "\n".join(
+        f"Paragraph {paragraph} with **bold terms** and plain text that runs on for a while." for paragraph in range(6)
+    )
+    for section in range(1, 13)
+)
+
+
+def make_logo():
+    buffer = io.BytesIO()
+    Image.new("RGBA", (1024, 1024), (20, 120, 200, 255)).save(buffer, format="PNG")
+    return prepare_logo(buffer.getvalue())
+
+
+def timed(fn, iterations):
+    fn()  # Warm up (builds the skeleton on first use)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = fn()
+    return (time.perf_counter() - started) / iterations * 1000, result
+
+
+def paragraphs(docx_bytes):
+    return [p.text for p in Document(io.BytesIO(docx_bytes)).paragraphs]
+
+
+def main(iterations=50):
+    logo = make_logo()
+    print(f"📊 DOCX setup/render cost per document ({iterations} iterations, ms)")
+    print(f"{'type':<24}{'setup fresh':>12}{'setup skel':>12}{'render fresh':>14}{'render skel':>13}{'KB fresh':>10}{'KB skel':>9}")
+
+    for pipeline in PIPELINES:
+        spec = pipeline.spec.render_spec(DATA)
+        setup_fresh, _ = timed(lambda: new_document(spec, spec.header, use_skeleton=False), iterations)
+        setup_skel, _ = timed(lambda: new_document(spec, spec.header, use_skeleton=True), iterations)
+        render_fresh, fresh = timed(lambda: render_docx(spec, DATA, CONTENT, logo, use_skeleton=False), iterations)
+        render_skel, skel = timed(lambda: render_docx(spec, DATA, CONTENT, logo, use_skeleton=True), iterations)
+
+        # Same document either way
+        assert paragraphs(fresh) == paragraphs(skel), pipeline.spec.name
+
+        print(
+            f"{pipeline.spec.name:<24}{setup_fresh:>12.2f}{setup_skel:>12.2f}{render_fresh:>14.2f}{render_skel:>13.2f}"
+            f"{len(fresh) / 1024:>10.1f}{len(skel) / 1024:>9.1f}"
+        )
+
+    print("✅ Skeleton output matches the fresh render for every type")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
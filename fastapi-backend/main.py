@@ -1,19 +1,28 @@
+import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 from routers import presentation, storage, image, logo, background_removal, document_generation
 from services.db_service import connect_db, disconnect_db
 from services.presentation_db_service import presentation_db_service
+from services.llm_cache import get_cache_stats
+from services.llm_metrics import render_metrics
+from services.llm_clients import close_clients
+from services.logo_cache import logo_cache
+from services.render_pool import render_pool
+from services.storage_service import LocalStaticFiles, LocalStorageBackend, check_signing_key, shutdown_storage, storage_backend
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan events"""
     # Startup
     print("🚀 Starting Aladin AI Backend...")
+    check_signing_key()
     try:
         # Connect to presentation database (skip for now due to network issues)
         # await presentation_db_service.connect()
@@ -25,6 +34,10 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("🛑 Shutting down Aladin AI Backend...")
+    await close_clients()
+    await logo_cache.close()
+    render_pool.shutdown()
+    shutdown_storage()
     try:
         # await presentation_db_service.disconnect()
         print("✅ Disconnected from presentation database")
@@ -55,6 +68,11 @@ app.include_router(logo.router, prefix="/api", tags=["Logos"])
 app.include_router(background_removal.router, prefix="/api", tags=["Background Removal"])
 app.include_router(document_generation.router, prefix="/api", tags=["Documents"])
 
+# Local storage backend: artifacts are served straight from disk
+if isinstance(storage_backend, LocalStorageBackend):
+    os.makedirs(storage_backend.root, exist_ok=True)
+    app.mount(storage_backend.route_path(), LocalStaticFiles(directory=storage_backend.root), name="files")
+
 @app.get("/")
 async def root():
     """API health check endpoint"""
@@ -85,6 +103,16 @@ async def health_check():
         }
     }
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """LLM response cache hit/miss counters"""
+    return get_cache_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """LLM latency and token metrics in Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
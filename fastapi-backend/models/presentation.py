@@ -7,12 +7,51 @@ class OutlineRequest(BaseModel):
     prompt: str
     numberOfCards: int
     language: str
+    stream_format: Optional[str] = "markdown"  # "markdown" (raw model output) or "events" (topic/bullet JSON events)
 
 class SlidesRequest(BaseModel):
     title: str
     outline: list[str]
     language: str
     tone: str
+    stream_format: Optional[str] = "xml"  # "xml" (raw model output) or "events" (one JSON event per slide)
+    generation_mode: Optional[str] = "sequential"  # "sequential" (one deck call) or "parallel" (one call per slide)
+    max_concurrency: Optional[int] = None  # Parallel mode only, defaults to SLIDES_MAX_CONCURRENCY
+    eager_images: Optional[bool] = False  # Generate IMG queries while streaming (implies "events")
+    user_email: Optional[str] = None  # Saves eagerly generated images to the user's library
+
+# Single slide / outline topic regeneration
+class SlideRegenerateRequest(BaseModel):
+    title: str
+    outline: list[str]
+    language: str
+    tone: str
+    slide_index: int
+    presentation_id: Optional[str] = None  # When set, neighbours and the current slide are read from the stored deck
+    neighbour_slides: Optional[List[Optional[Dict[str, Any]]]] = None  # [previous, next] PlateSlides or parsed slides, overrides the stored ones
+    previous_slide: Optional[str] = None  # Current XML or text of the slide, so the model writes a different version
+    instructions: Optional[str] = None
+
+class SlideRegenerateResponse(BaseModel):
+    slide_index: int
+    slide: Dict[str, Any]
+    xml: str
+
+class SlideUpdateRequest(BaseModel):
+    slide: Dict[str, Any]  # PlateSlide {id, content, rootImage, layoutType, ...} as the editor stores it
+
+class OutlineTopicRequest(BaseModel):
+    prompt: str
+    outline: list[str]
+    topic_index: int
+    language: str
+    instructions: Optional[str] = None
+
+class OutlineTopicResponse(BaseModel):
+    index: int
+    title: str
+    bullets: List[str]
+    markdown: str
 
 # New models for presentation management
 class PresentationCreateRequest(BaseModel):
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Optional, Dict
+
+class SignedUploadRequest(BaseModel):
+    filename: str
+    content_type: str = "application/octet-stream"
+    size: Optional[int] = None
+
+class SignedUploadResponse(BaseModel):
+    upload_url: str
+    method: str
+    headers: Dict[str, str]
+    object_name: str
+    public_url: str
+    expires_at: int
+    upload_token: str
+
+class UploadCompleteRequest(BaseModel):
+    object_name: str
+    upload_token: str
+    filename: Optional[str] = None
+    user_email: Optional[str] = None
+
+class UploadCompleteResponse(BaseModel):
+    id: Optional[str] = None
+    url: str
+    object_name: str
+    size: Optional[int] = None
+    content_type: Optional[str] = None
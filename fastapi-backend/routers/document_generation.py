@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from models.document_generation import (
     BusinessProposalRequest,
@@ -16,8 +16,15 @@ from services.document_generation_service import (
     generate_nda,
     generate_contract,
     generate_terms_of_service,
-    generate_privacy_policy
+    generate_privacy_policy,
+    stream_business_proposal,
+    stream_partnership_agreement,
+    stream_nda,
+    stream_contract,
+    stream_terms_of_service,
+    stream_privacy_policy
 )
+from services.stream_guard import guard_disconnect
 import json
 
 router = APIRouter()
@@ -99,80 +106,78 @@ async def generate_document(request: DocumentGenerationRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/documents/business-proposal-stream")
-async def create_business_proposal_stream(request: BusinessProposalRequest):
-    """Generate a business proposal with streaming response"""
-    async def stream_proposal():
+def document_event_stream(events, message: str):
+    """Relay a document service's chunk/stage events as server-sent events"""
+    async def stream():
         try:
             yield "data: " + json.dumps({
                 "status": "generating", 
-                "message": f"Creating business proposal for {request.client_name}..."
+                "message": message
             }) + "\n\n"
-            
-            result = await generate_business_proposal(request.dict())
-            
-            yield "data: " + json.dumps({
-                "status": "complete", 
-                "data": result
-            }) + "\n\n"
-            
+
+            async for event in events:
+                yield "data: " + json.dumps(event) + "\n\n"
+
         except Exception as e:
             yield "data: " + json.dumps({
                 "status": "error", 
                 "message": str(e)
             }) + "\n\n"
-    
-    return StreamingResponse(stream_proposal(), media_type="text/plain")
+    return stream()
+
+@router.post("/documents/business-proposal-stream")
+async def create_business_proposal_stream(request: BusinessProposalRequest, http_request: Request):
+    """Generate a business proposal with streaming response"""
+    events = document_event_stream(
+        stream_business_proposal(request.dict()),
+        f"Creating business proposal for {request.client_name}..."
+    )
+    return StreamingResponse(guard_disconnect(http_request, events, "business_proposal"), media_type="text/plain")
 
 @router.post("/documents/partnership-agreement-stream")
-async def create_partnership_agreement_stream(request: PartnershipAgreementRequest):
+async def create_partnership_agreement_stream(request: PartnershipAgreementRequest, http_request: Request):
     """Generate a partnership agreement with streaming response"""
-    async def stream_agreement():
-        try:
-            yield "data: " + json.dumps({
-                "status": "generating", 
-                "message": f"Creating partnership agreement for {request.party1_name} & {request.party2_name}..."
-            }) + "\n\n"
-            
-            result = await generate_partnership_agreement(request.dict())
-            
-            yield "data: " + json.dumps({
-                "status": "complete", 
-                "data": result
-            }) + "\n\n"
-            
-        except Exception as e:
-            yield "data: " + json.dumps({
-                "status": "error", 
-                "message": str(e)
-            }) + "\n\n"
-    
-    return StreamingResponse(stream_agreement(), media_type="text/plain")
+    events = document_event_stream(
+        stream_partnership_agreement(request.dict()),
+        f"Creating partnership agreement for {request.party1_name} & {request.party2_name}..."
+    )
+    return StreamingResponse(guard_disconnect(http_request, events, "partnership_agreement"), media_type="text/plain")
 
 @router.post("/documents/nda-stream")
-async def create_nda_stream(request: NDARequest):
+async def create_nda_stream(request: NDARequest, http_request: Request):
     """Generate an NDA with streaming response"""
-    async def stream_nda():
-        try:
-            yield "data: " + json.dumps({
-                "status": "generating", 
-                "message": f"Creating NDA for {request.disclosing_party} & {request.receiving_party}..."
-            }) + "\n\n"
-            
-            result = await generate_nda(request.dict())
-            
-            yield "data: " + json.dumps({
-                "status": "complete", 
-                "data": result
-            }) + "\n\n"
-            
-        except Exception as e:
-            yield "data: " + json.dumps({
-                "status": "error", 
-                "message": str(e)
-            }) + "\n\n"
-    
-    return StreamingResponse(stream_nda(), media_type="text/plain")
+    events = document_event_stream(
+        stream_nda(request.dict()),
+        f"Creating NDA for {request.disclosing_party} & {request.receiving_party}..."
+    )
+    return StreamingResponse(guard_disconnect(http_request, events, "nda"), media_type="text/plain")
+
+@router.post("/documents/contract-stream")
+async def create_contract_stream(request: ContractRequest, http_request: Request):
+    """Generate a contract with streaming response"""
+    events = document_event_stream(
+        stream_contract(request.dict()),
+        f"Creating {request.contract_type} contract for {request.party1_name} & {request.party2_name}..."
+    )
+    return StreamingResponse(guard_disconnect(http_request, events, "contract"), media_type="text/plain")
+
+@router.post("/documents/terms-of-service-stream")
+async def create_terms_of_service_stream(request: TermsOfServiceRequest, http_request: Request):
+    """Generate Terms of Service with streaming response"""
+    events = document_event_stream(
+        stream_terms_of_service(request.dict()),
+        f"Creating Terms of Service for {request.company_name}..."
+    )
+    return StreamingResponse(guard_disconnect(http_request, events, "terms_of_service"), media_type="text/plain")
+
+@router.post("/documents/privacy-policy-stream")
+async def create_privacy_policy_stream(request: PrivacyPolicyRequest, http_request: Request):
+    """Generate a Privacy Policy with streaming response"""
+    events = document_event_stream(
+        stream_privacy_policy(request.dict()),
+        f"Creating Privacy Policy for {request.company_name}..."
+    )
+    return StreamingResponse(guard_disconnect(http_request, events, "privacy_policy"), media_type="text/plain")
 
 @router.get("/documents/types")
 async def get_document_types():
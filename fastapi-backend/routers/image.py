@@ -10,7 +10,7 @@ class ImagePrompt(BaseModel):
 @router.post("/generate-image")
 async def create_image(image_prompt: ImagePrompt):
     try:
-        image_url = generate_and_upload_image(image_prompt.prompt)
+        image_url = await generate_and_upload_image(image_prompt.prompt)
         return {"url": image_url}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
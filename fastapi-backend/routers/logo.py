@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from models.logo import (
     LogoRequest,
@@ -16,6 +16,7 @@ from services.logo_service import (
     COLOR_PALETTES, 
     LOGO_STYLES
 )
+from services.stream_guard import guard_disconnect
 import json
 from typing import List
 
@@ -50,7 +51,7 @@ async def create_logo_description(request: LogoRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/logo/design-stream")
-async def create_logo_design_stream(request: LogoRequest):
+async def create_logo_design_stream(request: LogoRequest, http_request: Request):
     """Generate a logo design specification with streaming response"""
     async def stream_logo_design():
         try:
@@ -77,10 +78,10 @@ async def create_logo_design_stream(request: LogoRequest):
                 "message": str(e)
             }) + "\n\n"
     
-    return StreamingResponse(stream_logo_design(), media_type="text/plain")
+    return StreamingResponse(guard_disconnect(http_request, stream_logo_design(), "logo_design"), media_type="text/plain")
 
 @router.post("/logo/description-stream")
-async def create_logo_description_stream(request: LogoRequest):
+async def create_logo_description_stream(request: LogoRequest, http_request: Request):
     """Generate a logo description with streaming response"""
     async def stream_logo_description():
         try:
@@ -107,7 +108,7 @@ async def create_logo_description_stream(request: LogoRequest):
                 "message": str(e)
             }) + "\n\n"
     
-    return StreamingResponse(stream_logo_description(), media_type="text/plain")
+    return StreamingResponse(guard_disconnect(http_request, stream_logo_description(), "logo_description"), media_type="text/plain")
 
 @router.post("/logo/image", response_model=LogoImageResponse)
 async def create_logo_image(request: LogoRequest):
@@ -138,7 +139,7 @@ async def create_complete_logo(request: LogoRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/logo/image-stream")
-async def create_logo_image_stream(request: LogoRequest):
+async def create_logo_image_stream(request: LogoRequest, http_request: Request):
     """Generate logo image with streaming response for real-time updates"""
     async def stream_logo_generation():
         try:
@@ -166,7 +167,7 @@ async def create_logo_image_stream(request: LogoRequest):
                 "message": str(e)
             }) + "\n\n"
     
-    return StreamingResponse(stream_logo_generation(), media_type="text/plain")
+    return StreamingResponse(guard_disconnect(http_request, stream_logo_generation(), "logo_image"), media_type="text/plain")
 
 @router.get("/logo/color-palettes", response_model=List[ColorPalette])
 async def get_color_palettes():
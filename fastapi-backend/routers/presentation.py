@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from models.presentation import (
     OutlineRequest, 
     SlidesRequest, 
+    SlideRegenerateRequest,
+    SlideRegenerateResponse,
+    SlideUpdateRequest,
+    OutlineTopicRequest,
+    OutlineTopicResponse,
     PresentationCreateRequest,
     PresentationUpdateRequest,
     PresentationResponse,
@@ -11,17 +16,34 @@ from models.presentation import (
     GeneratedImageResponse,
     UserResponse
 )
-from services.presentation_service import outline_chain, slides_chain
+from services.presentation_service import (
+    outline_chain,
+    slides_chain,
+    generate_slides_parallel,
+    generate_outline_events,
+    regenerate_slide,
+    regenerate_outline_topic
+)
 from services.enhanced_image_service import enhanced_image_service
 from services.presentation_db_service import presentation_db_service
+from services.plate_slides import is_plate_slide, slide_summary
+from services.deck_image_service import stream_slide_events
+from services.stream_guard import guard_disconnect
 from typing import List
+import json
 
 router = APIRouter()
 
 # Existing presentation generation endpoints
 @router.post("/presentation/outline")
-async def generate_outline(request: OutlineRequest):
+async def generate_outline(request: OutlineRequest, http_request: Request):
     """Generate presentation outline using AI"""
+    if request.stream_format == "events":
+        return StreamingResponse(
+            guard_disconnect(http_request, stream_outline_events(request), "outline"),
+            media_type="text/event-stream"
+        )
+
     async def stream_response():
         async for chunk in outline_chain.astream({
             "prompt": request.prompt,
@@ -29,21 +51,125 @@ async def generate_outline(request: OutlineRequest):
             "language": request.language,
         }):
             yield chunk
-    return StreamingResponse(stream_response(), media_type="text/plain")
+    return StreamingResponse(guard_disconnect(http_request, stream_response(), "outline"), media_type="text/plain")
+
+async def stream_outline_events(request: OutlineRequest):
+    """Emit parsed outline topics and bullets as JSON events"""
+    try:
+        async for event in generate_outline_events(request.prompt, request.numberOfCards, request.language):
+            yield "data: " + json.dumps(event) + "\n\n"
+    except Exception as e:
+        yield "data: " + json.dumps({
+            "status": "error",
+            "message": str(e)
+        }) + "\n\n"
 
 @router.post("/presentation/generate")
-async def generate_slides(request: SlidesRequest):
+async def generate_slides(request: SlidesRequest, http_request: Request):
     """Generate presentation slides XML using AI"""
+    if request.stream_format == "events" or request.eager_images:
+        events = stream_slide_events(slides_stream(request), request.eager_images, request.user_email)
+        return StreamingResponse(
+            guard_disconnect(http_request, events, "slides"),
+            media_type="text/event-stream"
+        )
+
     async def stream_response():
-        async for chunk in slides_chain.astream({
-            "TITLE": request.title,
-            "LANGUAGE": request.language,
-            "TONE": request.tone,
-            "OUTLINE_FORMATTED": "\n\n".join(request.outline),
-            "TOTAL_SLIDES": len(request.outline),
-        }):
+        async for chunk in slides_stream(request):
             yield chunk
-    return StreamingResponse(stream_response(), media_type="application/xml")
+    return StreamingResponse(guard_disconnect(http_request, stream_response(), "slides"), media_type="application/xml")
+
+def slides_stream(request: SlidesRequest):
+    """Return the raw slides XML stream for the requested generation mode"""
+    if request.generation_mode == "parallel":
+        return generate_slides_parallel(
+            title=request.title,
+            outline=request.outline,
+            language=request.language,
+            tone=request.tone,
+            max_concurrency=request.max_concurrency
+        )
+    return slides_chain.astream({
+        "TITLE": request.title,
+        "LANGUAGE": request.language,
+        "TONE": request.tone,
+        "OUTLINE_FORMATTED": "\n\n".join(request.outline),
+        "TOTAL_SLIDES": len(request.outline),
+    })
+
+# Single slide / outline topic regeneration
+@router.post("/presentation/regenerate-slide", response_model=SlideRegenerateResponse)
+async def regenerate_single_slide(request: SlideRegenerateRequest):
+    """
+    Regenerate one slide using its neighbours as context. The new SECTION xml is
+    returned for the editor to parse and save with PUT /presentation/{id}/slides/{index}.
+    """
+    try:
+        stored_slides = []
+        if request.presentation_id:
+            presentation = await presentation_db_service.get_presentation(request.presentation_id)
+            if not presentation:
+                raise HTTPException(status_code=404, detail="Presentation not found")
+            stored_slides = (presentation.get("content") or {}).get("slides", [])
+
+        def stored(index: int):
+            return stored_slides[index] if 0 <= index < len(stored_slides) else None
+
+        index = request.slide_index
+        neighbours = request.neighbour_slides or [stored(index - 1), stored(index + 1)]
+        current = stored(index)
+
+        result = await regenerate_slide(
+            title=request.title,
+            outline=request.outline,
+            language=request.language,
+            tone=request.tone,
+            slide_index=index,
+            neighbour_slides=(neighbours + [None, None])[:2],
+            previous_slide=request.previous_slide or (slide_summary(current) if is_plate_slide(current) else ""),
+            instructions=request.instructions or ""
+        )
+
+        return SlideRegenerateResponse(
+            slide_index=index,
+            slide=result["slide"],
+            xml=result["xml"]
+        )
+    except HTTPException:
+        raise
+    except IndexError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/presentation/{presentation_id}/slides/{slide_index}", response_model=PresentationResponse)
+async def update_presentation_slide(presentation_id: str, slide_index: int, request: SlideUpdateRequest):
+    """Replace one stored slide with a PlateSlide, leaving the rest of the deck untouched"""
+    try:
+        presentation = await presentation_db_service.update_presentation_slide(presentation_id, slide_index, request.slide)
+    except (IndexError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not presentation:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+    return PresentationResponse(**presentation)
+
+@router.post("/presentation/regenerate-topic", response_model=OutlineTopicResponse)
+async def regenerate_single_topic(request: OutlineTopicRequest):
+    """Regenerate one outline topic using the rest of the outline as context"""
+    try:
+        return await regenerate_outline_topic(
+            prompt=request.prompt,
+            outline=request.outline,
+            topic_index=request.topic_index,
+            language=request.language,
+            instructions=request.instructions or ""
+        )
+    except IndexError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 # New image generation endpoint (replaces Together AI)
 @router.post("/presentation/generate-image", response_model=ImageGenerationResponse)
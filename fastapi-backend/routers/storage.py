@@ -1,20 +1,137 @@
 import os
-from fastapi import APIRouter, UploadFile, File, HTTPException
+import tempfile
+import uuid
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from models.storage import SignedUploadRequest, SignedUploadResponse, UploadCompleteRequest, UploadCompleteResponse
 from services import storage_service
 
 router = APIRouter()
 
+def _bucket_name() -> str:
+    bucket_name = os.getenv("GCS_BUCKET_NAME")
+    if not bucket_name:
+        raise HTTPException(status_code=500, detail="GCS_BUCKET_NAME environment variable not set.")
+    return bucket_name
+
+def _object_name(filename: Optional[str]) -> str:
+    safe_name = "".join(c for c in os.path.basename(filename or "") if c.isalnum() or c in ('.', '-', '_')) or "file"
+    return f"uploads/{str(uuid.uuid4())[:8]}_{safe_name}"
+
 @router.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
     """
-    Uploads a file to Google Cloud Storage.
+    Uploads a file to the configured storage backend.
+    The request's spooled file is streamed in chunks, so memory stays flat
+    whatever the file size; files over STORAGE_MAX_UPLOAD_BYTES get a 413.
     """
-    bucket_name = os.getenv("GCS_BUCKET_NAME")
-    if not bucket_name:
-        raise HTTPException(status_code=500, detail="GCS_BUCKET_NAME environment variable not set.")
+    bucket_name = _bucket_name()
 
     try:
-        file_url = storage_service.upload_to_gcs(file, bucket_name)
-        return {"filename": file.filename, "url": file_url}
+        result = await storage_service.upload_stream(
+            file.file,
+            _object_name(file.filename),
+            file.content_type or "application/octet-stream",
+            bucket_name,
+            size=file.size,
+            public=True,
+        )
+        return {"filename": file.filename, "url": result["url"], "size": result["size"], "sha256": result["sha256"]}
+    except storage_service.UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/upload/signed-url", response_model=SignedUploadResponse)
+async def create_signed_upload(request: SignedUploadRequest):
+    """
+    Issue a short-lived URL the client PUTs the file to directly, keeping
+    the bytes off the API. Call /upload/complete with the token afterwards.
+    """
+    bucket_name = _bucket_name()
+    if request.size is not None and request.size > storage_service.STORAGE_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {storage_service.STORAGE_MAX_UPLOAD_BYTES} bytes")
+
+    object_name = _object_name(request.filename)
+    try:
+        target = await storage_service.signed_upload(object_name, request.content_type, bucket_name)
+        return SignedUploadResponse(
+            upload_url=target["url"],
+            method=target["method"],
+            headers=target["headers"],
+            object_name=object_name,
+            public_url=storage_service.blob_public_url(object_name, bucket_name),
+            expires_at=target["expires_at"],
+            upload_token=target["upload_token"],
+        )
+    except storage_service.SigningUnavailable as e:
+        raise HTTPException(status_code=501, detail=f"Direct upload is unavailable: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/upload/direct/{bucket_name}/{object_name:path}")
+async def direct_upload(bucket_name: str, object_name: str, request: Request, method: str, expires: int,
+                        signature: str, content_type: Optional[str] = None):
+    """
+    Signed PUT target for the local and memory backends (GCS uploads go to
+    Google directly). The body is spooled to a temp file as it arrives.
+    """
+    if method != "PUT" or not storage_service.verify_signature(bucket_name, object_name, "PUT", expires, signature, content_type):
+        raise HTTPException(status_code=403, detail="Invalid or expired upload URL")
+    if content_type and request.headers.get("content-type") != content_type:
+        raise HTTPException(status_code=403, detail="Content-Type does not match the signed upload")
+
+    max_bytes = storage_service.STORAGE_MAX_UPLOAD_BYTES
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as spool:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+            spool.write(chunk)
+        spool.seek(0)
+
+        result = await storage_service.upload_stream(
+            spool, object_name, content_type or "application/octet-stream", bucket_name,
+            size=received, content_addressed=False
+        )
+    return {"url": result["url"], "size": result["size"], "sha256": result["sha256"]}
+
+@router.post("/upload/complete", response_model=UploadCompleteResponse)
+async def complete_upload(request: UploadCompleteRequest):
+    """Completion callback: check the object landed and register it in the database"""
+    bucket_name = _bucket_name()
+    if not storage_service.verify_upload_token(bucket_name, request.object_name, request.upload_token):
+        raise HTTPException(status_code=403, detail="Unknown upload")
+
+    info = await storage_service.stat(request.object_name, bucket_name)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Uploaded object not found")
+    if info["size"] is not None and info["size"] > storage_service.STORAGE_MAX_UPLOAD_BYTES:
+        await storage_service.delete(request.object_name, bucket_name)
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {storage_service.STORAGE_MAX_UPLOAD_BYTES} bytes")
+
+    url = storage_service.blob_public_url(request.object_name, bucket_name)
+    try:
+        # Imported here so the storage routes don't need the generated Prisma client until an upload completes
+        from services.presentation_db_service import presentation_db_service
+        record = await presentation_db_service.save_uploaded_file(
+            url=url,
+            bucket=bucket_name,
+            object_name=request.object_name,
+            filename=request.filename,
+            content_type=info["content_type"],
+            size=info["size"],
+            user_email=request.user_email
+        )
+    except Exception as e:
+        print(f"Error registering upload {request.object_name}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return UploadCompleteResponse(
+        id=record.get("id"),
+        url=url,
+        object_name=request.object_name,
+        size=info["size"],
+        content_type=info["content_type"],
+    )
@@ -1,6 +1,6 @@
 import requests
 import os
-from services.storage_service import upload_to_gcs
+from services import storage_service
 import io
 
 REMOVE_BG_API_KEY = os.getenv("REMOVE_BG_API_KEY", "LFNiKM3HshXHUc5vcWccHpiL")
@@ -27,7 +27,7 @@ async def remove_background_from_url(image_url: str):
                 raise Exception("GCS_BUCKET_NAME environment variable is not set")
 
             # Upload to Google Cloud Storage
-            public_url = upload_to_gcs(file_obj, file_name, "image/png", bucket_name)
+            public_url = await storage_service.upload(file_obj, file_name, "image/png", bucket_name)
             return {"new_image_url": public_url}
         else:
             raise Exception(f"Error from remove.bg API: {response.status_code} {response.text}")
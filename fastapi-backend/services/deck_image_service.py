@@ -0,0 +1,162 @@
+"""
+Eager image generation for streaming decks
+Starts DALL-E generation + GCS upload for each <IMG query> as soon as the
+slides stream closes the tag, instead of waiting for the browser to request
+every image after the whole deck has been parsed.
+"""
+import asyncio
+import json
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+from services.enhanced_image_service import enhanced_image_service
+from services.slide_stream_parser import SlideStreamParser
+
+DECK_IMAGE_MAX_CONCURRENCY = int(os.getenv("DECK_IMAGE_MAX_CONCURRENCY", "4"))
+DECK_IMAGE_SIZE = os.getenv("DECK_IMAGE_SIZE", "1792x1024")  # Landscape, matches /presentation/generate-image
+
+
+class DeckImagePrefetcher:
+    """
+    Schedules image generation for a single deck under a concurrency cap and
+    reports each finished image through ``on_event``.
+    Identical queries within a deck are generated once; every slide that
+    references a query gets its own image_ready or image_error event.
+    """
+
+    def __init__(
+        self,
+        on_event: Callable[[dict], None],
+        max_concurrency: int = DECK_IMAGE_MAX_CONCURRENCY,
+        size: str = DECK_IMAGE_SIZE,
+        user_email: Optional[str] = None,
+        image_service=None
+    ):
+        self.on_event = on_event
+        self.size = size
+        self.user_email = user_email
+        self.image_service = image_service or enhanced_image_service
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._slides: Dict[str, List[int]] = {}
+        # query -> ("ready", url) or ("error", message), once generation has finished
+        self._outcomes: Dict[str, Tuple[str, str]] = {}
+
+    def schedule(self, slide_index: int, query: str):
+        """Start generating an image for a query (called from the slide parser)"""
+        if query in self._outcomes:
+            # Already finished for an earlier slide, report it for this one too
+            self.on_event(self._event(slide_index, query, *self._outcomes[query]))
+            return
+        self._slides.setdefault(query, []).append(slide_index)
+        if query not in self._tasks:
+            self._tasks[query] = asyncio.create_task(self._generate(query))
+
+    async def _generate(self, query: str) -> Optional[str]:
+        async with self._semaphore:
+            try:
+                url = await self.image_service.generate_presentation_image(
+                    prompt=query,
+                    model="dall-e-3",
+                    size=self.size
+                )
+                outcome = ("ready", url)
+            except Exception as e:
+                outcome = ("error", str(e))
+
+        self._outcomes[query] = outcome
+        for slide_index in self._slides.pop(query, []):
+            self.on_event(self._event(slide_index, query, *outcome))
+
+        if outcome[0] == "ready" and self.user_email:
+            try:
+                # Imported here so the prefetcher doesn't need the generated Prisma client until it saves
+                from services.presentation_db_service import presentation_db_service
+                await presentation_db_service.save_generated_image(
+                    url=url,
+                    prompt=query,
+                    user_email=self.user_email,
+                    model="dall-e-3"
+                )
+            except Exception as e:
+                print(f"Error saving eagerly generated image: {e}")
+        return url if outcome[0] == "ready" else None
+
+    def _event(self, slide_index: int, query: str, kind: str, value: str) -> dict:
+        if kind == "ready":
+            return {"status": "image_ready", "slide_index": slide_index, "query": query, "url": value}
+        return {"status": "image_error", "slide_index": slide_index, "query": query, "message": value}
+
+    async def join(self):
+        """Wait for every scheduled image to finish (successfully or not)"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def cancel(self):
+        """Cancel images that are still queued or generating"""
+        for task in self._tasks.values():
+            task.cancel()
+
+
+async def stream_slide_events(xml_stream, eager_images: bool = False, user_email: Optional[str] = None,
+                              prefetcher_factory: Callable[..., DeckImagePrefetcher] = DeckImagePrefetcher):
+    """
+    Parse the slides stream server-side and emit one JSON event per completed slide.
+    With eager_images, IMG queries start generating as soon as their tag closes and
+    image events are interleaved into the same stream, never before their slide's event.
+    Closing the generator (client disconnect) cancels the images still in flight.
+    """
+    events = asyncio.Queue()
+    emitted_slides = set()
+    held: Dict[int, List[dict]] = {}  # Image events waiting for their slide to be emitted
+
+    def on_image_event(event: dict):
+        if event["slide_index"] in emitted_slides:
+            events.put_nowait(event)
+        else:
+            held.setdefault(event["slide_index"], []).append(event)
+
+    def emit_slide(slide: dict):
+        events.put_nowait({"status": "slide", "slide": slide})
+        emitted_slides.add(slide["index"])
+        for event in held.pop(slide["index"], []):
+            events.put_nowait(event)
+
+    prefetcher = prefetcher_factory(on_image_event, user_email=user_email) if eager_images else None
+    parser = SlideStreamParser(on_image=prefetcher.schedule if prefetcher else None)
+
+    async def produce():
+        try:
+            async for chunk in xml_stream:
+                for slide in parser.feed(chunk):
+                    emit_slide(slide)
+            for slide in parser.close():
+                emit_slide(slide)
+
+            if prefetcher:
+                events.put_nowait({"status": "slides_complete", "total_slides": parser.slide_count})
+                await prefetcher.join()
+                # Slides the parser never completed still get their image events
+                for index in sorted(held):
+                    for event in held.pop(index):
+                        events.put_nowait(event)
+
+            events.put_nowait({
+                "status": "complete",
+                "total_slides": parser.slide_count
+            })
+        except Exception as e:
+            events.put_nowait({
+                "status": "error",
+                "message": str(e)
+            })
+        finally:
+            events.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (event := await events.get()) is not None:
+            yield "data: " + json.dumps(event) + "\n\n"
+    finally:
+        producer.cancel()
+        if prefetcher:
+            prefetcher.cancel()
@@ -1,7 +1,7 @@
-from services.business_proposal_service import generate_business_proposal
-from services.partnership_agreement_service import generate_partnership_agreement
-from services.nda_service import generate_nda
-from services.contract_service import generate_contract
-from services.terms_of_service_service import generate_terms_of_service
-from services.privacy_policy_service import generate_privacy_policy
+from services.business_proposal_service import generate_business_proposal, stream_business_proposal
+from services.partnership_agreement_service import generate_partnership_agreement, stream_partnership_agreement
+from services.nda_service import generate_nda, stream_nda
+from services.contract_service import generate_contract, stream_contract
+from services.terms_of_service_service import generate_terms_of_service, stream_terms_of_service
+from services.privacy_policy_service import generate_privacy_policy, stream_privacy_policy
 from services.document_utils import save_document_to_gcs, save_docx_to_gcs
@@ -0,0 +1,312 @@
+"""
+Document Pipeline
+One engine for every generated document type. Each type declares a
+DocumentSpec (prompt, title, section numbering, header style, output
+formats); the pipeline runs the shared stages generate -> parse -> render
+-> upload, streaming events as it goes. Caching, offloading, pooling and
+metrics live here once instead of in six copies of the same service.
+"""
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import time
+import uuid
+import zipfile
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from docx import Document
+from services.document_utils import collect_document_result
+from services.docx_renderer import RenderSpec, render_docx, render_docx_file, streams_docx
+from services.llm_cache import InMemoryLLMCache, cached_chain
+from services.llm_metrics import Histogram, register
+from services.logo_cache import logo_cache
+from services.render_pool import render_pool
+from services.single_flight import request_key, single_flight
+from services.storage_service import DEFAULT_BUCKET, run_storage, upload_blob, upload_blob_stream, upload_once
+
+DOCUMENT_BUCKET = os.getenv("DOCUMENT_BUCKET", DEFAULT_BUCKET)
+RENDER_CACHE_TTL = int(os.getenv("RENDER_CACHE_TTL", "86400"))
+RENDER_CACHE_MAXSIZE = int(os.getenv("RENDER_CACHE_MAXSIZE", "256"))
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Output format -> (file extension, content type)
+OUTPUT_FORMATS = {
+    "docx": (".docx", DOCX_CONTENT_TYPE),
+    "html": (".html", "text/html"),
+    "markdown": (".md", "text/markdown"),
+}
+
+document_stage_seconds = register(Histogram(
+    "document_stage_seconds",
+    "Time spent in each document pipeline stage",
+    (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+    ("document_type", "stage"),
+))
+
+document_upload_seconds = register(Histogram(
+    "document_upload_seconds",
+    "Time to upload one artifact of a generated document",
+    (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    ("document_type", "format"),
+))
+
+# Deterministic documents: render key -> (content, urls) of an earlier identical run
+render_cache = InMemoryLLMCache(maxsize=RENDER_CACHE_MAXSIZE, ttl=RENDER_CACHE_TTL)
+
+class DocumentSpec:
+    """
+    Declarative description of one document type.
+
+    ``variables(data)`` builds the prompt inputs for LLM documents;
+    template-based documents provide ``template(data)`` instead.
+    ``outputs`` maps extra text formats (html, markdown) to builders,
+    ``build_body``/``build_result`` override the default body/result;
+    ``build_body`` runs in a render worker, so it must be a module-level function.
+    Documents that involve no LLM set ``cache_fields(data)`` to the normalized
+    inputs they render from; identical inputs then reuse the earlier uploads.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        document_type,
+        generated_for: Callable[[dict], str],
+        filename: Callable[[dict], str],
+        prompt=None,
+        model=None,
+        variables: Optional[Callable[[dict], Dict[str, Any]]] = None,
+        template: Optional[Callable[[dict], str]] = None,
+        title=None,
+        numbered_sections: int = 10,
+        header: Optional[str] = "logo",
+        footer_page_numbers: bool = False,
+        top_margin: float = 1.0,
+        title_size: int = 16,
+        formats: Tuple[str, ...] = ("docx",),
+        outputs: Optional[Dict[str, Callable[[dict, str], str]]] = None,
+        format_label: str = "DOCX with logo",
+        build_body: Optional[Callable[[Document, dict, str], None]] = None,
+        build_result: Optional[Callable[[dict, str, Dict[str, str]], Dict[str, Any]]] = None,
+        cache_fields: Optional[Callable[[dict], Dict[str, Any]]] = None,
+    ):
+        self.name = name
+        self.document_type = document_type
+        self.generated_for = generated_for
+        self.filename = filename
+        self.prompt = prompt
+        self.model = model
+        self.variables = variables
+        self.template = template
+        self.title = title or document_type
+        self.numbered_sections = numbered_sections
+        self.header = header  # "logo", "logo_and_page_number" or None
+        self.footer_page_numbers = footer_page_numbers
+        self.top_margin = top_margin
+        self.title_size = title_size
+        self.formats = formats
+        self.outputs = outputs or {}
+        self.format_label = format_label
+        self.build_body = build_body
+        self.build_result = build_result
+        self.cache_fields = cache_fields
+
+    def resolve(self, value, data: dict):
+        return value(data) if callable(value) else value
+
+    def render_spec(self, data: dict) -> RenderSpec:
+        return RenderSpec(
+            title=self.resolve(self.title, data),
+            numbered_sections=self.numbered_sections,
+            header=self.header,
+            footer_page_numbers=self.footer_page_numbers,
+            top_margin=self.top_margin,
+            title_size=self.title_size,
+            build_body=self.build_body,
+        )
+
+
+# --- Upload ---
+
+def upload_document(content, filename: str, content_type: str, bucket_name: str = DOCUMENT_BUCKET) -> str:
+    """
+    Upload bytes, or stream a rendered file in chunks, to the storage backend,
+    make it public and return the public URL
+    """
+    if isinstance(content, (bytes, bytearray)):
+        return upload_blob(content, filename, content_type, bucket_name, public=True, content_addressed=False)
+    return upload_blob_stream(content, filename, content_type, bucket_name, public=True, content_addressed=False)["url"]
+
+
+def upload_document_once(content, filename: str, content_type: str, bucket_name: str = DOCUMENT_BUCKET) -> str:
+    """Upload unless an object with this (content-addressed) name already exists"""
+    size = None if isinstance(content, (bytes, bytearray)) else os.fstat(content.fileno()).st_size
+    return upload_once(content, filename, content_type, bucket_name, public=True, size=size)
+
+
+async def upload_artifacts(
+    artifacts: Iterable[Tuple[str, str, Any, str]],
+    document_type: str,
+    once: bool = False,
+) -> Tuple[Dict[str, str], Dict[str, float]]:
+    """
+    Upload (format, filename, bytes or file, content type) artifacts concurrently in
+    the storage thread pool over the shared client. Returns the URLs and per-artifact
+    upload seconds, both keyed by format.
+    """
+    upload = upload_document_once if once else upload_document
+
+    async def timed(fmt: str, filename: str, content: bytes, content_type: str):
+        started = time.perf_counter()
+        url = await run_storage(upload, content, filename, content_type)
+        elapsed = time.perf_counter() - started
+        document_upload_seconds.observe(elapsed, document_type=document_type, format=fmt)
+        return fmt, url, elapsed
+
+    uploaded = await asyncio.gather(*(timed(*artifact) for artifact in artifacts))
+    urls = {fmt: url for fmt, url, _ in uploaded}
+    timings = {fmt: elapsed for fmt, _, elapsed in uploaded}
+    return urls, timings
+
+
+def content_digest(content, fmt: str) -> str:
+    """
+    Short hash of a rendered file (bytes, or a seekable file for streamed
+    renders). A .docx is hashed by its member names and CRCs, since the zip
+    stamps every member with the time it was written.
+    """
+    digest = hashlib.sha256()
+    if fmt == "docx":
+        source = io.BytesIO(content) if isinstance(content, (bytes, bytearray)) else content
+        for info in zipfile.ZipFile(source).infolist():
+            digest.update(f"{info.filename}:{info.CRC}:{info.file_size};".encode("utf-8"))
+        source.seek(0)
+    else:
+        digest.update(content)
+    return digest.hexdigest()[:16]
+
+
+def safe_filename_part(value: Optional[str]) -> str:
+    return (value or "").replace(' ', '_')
+
+
+# --- Pipeline ---
+
+class DocumentPipeline:
+    """Runs a DocumentSpec through generate -> parse -> render -> upload"""
+
+    def __init__(self, spec: DocumentSpec):
+        self.spec = spec
+        self.chain = cached_chain(spec.name, spec.prompt, spec.model) if spec.prompt is not None else None
+
+    def stream(self, data: dict):
+        """
+        Stream chunk events, then rendering/uploading stage events, then a
+        complete event with the result. Identical concurrent requests share one run.
+        """
+        return single_flight.stream(request_key(self.spec.name, data), lambda: self._run(data), name=self.spec.name)
+
+    async def generate(self, data: dict) -> Dict[str, Any]:
+        """Run the pipeline and return only the final result"""
+        return await collect_document_result(self.stream(data))
+
+    def _observe(self, stage: str, started: float):
+        document_stage_seconds.observe(
+            time.perf_counter() - started,
+            document_type=self.spec.name,
+            stage=stage
+        )
+
+    async def _run(self, data: dict):
+        spec = self.spec
+        document_type = spec.resolve(spec.document_type, data)
+        # Fetch the logo while the LLM is still writing; it's only needed at render time
+        logo_url = data.get("logo_url")
+        logo_task = asyncio.create_task(logo_cache.get(logo_url)) if spec.header and logo_url else None
+        docx_path, files = None, {}
+        try:
+            # Generate
+            started = time.perf_counter()
+            content = ""
+            if self.chain is not None:
+                async for chunk in self.chain.astream(spec.variables(data)):
+                    content += chunk
+                    yield {"status": "chunk", "content": chunk}
+            else:
+                content = spec.template(data)
+                yield {"status": "chunk", "content": content}
+            self._observe("generate", started)
+
+            # Deterministic documents: identical inputs and logo mean identical files
+            logo = await logo_task if logo_task and "docx" in spec.formats else None
+            cache_key = None
+            if spec.cache_fields is not None:
+                cache_key = request_key(spec.name, spec.cache_fields(data), spec.filename(data),
+                                        hashlib.sha256(logo.data).hexdigest() if logo else None)
+                cached = render_cache.get(cache_key)
+                if cached is not None:
+                    content, urls = cached
+                    yield {"status": "complete", "data": self._result(data, document_type, content, urls)}
+                    return
+
+            yield {"status": "rendering", "message": "Formatting DOCX..."}
+
+            # Parse + render run in the render worker pool
+            started = time.perf_counter()
+            if "docx" in spec.formats:
+                render_spec = spec.render_spec(data)
+                if streams_docx(render_spec, content):
+                    # Long documents go to a temp file and are streamed from there to storage
+                    fd, docx_path = tempfile.mkstemp(suffix=".docx")
+                    os.close(fd)
+                    await render_pool.run(render_docx_file, render_spec, data, content, logo, docx_path)
+                    files["docx"] = open(docx_path, "rb")
+                else:
+                    files["docx"] = await render_pool.run(render_docx, render_spec, data, content, logo)
+            for fmt, build in spec.outputs.items():
+                files[fmt] = build(data, content).encode("utf-8")
+            self._observe("render", started)
+
+            yield {"status": "uploading", "message": "Uploading to Google Cloud Storage..."}
+
+            # Upload every format at once; deterministic documents are named by content so repeats reuse the objects
+            started = time.perf_counter()
+            base_filename = spec.filename(data)
+            unique = f"_{str(uuid.uuid4())[:8]}"
+            artifacts = []
+            for fmt in spec.formats:
+                extension, content_type = OUTPUT_FORMATS[fmt]
+                suffix = f"_{content_digest(files[fmt], fmt)}" if cache_key else unique
+                artifacts.append((fmt, base_filename + suffix + extension, files[fmt], content_type))
+            urls, timings = await upload_artifacts(artifacts, spec.name, once=bool(cache_key))
+            self._observe("upload", started)
+            yield {"status": "uploaded", "timings": {fmt: round(seconds, 3) for fmt, seconds in timings.items()}}
+
+            if cache_key:
+                render_cache.set(cache_key, (content, urls))
+            yield {"status": "complete", "data": self._result(data, document_type, content, urls)}
+        except Exception as e:
+            print(f"Error in {document_type} generation: {e}")
+            raise e
+        finally:
+            if logo_task and not logo_task.done():
+                logo_task.cancel()
+            if docx_path:
+                if "docx" in files and not isinstance(files["docx"], bytes):
+                    files["docx"].close()
+                os.unlink(docx_path)
+
+    def _result(self, data: dict, document_type: str, content: str, urls: Dict[str, str]) -> Dict[str, Any]:
+        spec = self.spec
+        if spec.build_result:
+            return spec.build_result(data, content, urls)
+        return {
+            "document_content": content.strip(),
+            "document_url": urls.get("docx"),
+            "document_type": document_type,
+            "generated_for": spec.generated_for(data),
+            "creation_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "word_count": len(content.split()),
+            "format": spec.format_label
+        }
@@ -1,4 +1,6 @@
-from services.storage_service import upload_to_gcs
+from services import storage_service
+from services.logo_cache import logo_cache
+from services.render_pool import render_pool
 import io
 import os
 from docx import Document
@@ -7,12 +9,20 @@ from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml.shared import OxmlElement, qn
 from docx.oxml.ns import nsdecls
 from docx.oxml import parse_xml
-import requests
 from PIL import Image
-import tempfile
 from bs4 import BeautifulSoup
 import re
 
+async def collect_document_result(events):
+    """Drain a document event stream and return the data of its complete event"""
+    result = None
+    async for event in events:
+        if event.get("status") == "complete":
+            result = event["data"]
+    if result is None:
+        raise Exception("Document stream ended without a result")
+    return result
+
 async def save_document_to_gcs(document_content: str, document_type: str, generated_for: str):
     """Save document to Google Cloud Storage as a text file"""
     try:
@@ -28,7 +38,7 @@ async def save_document_to_gcs(document_content: str, document_type: str, genera
             raise Exception("GCS_BUCKET_NAME environment variable is not set")
         
         # Upload to Google Cloud Storage
-        public_url = upload_to_gcs(file_obj, file_name, "text/plain", bucket_name)
+        public_url = await storage_service.upload(file_obj, file_name, "text/plain", bucket_name)
         return public_url
     except Exception as e:
         print(f"Error saving document to GCS: {e}")
@@ -41,37 +51,45 @@ async def save_docx_to_gcs(document_content: str, document_type: str, generated_
         safe_name = "".join(c for c in generated_for if c.isalnum() or c in (' ', '-', '_')).strip()
         file_name = f"{document_type.replace(' ', '_')}_{safe_name.replace(' ', '_')[:30]}.docx"
         
-        # Create Word document
-        doc = Document()
-        
-        # Add logo to header if logo_url is provided
-        if logo_url:
-            await add_logo_to_header(doc, logo_url)
-        
-        # Process content based on type
-        if content_type == "html":
-            await process_html_content(doc, document_content)
-        else:
-            await process_text_content(doc, document_content)
-        
-        # Save document to bytes
-        doc_bytes = io.BytesIO()
-        doc.save(doc_bytes)
-        doc_bytes.seek(0)
+        # Fetch the logo here, build and serialise the document in a render worker
+        logo = await logo_cache.get(logo_url) if logo_url else None
+        doc_bytes = io.BytesIO(await render_pool.run(build_docx_bytes, document_content, content_type, logo, bool(logo_url)))
         
         bucket_name = os.getenv("GCS_BUCKET_NAME")
         if not bucket_name:
             raise Exception("GCS_BUCKET_NAME environment variable is not set")
         
         # Upload to Google Cloud Storage
-        public_url = upload_to_gcs(doc_bytes, file_name, "application/vnd.openxmlformats-officedocument.wordprocessingml.document", bucket_name)
+        public_url = await storage_service.upload(doc_bytes, file_name, "application/vnd.openxmlformats-officedocument.wordprocessingml.document", bucket_name)
         return public_url
     except Exception as e:
         print(f"Error saving .docx document to GCS: {e}")
         raise e
 
+def build_docx_bytes(document_content: str, content_type: str = "text", logo=None, with_header: bool = False) -> bytes:
+    """Build the .docx for save_docx_to_gcs and return its bytes (runs in a render worker)"""
+    doc = Document()
+
+    # Add logo to header if logo_url was provided
+    if with_header:
+        add_header_logo(doc, logo)
+
+    # Process content based on type
+    if content_type == "html":
+        add_html_content(doc, document_content)
+    else:
+        add_text_content(doc, document_content)
+
+    doc_bytes = io.BytesIO()
+    doc.save(doc_bytes)
+    return doc_bytes.getvalue()
+
 async def process_html_content(doc, html_content):
     """Process HTML content and add to Word document with proper formatting"""
+    add_html_content(doc, html_content)
+
+def add_html_content(doc, html_content):
+    """Synchronous body of process_html_content"""
     try:
         soup = BeautifulSoup(html_content, 'html.parser')
         
@@ -93,7 +111,7 @@ async def process_html_content(doc, html_content):
         try:
             soup = BeautifulSoup(html_content, 'html.parser')
             plain_text = soup.get_text()
-            await process_text_content(doc, plain_text)
+            add_text_content(doc, plain_text)
         except Exception as fallback_error:
             print(f"Error in fallback text processing: {fallback_error}")
             # Ultimate fallback - add raw content
@@ -196,6 +214,10 @@ def process_html_elements(doc, element):
 
 async def process_text_content(doc, document_content):
     """Process plain text content and add to Word document"""
+    add_text_content(doc, document_content)
+
+def add_text_content(doc, document_content):
+    """Synchronous body of process_text_content"""
     # Split content into paragraphs and add to document
     paragraphs = document_content.split('\n\n')
     for paragraph in paragraphs:
@@ -221,6 +243,10 @@ async def process_text_content(doc, document_content):
 
 async def add_logo_to_header(doc, logo_url):
     """Add logo to document header"""
+    add_header_logo(doc, await logo_cache.get(logo_url))
+
+def add_header_logo(doc, logo):
+    """Add a cached logo (or just the company name if it's missing) to the document header"""
     try:
         # Get the header
         section = doc.sections[0]
@@ -230,27 +256,15 @@ async def add_logo_to_header(doc, logo_url):
         header_paragraph = header.paragraphs[0]
         header_paragraph.alignment = WD_ALIGN_PARAGRAPH.LEFT
         
-        # Download logo image
-        response = requests.get(logo_url)
-        if response.status_code == 200:
-            # Create temporary file for logo
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
-                tmp_file.write(response.content)
-                tmp_file_path = tmp_file.name
-            
-            try:
-                # Add logo to header
-                run = header_paragraph.runs[0] if header_paragraph.runs else header_paragraph.add_run()
-                run.add_picture(tmp_file_path, width=Inches(1.0))
-                
-                # Add company name next to logo
-                run.add_text("  ScaleBuild AI")
-                run.font.size = Pt(12)
-                run.font.bold = True
-                
-            finally:
-                # Clean up temp file
-                os.unlink(tmp_file_path)
+        if logo is not None:
+            # Add logo to header
+            run = header_paragraph.runs[0] if header_paragraph.runs else header_paragraph.add_run()
+            run.add_picture(logo.stream(), width=Inches(logo.width), height=Inches(logo.height))
+
+            # Add company name next to logo
+            run.add_text("  ScaleBuild AI")
+            run.font.size = Pt(12)
+            run.font.bold = True
         else:
             # If logo can't be downloaded, just add text
             run = header_paragraph.runs[0] if header_paragraph.runs else header_paragraph.add_run()
@@ -2,12 +2,10 @@
 Enhanced Image Generation Service for Presentations
 Replaces Together AI with DALL-E and UploadThing with Google Cloud Storage
 """
-import os
 import base64
 import io
-from typing import Optional
-from openai import OpenAI
-from services.storage_service import upload_to_gcs
+from services.llm_clients import get_async_openai_client
+from services import storage_service
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -17,8 +15,7 @@ class EnhancedImageService:
     """Enhanced image generation service using DALL-E and GCS"""
     
     def __init__(self):
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.gcs_bucket = os.getenv("GCS_BUCKET_NAME", "deck123")
+        self.gcs_bucket = storage_service.DEFAULT_BUCKET
     
     async def generate_presentation_image(
         self, 
@@ -44,7 +41,7 @@ class EnhancedImageService:
             print(f"📝 Prompt: {prompt}")
             
             # Generate image with DALL-E
-            response = self.openai_client.images.generate(
+            response = await get_async_openai_client().images.generate(
                 model=model,
                 prompt=prompt,
                 size=size,
@@ -70,12 +67,7 @@ class EnhancedImageService:
             print(f"☁️ Uploading to GCS as: {filename}")
             file_obj = io.BytesIO(image_data)
             
-            public_url = upload_to_gcs(
-                file=file_obj,
-                filename=filename,
-                content_type="image/png",
-                bucket_name=self.gcs_bucket
-            )
+            public_url = await storage_service.upload(file_obj, filename, "image/png", self.gcs_bucket)
             
             print(f"✅ Image uploaded successfully to: {public_url}")
             return public_url
@@ -127,8 +119,3 @@ enhanced_image_service = EnhancedImageService()
 async def generate_presentation_image(prompt: str, model: str = "dall-e-3") -> str:
     """Generate image for presentations"""
     return await enhanced_image_service.generate_presentation_image(prompt, model)
-
-def generate_and_upload_image(prompt: str) -> str:
-    """Synchronous wrapper for backward compatibility"""
-    import asyncio
-    return asyncio.run(enhanced_image_service.generate_presentation_image(prompt))
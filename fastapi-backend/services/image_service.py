@@ -1,20 +1,14 @@
-from openai import OpenAI
+from services.llm_clients import get_async_openai_client
 import base64
-from services.storage_service import upload_to_gcs
+from services import storage_service
 import io
 import os
 from typing import Optional, Dict, Any
-import asyncio
 from datetime import datetime
 
-client = OpenAI()
-
 class PresentationImageService:
     """Enhanced image service for presentations with DALL-E and GCS storage"""
     
-    def __init__(self):
-        self.client = OpenAI()
-    
     async def generate_presentation_image(
         self, 
         prompt: str, 
@@ -26,9 +20,7 @@ class PresentationImageService:
         Returns both the GCS URL and metadata
         """
         try:
-            # Run the sync OpenAI call in a thread pool
-            response = await asyncio.to_thread(
-                self.client.images.generate,
+            response = await get_async_openai_client().images.generate(
                 model="dall-e-3",
                 prompt=prompt,
                 size=size,
@@ -52,13 +44,7 @@ class PresentationImageService:
                     raise Exception("GCS_BUCKET_NAME is not set")
 
                 # Upload to GCS
-                public_url = await asyncio.to_thread(
-                    upload_to_gcs, 
-                    file_obj, 
-                    file_name, 
-                    "image/png", 
-                    bucket_name
-                )
+                public_url = await storage_service.upload(file_obj, file_name, "image/png", bucket_name)
                 
                 return {
                     "url": public_url,
@@ -103,10 +89,10 @@ class PresentationImageService:
 presentation_image_service = PresentationImageService()
 
 # Keep backward compatibility
-def generate_and_upload_image(prompt: str):
+async def generate_and_upload_image(prompt: str):
     """Backward compatible function for existing code"""
     try:
-        response = client.images.generate(
+        response = await get_async_openai_client().images.generate(
             model="dall-e-3",
             prompt=prompt,
             size="1024x1024",
@@ -126,7 +112,7 @@ def generate_and_upload_image(prompt: str):
                 raise Exception("GCS_BUCKET_NAME is not set")
 
             # Pass the file-like object and metadata directly
-            public_url = upload_to_gcs(file_obj, file_name, "image/png", bucket_name)
+            public_url = await storage_service.upload(file_obj, file_name, "image/png", bucket_name)
             return public_url
         else:
             raise Exception("Failed to generate image or no image data returned.")
@@ -0,0 +1,245 @@
+"""
+LLM Response Cache
+Wraps the LangChain prompt | model | parser chains so byte-identical requests
+can be served from an in-memory LRU or an on-disk SQLite cache instead of OpenAI.
+Caching is off unless LLM_CACHE_BACKEND is set, since a hit returns the same
+text for a repeated creative prompt. Cached completions are replayed as a
+chunked stream, so streaming endpoints behave the same on a hit as on a miss.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from langchain.schema.output_parser import StrOutputParser
+from services.llm_metrics import instrument
+from services.single_flight import single_flight
+
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "none")  # "memory", "sqlite" or "none"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_MAXSIZE = int(os.getenv("LLM_CACHE_MAXSIZE", "512"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+LLM_CACHE_REPLAY_CHUNK = int(os.getenv("LLM_CACHE_REPLAY_CHUNK", "32"))
+
+
+class InMemoryLLMCache:
+    """Process-local LRU cache with per-entry TTL"""
+
+    blocking = False
+
+    def __init__(self, maxsize: int = LLM_CACHE_MAXSIZE, ttl: int = LLM_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str):
+        self._entries[key] = (value, time.time() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class SQLiteLLMCache:
+    """On-disk cache shared across workers and restarts"""
+
+    # Reads and writes hit the disk, so chains call them off the event loop
+    blocking = True
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: int = LLM_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row[0]
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+
+def create_llm_cache(backend: str = LLM_CACHE_BACKEND):
+    """Build the configured cache backend, or None when caching is disabled"""
+    if backend == "memory":
+        return InMemoryLLMCache()
+    if backend == "sqlite":
+        return SQLiteLLMCache()
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown LLM_CACHE_BACKEND: {backend}")
+
+
+llm_cache = create_llm_cache()
+
+# Hit/miss counters per chain name
+cache_stats: Dict[str, Dict[str, int]] = {}
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters per chain plus totals"""
+    hits = sum(s["hits"] for s in cache_stats.values())
+    misses = sum(s["misses"] for s in cache_stats.values())
+    return {
+        "backend": LLM_CACHE_BACKEND,
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        "chains": cache_stats,
+    }
+
+
+class CachedChain:
+    """
+    Drop-in replacement for ``prompt | model | StrOutputParser()`` that
+    consults the LLM cache before calling the model. Supports the
+    ``astream`` and ``ainvoke`` calls the services use.
+    """
+
+    def __init__(self, name: str, prompt, model, cache=None, coalesce: bool = True):
+        self.name = name
+        self.prompt = prompt
+        self.model = model
+        # cache=None uses the shared cache, cache=False never caches
+        self.cache = llm_cache if cache is None else (None if cache is False else cache)
+        self.coalesce = coalesce
+        self._chain = None
+        self._bound_model = None
+        self.template_hash = hashlib.sha256(prompt.template.encode("utf-8")).hexdigest()
+        cache_stats.setdefault(name, {"hits": 0, "misses": 0})
+
+    @property
+    def chain(self):
+        """
+        The underlying chain. The model is looked up from the client registry on
+        every call, so the chain is rebuilt after close_clients() swaps it out.
+        """
+        model = self.model.build() if hasattr(self.model, "build") else self.model
+        if self._chain is None or self._bound_model is not model:
+            self._chain = self.prompt | model | StrOutputParser()
+            self._bound_model = model
+        return self._chain
+
+    def cache_key(self, inputs: Dict[str, Any]) -> str:
+        """Key on model name, temperature, template hash and rendered variables"""
+        payload = json.dumps({
+            "model": getattr(self.model, "model_name", None),
+            "temperature": getattr(self.model, "temperature", None),
+            "template": self.template_hash,
+            "variables": {k: str(v) for k, v in inputs.items()},
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def _cache_call(self, method: str, *args):
+        operation = getattr(self.cache, method)
+        if getattr(self.cache, "blocking", False):
+            return await asyncio.to_thread(operation, *args)
+        return operation(*args)
+
+    async def _lookup(self, inputs: Dict[str, Any]):
+        key = self.cache_key(inputs)
+        if self.cache is None:
+            return key, None
+        cached = await self._cache_call("get", key)
+        cache_stats[self.name]["hits" if cached is not None else "misses"] += 1
+        return key, cached
+
+    async def astream(self, inputs: Dict[str, Any], config: Optional[Dict[str, Any]] = None):
+        key, cached = await self._lookup(inputs)
+        if cached is not None:
+            for start in range(0, len(cached), LLM_CACHE_REPLAY_CHUNK):
+                yield cached[start:start + LLM_CACHE_REPLAY_CHUNK]
+                await asyncio.sleep(0)
+            return
+
+        if not self.coalesce:
+            stream = self._stream_and_store(key, inputs, config)
+        else:
+            # Identical requests already streaming share that upstream call
+            stream = single_flight.stream(
+                f"{self.name}:{key}", lambda: self._stream_and_store(key, inputs, config), name=self.name
+            )
+        async for chunk in stream:
+            yield chunk
+
+    async def _stream_and_store(self, key: str, inputs: Dict[str, Any], config: Optional[Dict[str, Any]]):
+        parts = []
+        async for chunk in self.chain.astream(inputs, config=instrument(self.name, config)):
+            parts.append(chunk)
+            yield chunk
+
+        # Only completions that streamed to the end are cached
+        if self.cache is not None:
+            await self._cache_call("set", key, "".join(parts))
+
+    async def ainvoke(self, inputs: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> str:
+        key, cached = await self._lookup(inputs)
+        if cached is not None:
+            return cached
+
+        if not self.coalesce:
+            return await self._invoke_and_store(key, inputs, config)
+        return await single_flight.do(
+            f"{self.name}:{key}", lambda: self._invoke_and_store(key, inputs, config), name=self.name
+        )
+
+    async def _invoke_and_store(self, key: str, inputs: Dict[str, Any], config: Optional[Dict[str, Any]]) -> str:
+        result = await self.chain.ainvoke(inputs, config=instrument(self.name, config))
+        if self.cache is not None:
+            await self._cache_call("set", key, result)
+        return result
+
+
+def cached_chain(name: str, prompt, model) -> CachedChain:
+    """Build a cached prompt | model | StrOutputParser() chain"""
+    return CachedChain(name, prompt, model)
+
+
+def fresh_chain(name: str, prompt, model) -> CachedChain:
+    """
+    Build an instrumented chain that reaches the model on every call: no response
+    cache and no single-flight, for requests that ask for a new completion.
+    """
+    return CachedChain(name, prompt, model, cache=False, coalesce=False)
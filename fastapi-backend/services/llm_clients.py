@@ -0,0 +1,139 @@
+"""
+Shared OpenAI Client Registry
+Hands out process-wide sync/async OpenAI clients and ChatOpenAI models that all
+ride on one tuned httpx connection pool (keep-alive, HTTP/2 when available).
+Everything is built on first use, so importing a service no longer opens
+its own connection pool or TLS session.
+"""
+import os
+import threading
+from typing import Dict, Optional, Tuple
+import httpx
+
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "600"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+
+try:
+    import h2  # noqa: F401  HTTP/2 support for httpx is optional
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_lock = threading.RLock()
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_openai_client = None
+_async_openai_client = None
+_chat_models: Dict[Tuple[str, float, bool], object] = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+
+
+def get_http_client() -> httpx.Client:
+    """Shared sync httpx pool used by every sync OpenAI call"""
+    global _http_client
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                _http_client = httpx.Client(limits=_limits(), timeout=_timeout(), http2=HTTP2_AVAILABLE)
+    return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Shared async httpx pool used by every async OpenAI call"""
+    global _async_http_client
+    if _async_http_client is None:
+        with _lock:
+            if _async_http_client is None:
+                _async_http_client = httpx.AsyncClient(limits=_limits(), timeout=_timeout(), http2=HTTP2_AVAILABLE)
+    return _async_http_client
+
+
+def get_openai_client():
+    """Shared sync OpenAI SDK client"""
+    global _openai_client
+    if _openai_client is None:
+        from openai import OpenAI
+        with _lock:
+            if _openai_client is None:
+                _openai_client = OpenAI(http_client=get_http_client())
+    return _openai_client
+
+
+def get_async_openai_client():
+    """Shared async OpenAI SDK client"""
+    global _async_openai_client
+    if _async_openai_client is None:
+        from openai import AsyncOpenAI
+        with _lock:
+            if _async_openai_client is None:
+                _async_openai_client = AsyncOpenAI(http_client=get_async_http_client())
+    return _async_openai_client
+
+
+def get_chat_model(model_name: str, temperature: float, streaming: bool = False):
+    """Shared ChatOpenAI instance for a given model configuration"""
+    key = (model_name, temperature, streaming)
+    model = _chat_models.get(key)
+    if model is None:
+        from langchain_openai import ChatOpenAI
+        with _lock:
+            model = _chat_models.get(key)
+            if model is None:
+                model = _chat_models[key] = ChatOpenAI(
+                    model_name=model_name,
+                    temperature=temperature,
+                    streaming=streaming,
+                    stream_usage=True,
+                    http_client=get_http_client(),
+                    http_async_client=get_async_http_client(),
+                )
+    return model
+
+
+class ChatModelSpec:
+    """
+    Lazy handle for a ChatOpenAI configuration.
+    Services declare their model at import time with ``chat_model(...)``;
+    the underlying client is only constructed by ``build()`` on first use.
+    """
+
+    def __init__(self, model_name: str, temperature: float, streaming: bool = False):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.streaming = streaming
+
+    def build(self):
+        return get_chat_model(self.model_name, self.temperature, self.streaming)
+
+    def __repr__(self):
+        return f"ChatModelSpec(model_name={self.model_name!r}, temperature={self.temperature!r}, streaming={self.streaming!r})"
+
+
+def chat_model(model_name: str, temperature: float, streaming: bool = False) -> ChatModelSpec:
+    """Declare a chat model without constructing it"""
+    return ChatModelSpec(model_name, temperature, streaming)
+
+
+async def close_clients():
+    """Close the shared connection pools (called on application shutdown)"""
+    global _http_client, _async_http_client, _openai_client, _async_openai_client
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+    if _http_client is not None:
+        _http_client.close()
+    _http_client = _async_http_client = _openai_client = _async_openai_client = None
+    _chat_models.clear()
@@ -0,0 +1,227 @@
+"""
+LLM Metrics
+Callback-based instrumentation for LangChain chains. Records time-to-first-token,
+inter-token gaps, tokens/sec, prompt and completion token counts and total
+duration per chain and model, and renders them in Prometheus text format.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+GAP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+RATE_BUCKETS = (5, 10, 20, 40, 60, 80, 100, 150, 200, 300)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...], labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        self._series: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series["buckets"][i] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    def mean(self, **labels) -> Optional[float]:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._series.get(key)
+        if not series or not series["count"]:
+            return None
+        return series["sum"] / series["count"]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            labels = _format_labels(self.labelnames, key)
+            for bound, count in zip(self.buckets, series["buckets"]):
+                bucket_labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            inf_labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {series['count']}")
+            lines.append(f"{self.name}_sum{labels} {series['sum']}")
+            lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+# "chain" is the CachedChain name (outline, slides, nda, ...), not the HTTP route
+LABELS = ("chain", "model")
+
+llm_requests_total = Counter("llm_requests_total", "LLM calls by outcome", LABELS + ("status",))
+llm_time_to_first_token = Histogram("llm_time_to_first_token_seconds", "Time from request to first streamed token", LATENCY_BUCKETS, LABELS)
+llm_inter_token_gap = Histogram("llm_inter_token_gap_seconds", "Gap between consecutive streamed tokens", GAP_BUCKETS, LABELS)
+llm_tokens_per_second = Histogram("llm_tokens_per_second", "Completion tokens per second after the first token", RATE_BUCKETS, LABELS)
+llm_prompt_tokens = Histogram("llm_prompt_tokens", "Prompt tokens per call", TOKEN_BUCKETS, LABELS)
+llm_completion_tokens = Histogram("llm_completion_tokens", "Completion tokens per call", TOKEN_BUCKETS, LABELS)
+llm_request_duration = Histogram("llm_request_duration_seconds", "Total duration of an LLM call", LATENCY_BUCKETS, LABELS)
+llm_tokens_saved_total = Counter("llm_tokens_saved_total", "Estimated completion tokens not generated because the stream was cancelled", LABELS)
+cancelled_streams_total = Counter("cancelled_streams_total", "Streaming responses abandoned by the client", ("stream",))
+
+METRICS = [
+    llm_requests_total,
+    llm_time_to_first_token,
+    llm_inter_token_gap,
+    llm_tokens_per_second,
+    llm_prompt_tokens,
+    llm_completion_tokens,
+    llm_request_duration,
+    llm_tokens_saved_total,
+    cancelled_streams_total,
+]
+
+
+def register(metric):
+    """Add a metric defined elsewhere to the /metrics exposition"""
+    if metric not in METRICS:
+        METRICS.append(metric)
+    return metric
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Collects timing and token metrics for every chat model run of a chain"""
+
+    run_inline = True
+
+    def __init__(self, chain: str):
+        self.chain = chain
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id: UUID, **kwargs: Any):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model_name") or params.get("model") or (serialized.get("kwargs") or {}).get("model_name", "unknown")
+        self._runs[run_id] = {"model": model, "start": time.perf_counter(), "first": None, "last": None, "tokens": 0}
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any):
+        run = self._runs.get(run_id)
+        if run is None or not token:
+            return
+        now = time.perf_counter()
+        labels = {"chain": self.chain, "model": run["model"]}
+        if run["first"] is None:
+            run["first"] = now
+            llm_time_to_first_token.observe(now - run["start"], **labels)
+        else:
+            llm_inter_token_gap.observe(now - run["last"], **labels)
+        run["last"] = now
+        run["tokens"] += 1
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        now = time.perf_counter()
+        labels = {"chain": self.chain, "model": run["model"]}
+
+        prompt_tokens, completion_tokens = _token_usage(response)
+        if completion_tokens is None:
+            # No usage reported: each streamed OpenAI chunk carries one token
+            completion_tokens = run["tokens"]
+
+        llm_requests_total.inc(status="success", **labels)
+        llm_request_duration.observe(now - run["start"], **labels)
+        llm_completion_tokens.observe(completion_tokens, **labels)
+        if prompt_tokens is not None:
+            llm_prompt_tokens.observe(prompt_tokens, **labels)
+        if run["first"] is not None and now > run["first"]:
+            llm_tokens_per_second.observe(completion_tokens / (now - run["first"]), **labels)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        labels = {"chain": self.chain, "model": run["model"]}
+        if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+            llm_requests_total.inc(status="cancelled", **labels)
+            # Estimate the rest of the completion from what this chain usually generates
+            expected = llm_completion_tokens.mean(**labels)
+            if expected is not None:
+                llm_tokens_saved_total.inc(max(expected - run["tokens"], 0), **labels)
+            return
+        llm_requests_total.inc(status="error", **labels)
+
+
+def _token_usage(response) -> Tuple[Optional[int], Optional[int]]:
+    """Read prompt/completion token counts from an LLMResult if the provider sent them"""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens"), usage.get("completion_tokens")
+
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return metadata.get("input_tokens"), metadata.get("output_tokens")
+    return None, None
+
+
+def instrument(chain: str, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Return a runnable config with the metrics callback for ``chain`` attached"""
+    config = dict(config or {})
+    callbacks = list(config.get("callbacks") or [])
+    callbacks.append(LLMMetricsCallback(chain))
+    config["callbacks"] = callbacks
+    return config
+
+
+def render_metrics() -> str:
+    """Render all registered metrics in Prometheus text exposition format"""
+    # Imported here to avoid a cycle: the cache wraps chains with instrument()
+    from services.llm_cache import cache_stats
+
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+
+    for kind in ("hits", "misses"):
+        name = f"llm_cache_{kind}_total"
+        lines.append(f"# HELP {name} LLM response cache {kind}")
+        lines.append(f"# TYPE {name} counter")
+        for chain, stats in sorted(cache_stats.items()):
+            lines.append(f'{name}{{chain="{chain}"}} {stats[kind]}')
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,304 @@
+"""
+Logo Asset Cache
+Document headers embed the same few logos over and over. Instead of
+downloading the full-resolution image (usually a 1024x1024 DALL-E PNG)
+for every request and letting python-docx embed it as-is, logos are
+fetched once, resized to the header box, re-encoded and kept in a
+bounded in-memory LRU backed by a bounded on-disk LRU. Stale entries are
+revalidated with ETag / Last-Modified instead of being downloaded again.
+
+Fetches go through a pooled async httpx client with a byte limit, so a
+slow or huge logo never blocks the event loop; image work and disk I/O
+run in worker threads.
+"""
+import asyncio
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+import httpx
+from PIL import Image
+from services.llm_metrics import Counter, register
+from services.single_flight import single_flight
+
+LOGO_CACHE_TTL = int(os.getenv("LOGO_CACHE_TTL", "300"))  # Seconds before an entry is revalidated
+LOGO_CACHE_MAXSIZE = int(os.getenv("LOGO_CACHE_MAXSIZE", "128"))  # In-memory entries
+LOGO_CACHE_DISK_BYTES = int(os.getenv("LOGO_CACHE_DISK_BYTES", str(64 * 1024 * 1024)))
+LOGO_CACHE_DIR = os.getenv("LOGO_CACHE_DIR", os.path.join(tempfile.gettempdir(), "scalebuild-logo-cache"))
+LOGO_DPI = int(os.getenv("LOGO_DPI", "300"))
+LOGO_FETCH_TIMEOUT = float(os.getenv("LOGO_FETCH_TIMEOUT", "15"))
+LOGO_MAX_BYTES = int(os.getenv("LOGO_MAX_BYTES", str(10 * 1024 * 1024)))
+LOGO_MAX_CONNECTIONS = int(os.getenv("LOGO_MAX_CONNECTIONS", "20"))
+
+# Header logo box, in inches
+LOGO_MAX_WIDTH = 1.0
+LOGO_MAX_HEIGHT = 0.6
+
+LOGO_REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Magic numbers of the formats python-docx can embed
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+logo_cache_requests_total = register(Counter(
+    "logo_cache_requests_total",
+    "Logo lookups by outcome",
+    ("result",),  # hit, revalidated, miss, error
+))
+
+
+class LogoAsset:
+    """A header-ready logo: encoded image bytes plus its display size in inches"""
+
+    def __init__(self, data: bytes, width: float, height: float, etag: Optional[str] = None,
+                 last_modified: Optional[str] = None, checked_at: Optional[float] = None):
+        self.data = data
+        self.width = width
+        self.height = height
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked_at = checked_at if checked_at is not None else time.time()
+
+    def stream(self) -> io.BytesIO:
+        """Fresh in-memory buffer for add_picture"""
+        return io.BytesIO(self.data)
+
+    def meta(self) -> dict:
+        return {
+            "width": self.width,
+            "height": self.height,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "checked_at": self.checked_at,
+        }
+
+
+def sniff_image_type(data: bytes) -> Optional[str]:
+    """Image content type from the leading bytes, ignoring what the server claims"""
+    for signature, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def prepare_logo(raw: bytes, dpi: int = LOGO_DPI) -> LogoAsset:
+    """Resize the image to fit the header box at the given DPI and re-encode it"""
+    with Image.open(io.BytesIO(raw)) as image:
+        image.load()
+        has_alpha = image.mode in ("RGBA", "LA", "P") and (image.mode != "P" or "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+        # Fit inside the box without distorting the logo
+        scale = min(LOGO_MAX_WIDTH / image.width, LOGO_MAX_HEIGHT / image.height)
+        width, height = image.width * scale, image.height * scale
+        pixels = (max(1, round(width * dpi)), max(1, round(height * dpi)))
+        if pixels[0] < image.width:
+            image = image.resize(pixels, Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        if has_alpha:
+            image.save(buffer, format="PNG", optimize=True)
+        else:
+            image.save(buffer, format="JPEG", quality=90, optimize=True)
+    return LogoAsset(buffer.getvalue(), round(width, 4), round(height, 4))
+
+
+class DiskLogoStore:
+    """On-disk LRU of prepared logos, bounded by total bytes"""
+
+    def __init__(self, directory: str = LOGO_CACHE_DIR, max_bytes: int = LOGO_CACHE_DISK_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, key: str):
+        base = os.path.join(self.directory, key)
+        return base + ".img", base + ".json"
+
+    def get(self, key: str) -> Optional[LogoAsset]:
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(data_path, "rb") as f:
+                data = f.read()
+            os.utime(data_path)  # Mark as recently used
+        except (OSError, ValueError):
+            return None
+        return LogoAsset(data, **meta)
+
+    def set(self, key: str, asset: LogoAsset):
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(data_path, "wb") as f:
+                f.write(asset.data)
+            with open(meta_path, "w") as f:
+                json.dump(asset.meta(), f)
+            self._prune()
+        except OSError as e:
+            print(f"Error writing logo cache entry: {e}")
+
+    def _prune(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".img"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name[:-4]))
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+
+
+class LogoCache:
+    """URL -> LogoAsset cache: memory LRU in front of a disk LRU, revalidated after ttl"""
+
+    def __init__(self, maxsize: int = LOGO_CACHE_MAXSIZE, ttl: int = LOGO_CACHE_TTL,
+                 disk: Optional[DiskLogoStore] = None, client: Optional[httpx.AsyncClient] = None,
+                 max_bytes: int = LOGO_MAX_BYTES):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk = disk
+        self.max_bytes = max_bytes
+        self._client = client
+        self._entries: "OrderedDict[str, LogoAsset]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled async client for logo downloads, created on first use"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=LOGO_REQUEST_HEADERS,
+                timeout=httpx.Timeout(LOGO_FETCH_TIMEOUT),
+                limits=httpx.Limits(max_connections=LOGO_MAX_CONNECTIONS),
+                follow_redirects=True,
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _lookup(self, key: str) -> Optional[LogoAsset]:
+        with self._lock:
+            asset = self._entries.get(key)
+            if asset is not None:
+                self._entries.move_to_end(key)
+                return asset
+        asset = await asyncio.to_thread(self.disk.get, key) if self.disk else None
+        if asset is not None:
+            self._remember(key, asset)
+        return asset
+
+    def _remember(self, key: str, asset: LogoAsset):
+        with self._lock:
+            self._entries[key] = asset
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    async def _store(self, key: str, asset: LogoAsset):
+        self._remember(key, asset)
+        if self.disk:
+            await asyncio.to_thread(self.disk.set, key, asset)
+
+    async def _download(self, url: str, headers: dict):
+        """GET url, stopping as soon as the body exceeds max_bytes"""
+        async with self.client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304:
+                return response, b""
+            response.raise_for_status()
+            declared = response.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                raise ValueError(f"Logo is larger than {self.max_bytes} bytes")
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) > self.max_bytes:
+                    raise ValueError(f"Logo is larger than {self.max_bytes} bytes")
+        return response, bytes(body)
+
+    async def get(self, url: str) -> Optional[LogoAsset]:
+        """Header-ready logo for url, or None (and logged) if it can't be fetched"""
+        key = self.key(url)
+        cached = await self._lookup(key)
+        if cached is not None and time.time() - cached.checked_at < self.ttl:
+            logo_cache_requests_total.inc(result="hit")
+            return cached
+        # Concurrent documents with the same logo share one download
+        return await single_flight.do(f"logo:{key}", lambda: self._refresh(url, key, cached), name="logo")
+
+    async def _refresh(self, url: str, key: str, cached: Optional[LogoAsset]) -> Optional[LogoAsset]:
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        try:
+            response, body = await self._download(url, headers)
+            if cached is not None and response.status_code == 304:
+                cached.checked_at = time.time()
+                await self._store(key, cached)
+                logo_cache_requests_total.inc(result="revalidated")
+                return cached
+            if not body:
+                raise ValueError("Downloaded logo file is empty")
+            if sniff_image_type(body) is None:
+                raise ValueError(f"Logo is not a supported image (Content-Type: {response.headers.get('Content-Type')})")
+
+            asset = await asyncio.to_thread(prepare_logo, body)
+            asset.etag = response.headers.get("ETag")
+            asset.last_modified = response.headers.get("Last-Modified")
+            await self._store(key, asset)
+            logo_cache_requests_total.inc(result="miss")
+            return asset
+        except Exception as e:
+            print(f"Error downloading logo: {e}")
+            logo_cache_requests_total.inc(result="error")
+            # A stale logo is better than no logo
+            return cached
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _disk_store() -> Optional[DiskLogoStore]:
+    try:
+        return DiskLogoStore() if LOGO_CACHE_DISK_BYTES > 0 else None
+    except OSError as e:
+        print(f"Logo disk cache disabled: {e}")
+        return None
+
+
+logo_cache = LogoCache(disk=_disk_store())
@@ -1,16 +1,15 @@
-from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
-from langchain.schema.output_parser import StrOutputParser
-from openai import OpenAI
+from services.llm_cache import cached_chain
+from services.llm_clients import chat_model, get_async_openai_client
 import base64
-from services.storage_service import upload_to_gcs
+from services import storage_service
+from services.single_flight import coalesced
 import io
 import os
 import json
 
 # --- OpenAI Models ---
-model = ChatOpenAI(model_name="gpt-4o", temperature=0.7)
-openai_client = OpenAI()
+model = chat_model("gpt-4o", temperature=0.7)
 
 # --- Predefined Color Palettes ---
 COLOR_PALETTES = {
@@ -99,7 +98,7 @@ Analyze the inputs and create a professional logo design specification in JSON f
 Create a professional, actionable logo design specification."""
 
 logo_design_prompt = PromptTemplate.from_template(logo_design_template)
-logo_design_chain = logo_design_prompt | model | StrOutputParser()
+logo_design_chain = cached_chain("logo_design", logo_design_prompt, model)
 
 # --- Logo Description Generation ---
 logo_description_template = """You are a creative logo designer. Create a detailed visual description of a logo based on the following requirements:
@@ -140,7 +139,7 @@ Generate a comprehensive, visual description of the logo that includes:
 Create a detailed description that a skilled designer could use to create the exact logo envisioned. Focus on specific visual details, proportions, and styling that capture the essence of the request."""
 
 logo_description_prompt = PromptTemplate.from_template(logo_description_template)
-logo_description_chain = logo_description_prompt | model | StrOutputParser()
+logo_description_chain = cached_chain("logo_description", logo_description_prompt, model)
 
 # --- Logo Image Generation Template ---
 logo_image_template = """
@@ -229,6 +228,7 @@ async def generate_logo_description(logo_title: str, logo_vision: str, color_pal
         print(f"Error in logo description generation: {e}")
         raise e
 
+@coalesced("logo_image")
 async def generate_logo_image(logo_title: str, logo_vision: str, color_palette_name: str, logo_style: str):
     """Generate a logo image using a direct prompt with DALL-E 3, then upload to GCS"""
     try:
@@ -245,7 +245,7 @@ async def generate_logo_image(logo_title: str, logo_vision: str, color_palette_n
         )
         
         # Generate image using DALL-E 3
-        response = openai_client.images.generate(
+        response = await get_async_openai_client().images.generate(
             model="dall-e-3",
             prompt=direct_prompt,
             size="1024x1024",
@@ -267,7 +267,7 @@ async def generate_logo_image(logo_title: str, logo_vision: str, color_palette_n
                 raise Exception("GCS_BUCKET_NAME environment variable is not set")
 
             # Upload to Google Cloud Storage
-            public_url = upload_to_gcs(file_obj, file_name, "image/png", bucket_name)
+            public_url = await storage_service.upload(file_obj, file_name, "image/png", bucket_name)
             
             return {
                 "logo_image_url": public_url,
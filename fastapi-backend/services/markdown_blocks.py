@@ -0,0 +1,152 @@
+"""
+Markdown Block Tokenizer
+Single pass over LLM markdown, turning it into a flat list of blocks that
+renderers map onto named document styles:
+
+    {"type": "heading", "level": 1-3, "runs": [...]}
+    {"type": "paragraph", "runs": [...]}
+    {"type": "bullet", "level": 1-2, "runs": [...]}
+    {"type": "numbered", "runs": [...]}           # keeps the model's own number
+    {"type": "table", "rows": [[runs, ...], ...]}  # first row is the header
+    {"type": "rule"}
+
+Runs are (text, bold, italic) tuples. Plain text of a block is
+``block_text(block)``.
+"""
+import re
+from typing import Any, Dict, Iterator, List, Tuple
+
+Run = Tuple[str, bool, bool]
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s*(.*?)\s*#*$")
+_NUMBERED_RE = re.compile(r"^(\*\*)?(\d+)[.)]\s+(.*?)(\*\*)?$")
+_BULLET_RE = re.compile(r"^(\s*)[-*+•]\s+(.*)$")
+_RULE_RE = re.compile(r"^\s*(?:-{3,}|\*{3,}|_{3,})\s*$")
+_TABLE_SEPARATOR_RE = re.compile(r"^\|?\s*:?-{2,}:?\s*(?:\|\s*:?-{2,}:?\s*)*\|?$")
+_INLINE_RE = re.compile(
+    r"\*\*\*(?P<bold_italic>.+?)\*\*\*"
+    r"|\*\*(?P<bold>.+?)\*\*"
+    r"|__(?P<bold_alt>.+?)__"
+    r"|\*(?P<italic>[^\s*](?:.*?[^\s*])??)\*"
+    r"|(?<!\w)_(?P<italic_alt>[^\s_](?:.*?[^\s_])??)_(?!\w)"
+)
+
+# A numbered line reads as a section heading, not a list item, when it's short and unpunctuated
+SECTION_HEADING_MAX_CHARS = 80
+
+
+def parse_inline(text: str) -> List[Run]:
+    """Split text into (text, bold, italic) runs for **bold**, *italic* and ***both***"""
+    runs: List[Run] = []
+    position = 0
+    for match in _INLINE_RE.finditer(text):
+        if match.start() > position:
+            runs.append((text[position:match.start()], False, False))
+        kind = match.lastgroup
+        bold = kind in ("bold", "bold_alt", "bold_italic")
+        italic = kind in ("italic", "italic_alt", "bold_italic")
+        runs.append((match.group(kind), bold, italic))
+        position = match.end()
+    if position < len(text):
+        runs.append((text[position:], False, False))
+    return runs
+
+
+def block_text(block: Dict[str, Any]) -> str:
+    if block["type"] == "table":
+        return "\n".join("\t".join(_runs_text(cell) for cell in row) for row in block["rows"])
+    return _runs_text(block.get("runs", []))
+
+
+def _runs_text(runs: List[Run]) -> str:
+    return "".join(text for text, _, _ in runs)
+
+
+def _strip_emphasis(text: str) -> str:
+    """Headings are bold by style; drop a ** wrapper the model put around the whole line"""
+    if len(text) > 4 and text.startswith("**") and text.endswith("**"):
+        return text[2:-2].strip()
+    return text
+
+
+def _table_row(line: str) -> List[List[Run]]:
+    cells = line.strip().strip("|").split("|")
+    return [parse_inline(cell.strip()) for cell in cells]
+
+
+def _is_section_heading(match, numbered_sections: int) -> bool:
+    number = int(match.group(2))
+    if not 1 <= number <= numbered_sections:
+        return False
+    if match.group(1) and match.group(4):
+        return True  # **1. Scope**
+    text = match.group(3)
+    return len(text) <= SECTION_HEADING_MAX_CHARS and not text.endswith((".", ";", ","))
+
+
+def _iter_lines(content: str) -> Iterator[str]:
+    """Lines of content without copying the whole string up front"""
+    start = 0
+    while start <= len(content):
+        end = content.find("\n", start)
+        if end == -1:
+            end = len(content)
+        yield content[start:end].rstrip("\r")
+        start = end + 1
+
+
+def iter_blocks(content: str, numbered_sections: int = 10) -> Iterator[Dict[str, Any]]:
+    """Tokenize generated markdown into style-ready blocks in one pass, yielding as it goes"""
+    table = None
+
+    for raw_line in _iter_lines(content):
+        line = raw_line.strip()
+
+        # Tables: consecutive | rows, the |---| separator is dropped
+        if line.startswith("|"):
+            if table is None:
+                table = {"type": "table", "rows": []}
+            if not _TABLE_SEPARATOR_RE.match(line):
+                table["rows"].append(_table_row(line))
+            continue
+        if table is not None:
+            yield table
+            table = None
+
+        if not line:
+            continue
+
+        if _RULE_RE.match(line):
+            yield {"type": "rule"}
+            continue
+
+        heading = _HEADING_RE.match(line)
+        if heading:
+            level = min(max(len(heading.group(1)) - 1, 1), 3)  # # and ## -> 1, ### -> 2, deeper -> 3
+            yield {"type": "heading", "level": level, "runs": parse_inline(_strip_emphasis(heading.group(2)))}
+            continue
+
+        numbered = _NUMBERED_RE.match(line)
+        if numbered:
+            if _is_section_heading(numbered, numbered_sections):
+                text = f"{numbered.group(2)}. {_strip_emphasis(numbered.group(3))}"
+                yield {"type": "heading", "level": 1, "runs": parse_inline(text)}
+            else:
+                yield {"type": "numbered", "runs": parse_inline(line)}
+            continue
+
+        bullet = _BULLET_RE.match(raw_line.rstrip())
+        if bullet:
+            level = 2 if len(bullet.group(1).expandtabs(4)) >= 2 else 1
+            yield {"type": "bullet", "level": level, "runs": parse_inline(bullet.group(2).strip())}
+            continue
+
+        yield {"type": "paragraph", "runs": parse_inline(line)}
+
+    if table is not None:
+        yield table
+
+
+def parse_document(content: str, numbered_sections: int = 10) -> List[Dict[str, Any]]:
+    """Tokenize generated markdown into a list of style-ready blocks"""
+    return list(iter_blocks(content, numbered_sections))
@@ -1,16 +1,8 @@
-from services.document_utils import save_docx_to_gcs
 from datetime import datetime
-from google.cloud import storage
-import os
-from docx import Document
-from docx.shared import Inches, Pt
+from docx.shared import Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.section import WD_SECTION
-from docx.oxml.shared import OxmlElement, qn
-import io
-import uuid
-import requests
-from tempfile import NamedTemporaryFile
+from services.document_pipeline import DocumentPipeline, DocumentSpec, safe_filename_part
+from services.docx_renderer import RenderSpec, new_document
 
 # --- NDA HTML Template ---
 nda_html_template = """<!DOCTYPE html>
@@ -226,141 +218,16 @@ Date: _______________
 *Non-Disclosure Agreement - Confidential*
 """
 
-async def upload_to_gcs(content: str, filename: str, content_type: str = "text/plain"):
-    """Upload content to Google Cloud Storage and return the public URL"""
-    try:
-        # Initialize GCS client
-        client = storage.Client()
-        bucket_name = "deck123"  # Your bucket name
-        bucket = client.bucket(bucket_name)
-        
-        # Create blob
-        blob = bucket.blob(filename)
-        
-        # Upload content
-        blob.upload_from_string(content, content_type=content_type)
-        
-        # Make blob public
-        blob.make_public()
-        
-        return blob.public_url
-    except Exception as e:
-        print(f"Error uploading to GCS: {e}")
-        return None
-
-def add_logo_to_header(doc, logo_url):
-    """Add logo image to the header of every page"""
-    if not logo_url:
-        print("No logo URL provided")
-        return
-        
-    try:
-        print(f"Attempting to download logo from: {logo_url}")
-        
-        # Download the logo from URL with proper headers
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(logo_url, headers=headers, timeout=15, stream=True)
-        response.raise_for_status()
-        
-        print(f"Logo downloaded successfully. Status: {response.status_code}")
-        print(f"Content-Type: {response.headers.get('Content-Type', 'Unknown')}")
-        print(f"Logo size: {len(response.content)} bytes")
-        
-        # Validate content size
-        if len(response.content) == 0:
-            raise ValueError("Downloaded logo file is empty")
-            
-        # Determine file extension from URL or content type
-        if logo_url.lower().endswith('.png'):
-            suffix = '.png'
-        elif logo_url.lower().endswith(('.jpg', '.jpeg')):
-            suffix = '.jpg'
-        elif logo_url.lower().endswith('.gif'):
-            suffix = '.gif'
-        elif logo_url.lower().endswith('.webp'):
-            suffix = '.webp'
-        else:
-            content_type = response.headers.get('Content-Type', '').lower()
-            if 'png' in content_type:
-                suffix = '.png'
-            elif 'jpeg' in content_type or 'jpg' in content_type:
-                suffix = '.jpg'
-            elif 'gif' in content_type:
-                suffix = '.gif'
-            elif 'webp' in content_type:
-                suffix = '.webp'
-            else:
-                suffix = '.png'  # Default to PNG
-        
-        # Create a temporary file to store the logo
-        with NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-            tmp_file.write(response.content)
-            tmp_file_path = tmp_file.name
-        
-        print(f"Logo saved to temporary file: {tmp_file_path}")
-        
-        # Add logo to header of each section
-        for section in doc.sections:
-            header = section.header
-            
-            # Clear existing header paragraphs and create new one
-            for paragraph in header.paragraphs:
-                paragraph.clear()
-            
-            # If no paragraphs exist, add one
-            if not header.paragraphs:
-                header_p = header.add_paragraph()
-            else:
-                header_p = header.paragraphs[0]
-            
-            header_p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            
-            # Add logo image
-            run = header_p.add_run()
-            try:
-                run.add_picture(tmp_file_path, width=Inches(1.0), height=Inches(0.6))
-                print(f"Logo successfully added to header for section")
-            except Exception as pic_error:
-                print(f"Error adding picture to run: {pic_error}")
-                raise pic_error
-        
-        # Clean up temporary file
-        os.unlink(tmp_file_path)
-        print("Logo added to header successfully and temp file cleaned up")
-        
-    except requests.exceptions.RequestException as e:
-        print(f"Error downloading logo: {e}")
-        # Don't add fallback - let the document be generated without logo
-        pass
-    except Exception as e:
-        print(f"Error adding logo to header: {e}")
-        import traceback
-        traceback.print_exc()
-        # Don't add fallback - let the document be generated without logo
-        pass
+NDA_TITLE = "NON-DISCLOSURE AGREEMENT (NDA)"
 
 def create_professional_docx(data: dict):
     """Create a professional DOCX document using python-docx"""
-    doc = Document()
-
-    # Set document margins
-    sections = doc.sections
-    for section in sections:
-        section.top_margin = Inches(1)
-        section.bottom_margin = Inches(1)
-        section.left_margin = Inches(1)
-        section.right_margin = Inches(1)
-
-    # Title
-    title = doc.add_heading("NON-DISCLOSURE AGREEMENT (NDA)", level=0)
-    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    title_run = title.runs[0]
-    title_run.font.size = Pt(14)
-    title_run.font.name = "Times New Roman"
-    title_run.bold = True
+    doc = new_document(RenderSpec(NDA_TITLE, header=None, title_size=14))
+    add_nda_body(doc, data)
+    return doc
 
+def add_nda_body(doc, data: dict):
+    """Append the NDA clauses and signature table below the title"""
     # Agreement intro
     intro = doc.add_paragraph(f"This Agreement is made and entered into on this {data.get('effective_date', '')}, by and between:")
     intro.alignment = WD_ALIGN_PARAGRAPH.LEFT
@@ -464,86 +331,56 @@ def create_professional_docx(data: dict):
     sig_table.cell(2, 0).text = "Date: _______________"
     sig_table.cell(2, 1).text = "Date: _______________"
 
-    return doc
-
-def add_page_number(doc):
-    """Add page number to the document"""
-    section = doc.sections[0]
-    header = section.header
-    header_p = header.paragraphs[0]
-    header_p.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    header_p.text = "1"
+def build_nda_body(doc, data: dict, content: str):
+    """Render hook for the pipeline; the NDA body is built from the request fields"""
+    add_nda_body(doc, _template_fields(data))
+
+NDA_FIELDS = ("disclosing_party", "receiving_party", "purpose", "duration", "governing_law", "effective_date")
+
+def _template_fields(data: dict) -> dict:
+    """The six inputs every NDA format is rendered from, whitespace-normalized"""
+    return {field: " ".join(str(data.get(field) or "").split()) for field in NDA_FIELDS}
+
+def _nda_result(data: dict, markdown_content: str, urls: dict) -> dict:
+    html_content = nda_html_template.format(**_template_fields(data))
+    return {
+        "document_content": html_content,
+        "markdown_content": markdown_content,
+        "document_type": "Non-Disclosure Agreement",
+        "generated_for": f"{data.get('disclosing_party')} & {data.get('receiving_party')}",
+        "creation_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "word_count": len(html_content.split()),
+        "format": "Multiple formats (HTML, Markdown, DOCX)",
+        "urls": urls,
+        "document_url": urls["docx"]  # Main document URL for compatibility
+    }
+
+# --- Document Pipeline ---
+nda_pipeline = DocumentPipeline(DocumentSpec(
+    name="nda",
+    document_type="Non-Disclosure Agreement",
+    template=lambda data: nda_markdown_template.format(**_template_fields(data)),
+    generated_for=lambda data: f"{data.get('disclosing_party')} & {data.get('receiving_party')}",
+    filename=lambda data: "NDA_{disclosing_party}_{receiving_party}".format(
+        **{k: safe_filename_part(v) for k, v in _template_fields(data).items()}
+    ),
+    formats=("html", "markdown", "docx"),
+    outputs={
+        "html": lambda data, content: nda_html_template.format(**_template_fields(data)),
+        "markdown": lambda data, content: content,
+    },
+    title=NDA_TITLE,
+    title_size=14,
+    build_body=build_nda_body,
+    build_result=_nda_result,
+    cache_fields=_template_fields,
+    format_label="Multiple formats (HTML, Markdown, DOCX)",
+))
+
+def stream_nda(data: dict):
+    """Stream an NDA: the filled-in markdown, then render/upload stage events, then the result"""
+    return nda_pipeline.stream(data)
 
 async def generate_nda(data: dict):
     """Generate an NDA document with HTML, Markdown, and DOCX formats"""
-    try:
-        # Generate HTML content
-        html_content = nda_html_template.format(
-            disclosing_party=data.get("disclosing_party", ""),
-            receiving_party=data.get("receiving_party", ""),
-            purpose=data.get("purpose", ""),
-            duration=data.get("duration", ""),
-            governing_law=data.get("governing_law", ""),
-            effective_date=data.get("effective_date", "")
-        )
-
-        # Generate Markdown content
-        markdown_content = nda_markdown_template.format(
-            disclosing_party=data.get("disclosing_party", ""),
-            receiving_party=data.get("receiving_party", ""),
-            purpose=data.get("purpose", ""),
-            duration=data.get("duration", ""),
-            governing_law=data.get("governing_law", ""),
-            effective_date=data.get("effective_date", "")
-        )
-
-        # Create professional DOCX
-        doc = create_professional_docx(data)
-
-        # Add logo to header using logo URL from request body
-        logo_url = data.get("logo_url")
-        if logo_url:
-            print(f"Logo URL found in request: {logo_url}")
-            add_logo_to_header(doc, logo_url)
-        else:
-            print("No logo URL provided in request data")
-
-        # Save DOCX to bytes
-        docx_bytes = io.BytesIO()
-        doc.save(docx_bytes)
-        docx_bytes.seek(0)
-
-        # Generate unique filenames
-        unique_id = str(uuid.uuid4())[:8]
-        base_filename = f"NDA_{data.get('disclosing_party', '').replace(' ', '_')}_{data.get('receiving_party', '').replace(' ', '_')}_{unique_id}"
-
-        # Upload files to GCS
-        html_url = await upload_to_gcs(html_content, f"{base_filename}.html", "text/html")
-        markdown_url = await upload_to_gcs(markdown_content, f"{base_filename}.md", "text/markdown")
-
-        # Upload DOCX to GCS
-        client = storage.Client()
-        bucket = client.bucket("deck123")
-        docx_blob = bucket.blob(f"{base_filename}.docx")
-        docx_blob.upload_from_string(docx_bytes.getvalue(), content_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document")
-        docx_blob.make_public()
-        docx_url = docx_blob.public_url
-
-        return {
-            "document_content": html_content,
-            "markdown_content": markdown_content,
-            "document_type": "Non-Disclosure Agreement",
-            "generated_for": f"{data.get('disclosing_party')} & {data.get('receiving_party')}",
-            "creation_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "word_count": len(html_content.split()),
-            "format": "Multiple formats (HTML, Markdown, DOCX)",
-            "urls": {
-                "html": html_url,
-                "markdown": markdown_url,
-                "docx": docx_url
-            },
-            "document_url": docx_url  # Main document URL for compatibility
-        }
-    except Exception as e:
-        print(f"Error in NDA generation: {e}")
-        raise e
+    return await nda_pipeline.generate(data)
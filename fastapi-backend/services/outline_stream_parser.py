@@ -0,0 +1,82 @@
+"""
+Incremental outline parser for streamed markdown
+Turns the outline_chain token stream into topic_started / bullet / topic_complete
+events line by line, so clients no longer re-split the accumulating markdown.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+_HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s+(.+?)\s*#*\s*$")
+_BULLET_RE = re.compile(r"^\s*(?:[-*+•]|\d+[.)])\s+(.+?)\s*$")
+_EMPHASIS_RE = re.compile(r"(\*\*|__|\*|_|`)(.+?)\1")
+
+
+def _clean(text: str) -> str:
+    """Drop bold/italic/code markers the prompt asks the model not to use"""
+    return _EMPHASIS_RE.sub(r"\2", text).strip()
+
+
+class OutlineStreamParser:
+    """
+    Feed raw outline chunks with ``feed()`` and collect events as each line
+    completes. Call ``close()`` at the end of a stream to flush the last line
+    and complete the open topic; the parser can keep being fed afterwards
+    (used to append topped-up topics).
+    Headings beyond ``max_topics`` and their bullets are ignored.
+    """
+
+    def __init__(self, max_topics: Optional[int] = None):
+        self.max_topics = max_topics
+        self.topics: List[Dict[str, Any]] = []
+        self._buffer = ""
+        self._current: Optional[Dict[str, Any]] = None
+        self._skipping = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._buffer += chunk
+        events = []
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            events.extend(self._parse_line(line))
+        return events
+
+    def close(self) -> List[Dict[str, Any]]:
+        events = self._parse_line(self._buffer)
+        self._buffer = ""
+        events.extend(self._complete_current())
+        return events
+
+    @property
+    def topic_count(self) -> int:
+        return len(self.topics)
+
+    def _parse_line(self, line: str) -> List[Dict[str, Any]]:
+        heading = _HEADING_RE.match(line)
+        if heading:
+            events = self._complete_current()
+            if self.max_topics is not None and len(self.topics) >= self.max_topics:
+                self._skipping = True
+                return events
+            self._skipping = False
+            self._current = {"index": len(self.topics), "title": _clean(heading.group(1)), "bullets": []}
+            self.topics.append(self._current)
+            events.append({"status": "topic_started", "topic_index": self._current["index"], "title": self._current["title"]})
+            return events
+
+        bullet = _BULLET_RE.match(line)
+        if bullet and self._current is not None and not self._skipping:
+            text = _clean(bullet.group(1))
+            self._current["bullets"].append(text)
+            return [{"status": "bullet", "topic_index": self._current["index"], "text": text}]
+        return []
+
+    def _complete_current(self) -> List[Dict[str, Any]]:
+        if self._current is None:
+            return []
+        topic, self._current = self._current, None
+        return [{"status": "topic_complete", "topic": topic}]
+
+
+def format_outline_topic(topic: Dict[str, Any]) -> str:
+    """Render a parsed topic back to the markdown the frontend stores"""
+    return "\n".join([f"# {topic['title']}"] + [f"- {bullet}" for bullet in topic["bullets"]])
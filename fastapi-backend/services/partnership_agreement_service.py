@@ -1,11 +1,9 @@
-from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
-from langchain.schema.output_parser import StrOutputParser
-from services.document_utils import save_docx_to_gcs
-from datetime import datetime
+from services.llm_clients import chat_model
+from services.document_pipeline import DocumentPipeline, DocumentSpec, safe_filename_part
 
 # --- OpenAI Model ---
-model = ChatOpenAI(model_name="gpt-4o", temperature=0.3)
+model = chat_model("gpt-4o", temperature=0.3)
 
 # --- Partnership Agreement Template ---
 partnership_agreement_template = """You are a legal document specialist. Create a comprehensive Partnership Agreement based on the following details:
@@ -38,47 +36,37 @@ Generate a formal Partnership Agreement that includes:
 Use proper legal language and structure. Include standard clauses for business partnerships."""
 
 partnership_agreement_prompt = PromptTemplate.from_template(partnership_agreement_template)
-partnership_agreement_chain = partnership_agreement_prompt | model | StrOutputParser()
+
+# --- Document Pipeline ---
+partnership_agreement_pipeline = DocumentPipeline(DocumentSpec(
+    name="partnership_agreement",
+    document_type="Partnership Agreement",
+    prompt=partnership_agreement_prompt,
+    model=model,
+    variables=lambda data: {
+        "party1_name": data.get("party1_name"),
+        "party1_address": data.get("party1_address"),
+        "party2_name": data.get("party2_name"),
+        "party2_address": data.get("party2_address"),
+        "partnership_purpose": data.get("partnership_purpose"),
+        "partnership_duration": data.get("partnership_duration"),
+        "profit_sharing_ratio": data.get("profit_sharing_ratio"),
+        "responsibilities_party1": ", ".join(data.get("responsibilities_party1", [])),
+        "responsibilities_party2": ", ".join(data.get("responsibilities_party2", [])),
+        "effective_date": data.get("effective_date")
+    },
+    generated_for=lambda data: f"{data.get('party1_name')} & {data.get('party2_name')}",
+    filename=lambda data: (
+        f"Partnership_Agreement_"
+        f"{safe_filename_part(data.get('party1_name'))}_{safe_filename_part(data.get('party2_name'))}"
+    ),
+))
+partnership_agreement_chain = partnership_agreement_pipeline.chain
+
+def stream_partnership_agreement(data: dict):
+    """Stream a partnership agreement: LLM chunks, then render/upload stage events, then the result"""
+    return partnership_agreement_pipeline.stream(data)
 
 async def generate_partnership_agreement(data: dict):
     """Generate a partnership agreement document using GPT-4o and save as .docx with logo"""
-    try:
-        responsibilities1 = ", ".join(data.get("responsibilities_party1", []))
-        responsibilities2 = ", ".join(data.get("responsibilities_party2", []))
-        
-        document_content = ""
-        async for chunk in partnership_agreement_chain.astream({
-            "party1_name": data.get("party1_name"),
-            "party1_address": data.get("party1_address"),
-            "party2_name": data.get("party2_name"),
-            "party2_address": data.get("party2_address"),
-            "partnership_purpose": data.get("partnership_purpose"),
-            "partnership_duration": data.get("partnership_duration"),
-            "profit_sharing_ratio": data.get("profit_sharing_ratio"),
-            "responsibilities_party1": responsibilities1,
-            "responsibilities_party2": responsibilities2,
-            "effective_date": data.get("effective_date")
-        }):
-            document_content += chunk
-        
-        # Save the document as .docx to GCS with logo
-        logo_url = data.get("logo_url")
-        document_url = await save_docx_to_gcs(
-            document_content, 
-            "Partnership Agreement", 
-            f"{data.get('party1_name')} & {data.get('party2_name')}",
-            logo_url
-        )
-        
-        return {
-            "document_content": document_content.strip(),
-            "document_url": document_url,
-            "document_type": "Partnership Agreement",
-            "generated_for": f"{data.get('party1_name')} & {data.get('party2_name')}",
-            "creation_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "word_count": len(document_content.split()),
-            "format": "DOCX with logo"
-        }
-    except Exception as e:
-        print(f"Error in partnership agreement generation: {e}")
-        raise e
+    return await partnership_agreement_pipeline.generate(data)
@@ -0,0 +1,109 @@
+"""
+Plate Slide Helpers
+Reads the PlateSlide objects the editor stores in Presentation.content
+({id, content: PlateNode[], rootImage, layoutType, alignment, bgColor, width})
+so a saved deck can be used as generation context, and patches one slide of
+stored content without touching the others.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+# Root node type -> XML layout component (see presentation-ai/.../utils/parser.ts)
+PLATE_COMPONENTS = {
+    "bullets": "BULLETS",
+    "column_group": "COLUMNS",
+    "icons": "ICONS",
+    "cycle": "CYCLE",
+    "staircase": "STAIRCASE",
+    "chart": "CHART",
+}
+VISUALIZATION_COMPONENTS = {"arrow": "ARROWS", "pyramid": "PYRAMID", "timeline": "TIMELINE"}
+HEADING_TYPES = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+
+def is_plate_slide(slide: Any) -> bool:
+    """True for a slide in the editor's PlateSlide shape"""
+    return isinstance(slide, dict) and isinstance(slide.get("content"), list)
+
+
+def node_text(node: Any) -> str:
+    """Concatenated text of a Plate node and its children"""
+    if not isinstance(node, dict):
+        return ""
+    if "text" in node:
+        return str(node["text"])
+    return " ".join(text for text in (node_text(child) for child in node.get("children") or []) if text).strip()
+
+
+def _component(node: Dict[str, Any]) -> Optional[str]:
+    if node.get("type") == "visualization-list":
+        return VISUALIZATION_COMPONENTS.get(node.get("visualizationType"))
+    return PLATE_COMPONENTS.get(node.get("type"))
+
+
+def slide_component(slide: Dict[str, Any]) -> Optional[str]:
+    """Layout component of a PlateSlide, taken from its first component node"""
+    for node in slide.get("content") or []:
+        if isinstance(node, dict) and _component(node):
+            return _component(node)
+    return None
+
+
+def slide_title(slide: Dict[str, Any]) -> str:
+    """Text of the first heading on a PlateSlide"""
+    for node in slide.get("content") or []:
+        if isinstance(node, dict) and node.get("type") in HEADING_TYPES:
+            return node_text(node)
+    return ""
+
+
+def slide_layout(slide: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """(SECTION layout, component) of a PlateSlide"""
+    return slide.get("layoutType"), slide_component(slide)
+
+
+def slide_summary(slide: Dict[str, Any]) -> str:
+    """Plain-text rendering of a PlateSlide's content for use in prompts"""
+    lines = []
+    for node in slide.get("content") or []:
+        if not isinstance(node, dict):
+            continue
+        node_type = node.get("type")
+        if node_type in HEADING_TYPES:
+            lines.append(f"{'#' * int(node_type[1])} {node_text(node)}")
+        elif node_type == "img":
+            lines.append(f"[image: {node.get('query', '')}]")
+        elif _component(node):
+            lines.append(f"[{_component(node)}]")
+            lines.extend(f"- {node_text(item)}" for item in node.get("children") or [] if node_text(item))
+        elif node_text(node):
+            lines.append(node_text(node))
+
+    root_image = slide.get("rootImage") or {}
+    if root_image.get("query"):
+        lines.append(f"[image: {root_image['query']}]")
+    return "\n".join(lines)
+
+
+def replace_slide(content: Optional[Dict[str, Any]], slide_index: int, slide: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Put ``slide`` at ``slide_index`` of stored presentation content (or append
+    it at the end), keeping the existing slide id and every other slide.
+    """
+    if not is_plate_slide(slide):
+        raise ValueError("Slide must be a PlateSlide with a content list")
+
+    content = dict(content or {})
+    slides: List[Any] = list(content.get("slides") or [])
+    if slide_index < 0 or slide_index > len(slides):
+        raise IndexError(f"Slide index {slide_index} out of range for {len(slides)} slides")
+
+    if slide_index < len(slides):
+        existing = slides[slide_index]
+        if isinstance(existing, dict) and existing.get("id"):
+            slide = {**slide, "id": existing["id"]}
+        slides[slide_index] = slide
+    else:
+        slides.append(slide)
+
+    content["slides"] = slides
+    return content
@@ -2,7 +2,9 @@ from prisma import Prisma
 from typing import List, Optional, Dict, Any
 import json
 import asyncio
+import weakref
 from datetime import datetime
+from services.plate_slides import replace_slide
 
 class PresentationDBService:
     """Database service for managing presentations and generated images"""
@@ -10,6 +12,8 @@ class PresentationDBService:
     def __init__(self):
         self.db = Prisma()
         self._connected = False
+        # Weak values: a presentation's lock goes away once nobody holds or waits on it
+        self._slide_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
     
     def _format_presentation_result(self, presentation_dict: Dict[str, Any]) -> Dict[str, Any]:
         """Helper to format presentation data for API response"""
@@ -136,6 +140,30 @@ class PresentationDBService:
         
         return self._format_presentation_result(presentation.dict())
     
+    async def update_presentation_slide(
+        self,
+        presentation_id: str,
+        slide_index: int,
+        slide: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Replace a single slide in the stored content, keeping its id and every
+        other slide. ``slide`` must be a PlateSlide as the editor stores it.
+        """
+        await self.ensure_connected()
+
+        # Serialise read-modify-write per presentation so concurrent edits don't drop each other
+        lock = self._slide_locks.get(presentation_id)
+        if lock is None:
+            lock = self._slide_locks[presentation_id] = asyncio.Lock()
+        async with lock:
+            presentation = await self.get_presentation(presentation_id)
+            if not presentation:
+                return None
+
+            content = replace_slide(presentation.get("content"), slide_index, slide)
+            return await self.update_presentation(presentation_id, content=content)
+
     async def get_user_presentations(self, user_email: str) -> List[Dict[str, Any]]:
         """Get all presentations for a user"""
         await self.ensure_connected()
@@ -211,6 +239,38 @@ class PresentationDBService:
         image = await self.db.generatedimage.find_first(where={"url": url})
         return image.dict() if image else None
 
+    # Uploaded File Management
+    async def save_uploaded_file(
+        self,
+        url: str,
+        bucket: str,
+        object_name: str,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+        size: Optional[int] = None,
+        user_email: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Register a directly uploaded object; completing the same upload twice is a no-op"""
+        await self.ensure_connected()
+
+        data = {
+            "url": url,
+            "bucket": bucket,
+            "objectName": object_name,
+            "filename": filename,
+            "contentType": content_type,
+            "size": size
+        }
+        if user_email:
+            user = await self.get_or_create_user(user_email)
+            data["userId"] = user["id"]
+
+        uploaded = await self.db.uploadedfile.upsert(
+            where={"objectName": object_name},
+            data={"create": data, "update": {}}
+        )
+        return uploaded.dict()
+
 # Global service instance
 presentation_db_service = PresentationDBService()
 
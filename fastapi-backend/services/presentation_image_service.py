@@ -2,30 +2,18 @@
 Enhanced Image Generation Service for Presentations
 Supports DALL-E image generation with Google Cloud Storage
 """
-import os
 import io
 import base64
-import asyncio
 from typing import Optional
-from openai import OpenAI
-from google.cloud import storage
+from services.llm_clients import get_openai_client, get_async_openai_client
+from services import storage_service
 from datetime import datetime
 import uuid
 
 class PresentationImageService:
     def __init__(self):
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.gcs_bucket_name = os.getenv("GCS_BUCKET_NAME", "deck123")
-        
-        # Initialize Google Cloud Storage client
-        credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-        if credentials_path and os.path.exists(credentials_path):
-            self.storage_client = storage.Client.from_service_account_json(credentials_path)
-        else:
-            # Fallback to default credentials
-            self.storage_client = storage.Client()
-            
-        self.bucket = self.storage_client.bucket(self.gcs_bucket_name)
+        # Uploads go through the configured storage backend
+        self.gcs_bucket_name = storage_service.DEFAULT_BUCKET
     
     async def generate_image_dalle3(self, prompt: str, size: str = "1024x1024") -> str:
         """
@@ -36,7 +24,7 @@ class PresentationImageService:
             print(f"Generating image with DALL-E 3: {prompt}")
             
             # Generate image with DALL-E 3
-            response = self.openai_client.images.generate(
+            response = await get_async_openai_client().images.generate(
                 model="dall-e-3",
                 prompt=prompt,
                 size=size,
@@ -58,17 +46,8 @@ class PresentationImageService:
             safe_prompt = safe_prompt.replace(' ', '_')[:30]
             filename = f"presentation_images/dalle3_{safe_prompt}_{timestamp}_{unique_id}.png"
             
-            # Upload to Google Cloud Storage
-            blob = self.bucket.blob(filename)
-            blob.upload_from_string(
-                image_data,
-                content_type="image/png"
-            )
-            
-            # Make the blob publicly readable
-            blob.make_public()
-            
-            public_url = blob.public_url
+            # Upload to Google Cloud Storage and make it publicly readable
+            public_url = await storage_service.upload(image_data, filename, "image/png", self.gcs_bucket_name, public=True)
             print(f"Image uploaded to GCS: {public_url}")
             
             return public_url
@@ -86,7 +65,7 @@ class PresentationImageService:
             print(f"Generating image with DALL-E 2: {prompt}")
             
             # Generate image with DALL-E 2
-            response = self.openai_client.images.generate(
+            response = await get_async_openai_client().images.generate(
                 model="dall-e-2",
                 prompt=prompt,
                 size=size,
@@ -107,17 +86,8 @@ class PresentationImageService:
             safe_prompt = safe_prompt.replace(' ', '_')[:30]
             filename = f"presentation_images/dalle2_{safe_prompt}_{timestamp}_{unique_id}.png"
             
-            # Upload to Google Cloud Storage
-            blob = self.bucket.blob(filename)
-            blob.upload_from_string(
-                image_data,
-                content_type="image/png"
-            )
-            
-            # Make the blob publicly readable
-            blob.make_public()
-            
-            public_url = blob.public_url
+            # Upload to Google Cloud Storage and make it publicly readable
+            public_url = await storage_service.upload(image_data, filename, "image/png", self.gcs_bucket_name, public=True)
             print(f"Image uploaded to GCS: {public_url}")
             
             return public_url
@@ -158,11 +128,11 @@ class PresentationImageService:
                 raise e
     
     def test_gcs_connection(self) -> bool:
-        """Test Google Cloud Storage connection"""
+        """Test the storage backend connection"""
         try:
             # Try to access the bucket
-            bucket_exists = self.bucket.exists()
-            print(f"GCS Bucket '{self.gcs_bucket_name}' exists: {bucket_exists}")
+            bucket_exists = storage_service.storage_backend.check(self.gcs_bucket_name)
+            print(f"Bucket '{self.gcs_bucket_name}' ({storage_service.storage_backend.name}) exists: {bucket_exists}")
             return bucket_exists
         except Exception as e:
             print(f"GCS connection test failed: {e}")
@@ -172,7 +142,7 @@ class PresentationImageService:
         """Test OpenAI API connection"""
         try:
             # Try a simple API call
-            models = self.openai_client.models.list()
+            models = get_openai_client().models.list()
             print("OpenAI connection successful")
             return True
         except Exception as e:
@@ -186,14 +156,3 @@ presentation_image_service = PresentationImageService()
 async def generate_presentation_image(prompt: str, model: str = "dalle3") -> str:
     """Generate image for presentations - main entry point"""
     return await presentation_image_service.generate_presentation_image(prompt, model)
-
-def generate_and_upload_image(prompt: str) -> str:
-    """Synchronous wrapper for backward compatibility"""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(
-            presentation_image_service.generate_presentation_image(prompt, "dalle3")
-        )
-    finally:
-        loop.close()
@@ -1,9 +1,15 @@
-from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
-from langchain.schema.output_parser import StrOutputParser
+from services.llm_cache import cached_chain, fresh_chain
+from services.llm_clients import chat_model
+from services.outline_stream_parser import OutlineStreamParser, format_outline_topic
+from services.plate_slides import is_plate_slide, slide_layout, slide_title
+from services.slide_stream_parser import parse_section
+import asyncio
+import os
+import re
 
 # --- OpenAI Model ---
-model = ChatOpenAI(model_name="gpt-4o-mini", temperature=0.7, streaming=True)
+model = chat_model("gpt-4o-mini", temperature=0.7, streaming=True)
 
 # --- Outline Generation ---
 outline_template_str = """Given the following presentation topic and requirements, generate a structured outline with {numberOfCards} main topics in markdown format.
@@ -41,7 +47,56 @@ Make sure the topics:
 8. Include exactly 2-3 bullet points per topic (not more, not less)"""
 
 outline_prompt = PromptTemplate.from_template(outline_template_str)
-outline_chain = outline_prompt | model | StrOutputParser()
+outline_chain = cached_chain("outline", outline_prompt, model)
+
+# --- Outline Top-Up (only the topics the first pass did not produce) ---
+outline_topup_template_str = """An outline for a presentation was generated but it is missing topics.
+The outline should be in {language}.
+
+Topic: {prompt}
+
+Existing topics (do NOT repeat them):
+{existingTopics}
+
+Generate exactly {missingCount} additional main topics that continue this outline, in the same markdown format:
+# Topic Heading
+- Key point about this topic
+- Another important aspect
+
+Rules:
+1. Output only the {missingCount} new topics, nothing else
+2. Each topic is a heading followed by 2-3 bullet points formatted as "- point text"
+3. Do not use bold, italic or underline
+4. Keep each bullet point brief - just one sentence per point"""
+
+outline_topup_prompt = PromptTemplate.from_template(outline_topup_template_str)
+outline_topup_chain = cached_chain("outline_topup", outline_topup_prompt, model)
+
+# --- Single Outline Topic Regeneration ---
+outline_topic_template_str = """You are revising ONE topic of a presentation outline.
+The outline should be in {language}.
+
+Topic: {prompt}
+
+Full outline:
+{outline}
+
+Rewrite topic number {topicNumber} (currently "{currentTopic}") so it flows from the topic before it into the topic after it and does not repeat any other topic.
+Additional instructions: {instructions}
+
+Return only the new topic in this markdown format:
+# Topic Heading
+- Key point about this topic
+- Another important aspect
+
+Rules:
+1. Exactly one heading followed by 2-3 bullet points formatted as "- point text"
+2. Do not use bold, italic or underline
+3. Keep each bullet point brief - just one sentence per point"""
+
+outline_topic_prompt = PromptTemplate.from_template(outline_topic_template_str)
+# Regenerating asks for a different answer, so this skips the response cache and single-flight
+outline_topic_chain = fresh_chain("outline_topic", outline_topic_prompt, model)
 
 # --- Slides Generation ---
 slides_template_str = """
@@ -198,4 +253,261 @@ Now create a complete XML presentation with {TOTAL_SLIDES} slides that significa
 """
 
 slides_prompt = PromptTemplate.from_template(slides_template_str)
-slides_chain = slides_prompt | model | StrOutputParser()
+slides_chain = cached_chain("slides", slides_prompt, model)
+
+# --- Parallel Per-Slide Generation ---
+# Component examples are lifted from the deck prompt above so both modes share one source
+LAYOUT_COMPONENT_EXAMPLES = {
+    name: example.strip()
+    for name, example in re.findall(r"\d+\. (\w+): [^\n]*\n```xml\n(.*?)```", slides_template_str, re.S)
+    if name != "IMAGES"
+}
+
+# Rotation used to pre-assign components so consecutive slides never repeat,
+# even though neighbouring slides are generated concurrently
+COMPONENT_ROTATION = ["BULLETS", "COLUMNS", "ICONS", "CYCLE", "ARROWS", "TIMELINE", "PYRAMID", "STAIRCASE", "CHART"]
+SECTION_LAYOUT_ROTATION = ["left", "right", "vertical"]
+
+SLIDES_MAX_CONCURRENCY = int(os.getenv("SLIDES_MAX_CONCURRENCY", "6"))
+
+slide_template_str = """
+You are an expert presentation designer. You are writing ONE slide of a larger presentation in XML format.
+
+## PRESENTATION DETAILS
+- Title: {TITLE}
+- Full outline (for context and flow only): {OUTLINE_FORMATTED}
+- Language: {LANGUAGE}
+- Tone: {TONE}
+- This is slide {SLIDE_NUMBER} of {TOTAL_SLIDES}
+
+## THIS SLIDE
+Topic (expand on it, DO NOT copy it verbatim): {SLIDE_TOPIC}
+
+## REQUIRED STRUCTURE
+- Use exactly this SECTION tag: <SECTION layout="{SECTION_LAYOUT}">
+- Use the {COMPONENT} layout component, structured like this example:
+```xml
+{COMPONENT_EXAMPLE}
+```
+- Neighbouring slides use: {NEIGHBOUR_COMPONENTS}. Do not mimic their structure.
+- Include at least one detailed image query (10+ words), e.g. <IMG query="diverse team of professionals collaborating in modern office with data visualizations" />
+
+## CONTENT EXPANSION STRATEGY
+- Add supporting data/statistics
+- Include real-world examples
+- Reference industry trends
+
+Output ONLY the single <SECTION>...</SECTION> element, with no <PRESENTATION> wrapper and no commentary.
+"""
+
+slide_prompt = PromptTemplate.from_template(slide_template_str)
+slide_chain = cached_chain("slide", slide_prompt, model)
+
+# --- Single Slide Regeneration ---
+slide_regenerate_template_str = slide_template_str.replace("## CONTENT EXPANSION STRATEGY", """## REGENERATING AN EXISTING SLIDE
+Surrounding slides (keep the flow between them):
+{NEIGHBOUR_SLIDES}
+
+Current version of this slide (write a clearly different alternative):
+{PREVIOUS_SLIDE}
+
+Additional instructions: {INSTRUCTIONS}
+
+## CONTENT EXPANSION STRATEGY""")
+
+slide_regenerate_prompt = PromptTemplate.from_template(slide_regenerate_template_str)
+# Like outline_topic_chain, every regenerate call goes to the model
+slide_regenerate_chain = fresh_chain("slide_regenerate", slide_regenerate_prompt, model)
+
+_SECTION_RE = re.compile(r"<SECTION\b.*?</SECTION\s*>", re.S | re.IGNORECASE)
+
+def plan_deck_layouts(total_slides: int):
+    """Pre-assign a (SECTION layout, component) pair to every slide of the deck"""
+    return [
+        (SECTION_LAYOUT_ROTATION[i % len(SECTION_LAYOUT_ROTATION)], COMPONENT_ROTATION[i % len(COMPONENT_ROTATION)])
+        for i in range(total_slides)
+    ]
+
+def extract_section(slide_output: str) -> str:
+    """Keep only the <SECTION> element from a single-slide completion"""
+    match = _SECTION_RE.search(slide_output)
+    return match.group(0) if match else slide_output.strip()
+
+async def generate_slides_parallel(title: str, outline: list, language: str, tone: str, max_concurrency: int = None):
+    """
+    Generate each outline item as its own slide call with bounded concurrency.
+    Yields the same XML document slides_chain produces; slide N is emitted as
+    soon as slides 1..N are complete.
+    """
+    total_slides = len(outline)
+    plan = plan_deck_layouts(total_slides)
+    semaphore = asyncio.Semaphore(max_concurrency or SLIDES_MAX_CONCURRENCY)
+    outline_formatted = "\n\n".join(outline)
+
+    async def generate_one(index: int) -> str:
+        section_layout, component = plan[index]
+        neighbours = [plan[i][1] for i in (index - 1, index + 1) if 0 <= i < total_slides]
+        async with semaphore:
+            output = await slide_chain.ainvoke({
+                "TITLE": title,
+                "LANGUAGE": language,
+                "TONE": tone,
+                "OUTLINE_FORMATTED": outline_formatted,
+                "TOTAL_SLIDES": total_slides,
+                "SLIDE_NUMBER": index + 1,
+                "SLIDE_TOPIC": outline[index],
+                "SECTION_LAYOUT": section_layout,
+                "COMPONENT": component,
+                "COMPONENT_EXAMPLE": LAYOUT_COMPONENT_EXAMPLES[component],
+                "NEIGHBOUR_COMPONENTS": ", ".join(neighbours) or "none",
+            })
+        return extract_section(output)
+
+    tasks = [asyncio.create_task(generate_one(i)) for i in range(total_slides)]
+    try:
+        yield "<PRESENTATION>\n\n"
+        # Awaiting in order gives the ordered merge; later slides keep running meanwhile
+        for task in tasks:
+            yield await task + "\n\n"
+        yield "</PRESENTATION>"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def generate_outline_events(prompt: str, number_of_cards: int, language: str):
+    """
+    Stream the outline as parsed topic_started / bullet / topic_complete events.
+    Extra topics are dropped; if the model stops short, only the missing topics
+    are requested once more before the final complete event.
+    """
+    parser = OutlineStreamParser(max_topics=number_of_cards)
+    async for chunk in outline_chain.astream({
+        "prompt": prompt,
+        "numberOfCards": number_of_cards,
+        "language": language,
+    }):
+        for event in parser.feed(chunk):
+            yield event
+    for event in parser.close():
+        yield event
+
+    missing = number_of_cards - parser.topic_count
+    if missing > 0:
+        yield {"status": "topping_up", "missing": missing}
+        async for chunk in outline_topup_chain.astream({
+            "prompt": prompt,
+            "language": language,
+            "missingCount": missing,
+            "existingTopics": "\n".join(f"- {topic['title']}" for topic in parser.topics),
+        }):
+            for event in parser.feed(chunk):
+                yield event
+        for event in parser.close():
+            yield event
+
+    yield {
+        "status": "complete",
+        "total_topics": parser.topic_count,
+        "valid": parser.topic_count == number_of_cards,
+        "outline": [format_outline_topic(topic) for topic in parser.topics],
+    }
+
+def _slide_layout(slide) -> tuple:
+    """(SECTION layout, component) of a stored PlateSlide or a parsed slide event, None where unknown"""
+    if is_plate_slide(slide):
+        return slide_layout(slide)
+    if not isinstance(slide, dict):
+        return None, None
+    return slide.get("layout"), slide.get("component")
+
+def pick_slide_layout(slide_index: int, total_slides: int, neighbour_slides: list):
+    """
+    Choose a (SECTION layout, component) for a regenerated slide that differs
+    from its neighbours, preferring the one the deck plan would have used.
+    """
+    planned_layout, planned_component = plan_deck_layouts(total_slides)[slide_index]
+    neighbours = [_slide_layout(slide) for slide in neighbour_slides]
+    used_layouts = {layout for layout, _ in neighbours if layout}
+    used_components = {component for _, component in neighbours if component}
+
+    layout = next(
+        (l for l in [planned_layout] + SECTION_LAYOUT_ROTATION if l not in used_layouts),
+        planned_layout
+    )
+    component = next(
+        (c for c in [planned_component] + COMPONENT_ROTATION if c not in used_components),
+        planned_component
+    )
+    return layout, component
+
+def _describe_slide(position: str, slide) -> str:
+    if not isinstance(slide, dict):
+        return f"- {position}: none"
+    layout, component = _slide_layout(slide)
+    title = slide_title(slide) if is_plate_slide(slide) else slide.get("title")
+    return f"- {position}: \"{title or 'untitled'}\" ({component or 'unknown'} component, {layout or 'unknown'} layout)"
+
+async def regenerate_slide(
+    title: str,
+    outline: list,
+    language: str,
+    tone: str,
+    slide_index: int,
+    neighbour_slides: tuple = (None, None),
+    previous_slide: str = "",
+    instructions: str = ""
+) -> dict:
+    """
+    Regenerate one slide of a deck. ``neighbour_slides`` are the (previous, next)
+    slides, either stored PlateSlides or parsed slide events, used to keep
+    layout variety and flow. Returns the SECTION xml and its parsed form.
+    """
+    total_slides = len(outline)
+    if not 0 <= slide_index < total_slides:
+        raise IndexError(f"Slide index {slide_index} out of range for {total_slides} slides")
+
+    previous, following = neighbour_slides
+    section_layout, component = pick_slide_layout(slide_index, total_slides, [previous, following])
+    neighbour_components = [c for _, c in (_slide_layout(previous), _slide_layout(following)) if c]
+
+    output = await slide_regenerate_chain.ainvoke({
+        "TITLE": title,
+        "LANGUAGE": language,
+        "TONE": tone,
+        "OUTLINE_FORMATTED": "\n\n".join(outline),
+        "TOTAL_SLIDES": total_slides,
+        "SLIDE_NUMBER": slide_index + 1,
+        "SLIDE_TOPIC": outline[slide_index],
+        "SECTION_LAYOUT": section_layout,
+        "COMPONENT": component,
+        "COMPONENT_EXAMPLE": LAYOUT_COMPONENT_EXAMPLES[component],
+        "NEIGHBOUR_COMPONENTS": ", ".join(neighbour_components) or "none",
+        "NEIGHBOUR_SLIDES": "\n".join([_describe_slide("Previous slide", previous), _describe_slide("Next slide", following)]),
+        "PREVIOUS_SLIDE": previous_slide or "not available",
+        "INSTRUCTIONS": instructions or "none",
+    })
+    xml = extract_section(output)
+    return {"xml": xml, "slide": parse_section(xml, slide_index)}
+
+async def regenerate_outline_topic(prompt: str, outline: list, topic_index: int, language: str, instructions: str = "") -> dict:
+    """Regenerate one outline topic with the rest of the outline as context"""
+    if not 0 <= topic_index < len(outline):
+        raise IndexError(f"Topic index {topic_index} out of range for {len(outline)} topics")
+
+    output = await outline_topic_chain.ainvoke({
+        "prompt": prompt,
+        "language": language,
+        "outline": "\n\n".join(outline),
+        "topicNumber": topic_index + 1,
+        "currentTopic": outline[topic_index].strip().splitlines()[0].lstrip("# ") if outline[topic_index].strip() else "",
+        "instructions": instructions or "none",
+    })
+
+    parser = OutlineStreamParser(max_topics=1)
+    parser.feed(output)
+    parser.close()
+    if not parser.topics:
+        raise ValueError("Model did not return an outline topic")
+
+    topic = {**parser.topics[0], "index": topic_index}
+    return {**topic, "markdown": format_outline_topic(topic)}
@@ -0,0 +1,81 @@
+"""
+Render Worker Pool
+DOCX building and serialisation is pure CPU: a long Terms of Service holds
+the GIL for tens to hundreds of milliseconds, which stalls every other
+stream when it runs on the event loop (or in a thread). Rendering is sent
+to a process pool instead; workers are recycled after
+RENDER_MAX_TASKS_PER_CHILD jobs so python-docx/lxml memory can't creep up.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+RENDER_POOL = os.getenv("RENDER_POOL", "process")  # "process", "thread" or "inline"
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+RENDER_MAX_TASKS_PER_CHILD = int(os.getenv("RENDER_MAX_TASKS_PER_CHILD", "200"))
+
+
+class RenderWorkerCrashed(RuntimeError):
+    """A render worker process died while this job was in the pool"""
+
+
+class RenderPool:
+    """Lazily started executor for CPU-bound render jobs"""
+
+    def __init__(self, kind: str = RENDER_POOL, workers: int = RENDER_WORKERS,
+                 max_tasks_per_child: int = RENDER_MAX_TASKS_PER_CHILD):
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_tasks_per_child = max_tasks_per_child
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _create(self) -> Executor:
+        if self.kind == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="render")
+        # Worker recycling needs the spawn start method
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            max_tasks_per_child=self.max_tasks_per_child or None,
+        )
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._create()
+        return self._executor
+
+    def _reset(self, broken: Executor):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run fn(*args) in the pool; fn and args must pickle for the process pool"""
+        if self.kind == "inline":
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool as e:
+            # A worker died (OOM, segfault). The job may be the one that killed it,
+            # so it is not resubmitted; later jobs get a fresh pool.
+            print("Render pool broken, restarting workers")
+            self._reset(executor)
+            raise RenderWorkerCrashed(f"Render worker crashed while running {getattr(fn, '__name__', fn)}") from e
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+render_pool = RenderPool()
@@ -0,0 +1,153 @@
+"""
+Single-Flight Request Coalescing
+Concurrent identical generations attach to one in-flight upstream call instead
+of each paying for their own. Streaming calls are fanned out through a
+broadcaster so every subscriber receives the same chunks, including the ones
+produced before it joined. Shared calls are reference counted and cancelled
+once the last caller has gone away.
+"""
+import asyncio
+import functools
+import hashlib
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from services.llm_metrics import Counter, register
+
+single_flight_coalesced = Counter(
+    "single_flight_coalesced_total",
+    "Requests that attached to an identical in-flight call instead of starting their own",
+    ("name",),
+)
+register(single_flight_coalesced)
+
+
+class StreamBroadcast:
+    """Consumes one upstream async iterator and replays it to any number of subscribers"""
+
+    def __init__(self, source: AsyncIterator[Any], on_done: Optional[Callable[[], None]] = None):
+        self._chunks: List[Any] = []
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+        self._on_done = on_done
+        self._subscribers = 0
+        self._task = asyncio.create_task(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[Any]):
+        try:
+            async for chunk in source:
+                self._chunks.append(chunk)
+                self._notify()
+        except BaseException as e:
+            self._error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            self._done = True
+            self._notify()
+            if self._on_done:
+                self._on_done()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        """Yield every chunk of the upstream stream, from the beginning"""
+        position = 0
+        self._subscribers += 1
+        try:
+            while True:
+                while position < len(self._chunks):
+                    yield self._chunks[position]
+                    position += 1
+                if self._done:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                await self._changed.wait()
+        finally:
+            self._subscribers -= 1
+            if self._subscribers == 0 and not self._done:
+                # Nobody is listening any more, stop paying for the upstream
+                self.cancel()
+
+    def cancel(self):
+        if self._on_done:
+            self._on_done()
+        self._task.cancel()
+
+
+class _Call:
+    """An in-flight coroutine and the number of callers awaiting it"""
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Registry of in-flight calls keyed by request identity"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, StreamBroadcast] = {}
+
+    @staticmethod
+    def _forget(registry: Dict[str, Any], key: str, entry: Any):
+        # A newer call may already own the key once this one was cancelled
+        if registry.get(key) is entry:
+            del registry[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], name: str = "call") -> Any:
+        """Run ``fn`` once for all concurrent callers with the same key"""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.future.add_done_callback(lambda _: self._forget(self._calls, key, call))
+        else:
+            single_flight_coalesced.inc(name=name)
+
+        call.waiters += 1
+        try:
+            # Shielded so one caller giving up does not cancel the shared call
+            return await asyncio.shield(call.future)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.future.done():
+                self._forget(self._calls, key, call)
+                call.future.cancel()
+
+    def stream(self, key: str, factory: Callable[[], AsyncIterator[Any]], name: str = "stream") -> AsyncIterator[Any]:
+        """Subscribe to the in-flight stream for ``key``, starting it if needed"""
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = StreamBroadcast(factory(), on_done=lambda: self._forget(self._streams, key, broadcast))
+            self._streams[key] = broadcast
+        else:
+            single_flight_coalesced.inc(name=name)
+        return broadcast.subscribe()
+
+    def in_flight(self) -> int:
+        return len(self._calls) + len(self._streams)
+
+
+single_flight = SingleFlight()
+
+
+def request_key(name: str, *args, **kwargs) -> str:
+    """Stable key for a call from its name and JSON-serialisable arguments"""
+    payload = json.dumps([name, args, kwargs], sort_keys=True, default=str)
+    return name + ":" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def coalesced(name: str):
+    """Decorator: concurrent calls with identical arguments share one execution"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await single_flight.do(request_key(name, *args, **kwargs), lambda: fn(*args, **kwargs), name=name)
+        return wrapper
+    return decorator
+
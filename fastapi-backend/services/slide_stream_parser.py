@@ -0,0 +1,244 @@
+"""
+Incremental slide parser for streamed presentation XML
+Turns the raw slides_chain token stream into one structured slide per <SECTION>
+as soon as its closing tag arrives, without re-parsing the whole buffer.
+"""
+import re
+from html import unescape
+from typing import Any, Callable, Dict, List, Optional
+
+# Layout components the slides prompt asks the model to use (one per slide)
+LAYOUT_COMPONENTS = {
+    "COLUMNS", "BULLETS", "ICONS", "CYCLE", "ARROWS",
+    "TIMELINE", "PYRAMID", "STAIRCASE", "CHART",
+}
+
+# Tags the model frequently emits without a self-closing slash
+VOID_TAGS = {"IMG", "ICON"}
+
+_SECTION_OPEN_RE = re.compile(r"<SECTION\b", re.IGNORECASE)
+_SECTION_CLOSE_RE = re.compile(r"</SECTION\s*>", re.IGNORECASE)
+_IMG_TAG_RE = re.compile(r"<IMG\b([^<>]*)>", re.IGNORECASE)
+_TAG_RE = re.compile(r"<(/?)([A-Za-z][A-Za-z0-9_-]*)([^<>]*?)(/?)>")
+_ATTR_RE = re.compile(r'([A-Za-z_][A-Za-z0-9_-]*)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+# Longest partial tag we may have to carry over between chunks
+_SECTION_OPEN_TAIL = len("<SECTION")
+_SECTION_CLOSE_TAIL = len("</SECTION >")
+
+
+def _parse_attrs(raw: str) -> Dict[str, str]:
+    """Parse tag attributes into a dict with lower-cased names"""
+    attrs = {}
+    for match in _ATTR_RE.finditer(raw):
+        value = match.group(2) if match.group(2) is not None else match.group(3)
+        attrs[match.group(1).lower()] = unescape(value)
+    return attrs
+
+
+def _parse_tree(text: str) -> Dict[str, Any]:
+    """
+    Build a small element tree from a single SECTION of model output.
+    Tolerates unclosed tags, stray closing tags and unescaped text, which
+    a strict XML parser would reject.
+    """
+    root = {"tag": "ROOT", "attrs": {}, "children": []}
+    stack = [root]
+    pos = 0
+    for match in _TAG_RE.finditer(text):
+        chunk = text[pos:match.start()].strip()
+        if chunk:
+            stack[-1]["children"].append(unescape(chunk))
+        pos = match.end()
+
+        closing, tag, raw_attrs, self_closing = match.groups()
+        tag = tag.upper()
+        if closing:
+            # Pop back to the matching open tag, ignore it if there is none
+            for i in range(len(stack) - 1, 0, -1):
+                if stack[i]["tag"] == tag:
+                    del stack[i:]
+                    break
+            continue
+
+        node = {"tag": tag, "attrs": _parse_attrs(raw_attrs), "children": []}
+        stack[-1]["children"].append(node)
+        if not self_closing and tag not in VOID_TAGS:
+            stack.append(node)
+
+    tail = text[pos:].strip()
+    if tail:
+        stack[-1]["children"].append(unescape(tail))
+    return root
+
+
+def _text(node: Any) -> str:
+    """Concatenate all text below a node"""
+    if isinstance(node, str):
+        return node
+    return " ".join(t for t in (_text(c) for c in node["children"]) if t)
+
+
+def _iter(node: Dict[str, Any]):
+    """Depth-first iteration over element nodes"""
+    for child in node["children"]:
+        if isinstance(child, dict):
+            yield child
+            yield from _iter(child)
+
+
+def _find(node: Dict[str, Any], tag: str) -> Optional[Dict[str, Any]]:
+    for child in _iter(node):
+        if child["tag"] == tag:
+            return child
+    return None
+
+
+def _build_item(div: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a <DIV> of a layout component into a flat item"""
+    heading = next((c for c in _iter(div) if c["tag"] in ("H1", "H2", "H3", "H4")), None)
+    paragraphs = [_text(c) for c in _iter(div) if c["tag"] == "P"]
+    icon = _find(div, "ICON")
+    item = {
+        "heading": _text(heading) if heading else None,
+        "text": " ".join(p for p in paragraphs if p) or None,
+    }
+    if icon is not None:
+        item["icon"] = icon["attrs"].get("query")
+    if item["heading"] is None and item["text"] is None:
+        item["text"] = _text(div) or None
+    return item
+
+
+def _build_chart_rows(chart: Dict[str, Any]) -> List[Dict[str, Any]]:
+    rows = []
+    for tr in (c for c in _iter(chart) if c["tag"] == "TR"):
+        row = {}
+        for td in (c for c in _iter(tr) if c["tag"] == "TD"):
+            row[td["attrs"].get("type", "data")] = _text(td)
+        if row:
+            rows.append(row)
+    return rows
+
+
+def parse_section(section_xml: str, index: int) -> Dict[str, Any]:
+    """Parse one complete <SECTION>...</SECTION> block into a slide dict"""
+    tree = _parse_tree(section_xml)
+    section = _find(tree, "SECTION") or tree
+
+    component = next(
+        (c for c in section["children"] if isinstance(c, dict) and c["tag"] in LAYOUT_COMPONENTS),
+        None,
+    )
+    title = next(
+        (c for c in section["children"] if isinstance(c, dict) and c["tag"] in ("H1", "H2", "H3")),
+        None,
+    )
+
+    slide = {
+        "index": index,
+        "layout": section["attrs"].get("layout"),
+        "title": _text(title) if title else None,
+        "component": component["tag"] if component else None,
+        "items": [],
+        "images": [n["attrs"]["query"] for n in _iter(section) if n["tag"] == "IMG" and n["attrs"].get("query")],
+        "icons": [n["attrs"]["query"] for n in _iter(section) if n["tag"] == "ICON" and n["attrs"].get("query")],
+    }
+
+    if component is not None:
+        if component["tag"] == "CHART":
+            slide["chart_type"] = component["attrs"].get("charttype")
+            slide["items"] = _build_chart_rows(component)
+        else:
+            slide["items"] = [
+                _build_item(c) for c in component["children"]
+                if isinstance(c, dict) and c["tag"] == "DIV"
+            ]
+
+    return slide
+
+
+class SlideStreamParser:
+    """
+    Resumable tokenizer over the slides_chain stream.
+
+    Feed it chunks as they arrive; every call returns the slides whose
+    closing </SECTION> tag was completed by that chunk. If ``on_image`` is
+    given it is called with (slide index, query) as soon as each <IMG> tag
+    closes, before the rest of its slide has streamed. Each character is
+    scanned a bounded number of times and consumed sections are dropped
+    from the buffer, so a whole deck costs O(n) instead of re-parsing the
+    growing document on every chunk.
+    """
+
+    def __init__(self, on_image: Optional[Callable[[int, str], None]] = None):
+        self._buffer = ""
+        self._scan_pos = 0
+        self._image_pos = 0
+        self._section_start: Optional[int] = None
+        self.on_image = on_image
+        self.slide_count = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume a chunk and return any slides completed by it"""
+        self._buffer += chunk
+        slides = []
+
+        while True:
+            if self._section_start is None:
+                match = _SECTION_OPEN_RE.search(self._buffer, self._scan_pos)
+                if match is None:
+                    # Drop text between sections, keep a possible partial "<SECTION"
+                    cut = max(len(self._buffer) - _SECTION_OPEN_TAIL, 0)
+                    self._buffer = self._buffer[cut:]
+                    self._scan_pos = 0
+                    break
+                # Discard whatever preceded the section (fences, <PRESENTATION>, ...)
+                self._buffer = self._buffer[match.start():]
+                self._section_start = 0
+                self._scan_pos = match.end() - match.start()
+                self._image_pos = self._scan_pos
+
+            match = _SECTION_CLOSE_RE.search(self._buffer, self._scan_pos)
+            if self.on_image is not None:
+                self._scan_images(match.start() if match else len(self._buffer))
+            if match is None:
+                self._scan_pos = max(self._scan_pos, len(self._buffer) - _SECTION_CLOSE_TAIL)
+                break
+
+            slides.append(self._emit(self._buffer[self._section_start:match.end()]))
+            self._buffer = self._buffer[match.end():]
+            self._scan_pos = 0
+            self._section_start = None
+
+        return slides
+
+    def _scan_images(self, limit: int):
+        """Report IMG tags of the open section that closed since the last scan"""
+        for match in _IMG_TAG_RE.finditer(self._buffer, self._image_pos, limit):
+            query = _parse_attrs(match.group(1)).get("query")
+            if query:
+                self.on_image(self.slide_count, query)
+            self._image_pos = match.end()
+
+        # Resume from an unterminated tag, otherwise from the end of the scanned text
+        last_open = self._buffer.rfind("<", self._image_pos, limit)
+        if last_open != -1 and self._buffer.find(">", last_open, limit) == -1:
+            self._image_pos = last_open
+        else:
+            self._image_pos = limit
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Flush a trailing section the model never closed"""
+        if self._section_start is None:
+            return []
+        section_xml = self._buffer[self._section_start:]
+        self._buffer = ""
+        self._scan_pos = 0
+        self._section_start = None
+        return [self._emit(section_xml)]
+
+    def _emit(self, section_xml: str) -> Dict[str, Any]:
+        slide = parse_section(section_xml, self.slide_count)
+        self.slide_count += 1
+        return slide
@@ -1,16 +1,759 @@
+"""
+Shared Storage Layer
+Every generated artifact is written through one StorageBackend, picked by
+STORAGE_BACKEND:
+
+    gcs     Google Cloud Storage (default): one process-wide client on a tuned
+            HTTP connection pool, cached bucket handles
+    local   files under STORAGE_LOCAL_DIR, served by the app's static route
+    memory  a process-local dict, for tests and offline benchmarks
+
+Backends are blocking; the async wrappers run them on a dedicated thread
+pool sized to the connection pool. Services upload, check, delete and sign
+through here instead of talking to GCS directly.
+
+With STORAGE_CONTENT_ADDRESSED on, uploads are stored under the SHA-256 of
+their bytes (the requested name is kept as an "alias" in metadata), and a
+repeat upload of the same bytes returns the existing URL without sending
+anything.
+
+User files are streamed (upload_stream): read in chunks while hashing and
+enforcing STORAGE_MAX_UPLOAD_BYTES, sent to GCS as a resumable upload, or
+as parallel parts composed server-side above STORAGE_COMPOSITE_THRESHOLD.
+Large client uploads can skip the API entirely: signed_upload hands out a
+short-lived PUT target (a GCS V4 URL, or an HMAC-signed API route for the
+local and memory backends).
+
+STORAGE_SIGNING_KEY is the HMAC key for those routes and for the upload
+tokens checked on completion. Every worker has to share it, so it has no
+default: the local and memory backends refuse to start without it, and on
+GCS direct uploads answer 501 until it is set.
+"""
+import asyncio
+import hashlib
+import hmac
+import io
+import json
 import os
+import posixpath
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote, urlencode, urlparse
+import google.auth.transport.requests
+from google.auth.credentials import Signing
 from google.cloud import storage
+from requests.adapters import HTTPAdapter
+from starlette.exceptions import HTTPException
+from starlette.staticfiles import StaticFiles
+from services.llm_metrics import Counter, register
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "gcs")  # "gcs", "local" or "memory"
+DEFAULT_BUCKET = os.getenv("GCS_BUCKET_NAME", "deck123")
+STORAGE_MAX_CONNECTIONS = int(os.getenv("STORAGE_MAX_CONNECTIONS", "32"))
+STORAGE_MAX_RETRIES = int(os.getenv("STORAGE_MAX_RETRIES", "3"))
+STORAGE_SIGNED_URL_TTL = int(os.getenv("STORAGE_SIGNED_URL_TTL", "900"))
+STORAGE_LOCAL_DIR = os.getenv("STORAGE_LOCAL_DIR", "storage")
+STORAGE_PUBLIC_URL = os.getenv("STORAGE_PUBLIC_URL", "/files").rstrip("/")
+STORAGE_CONTENT_ADDRESSED = os.getenv("STORAGE_CONTENT_ADDRESSED", "false").lower() in ("1", "true", "yes")
+STORAGE_KNOWN_OBJECTS = int(os.getenv("STORAGE_KNOWN_OBJECTS", "4096"))
+STORAGE_MAX_UPLOAD_BYTES = int(os.getenv("STORAGE_MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+STORAGE_COMPOSITE_THRESHOLD = int(os.getenv("STORAGE_COMPOSITE_THRESHOLD", str(64 * 1024 * 1024)))
+STORAGE_COMPOSITE_PARTS = min(int(os.getenv("STORAGE_COMPOSITE_PARTS", "8")), 32)  # GCS composes at most 32 sources
+# Resumable upload chunk; GCS wants a multiple of 256 KiB
+STORAGE_CHUNK_SIZE = max(1, int(os.getenv("STORAGE_CHUNK_SIZE", str(8 * 1024 * 1024))) // (256 * 1024)) * 256 * 1024
+STORAGE_UPLOAD_URL = os.getenv("STORAGE_UPLOAD_URL", "/api/upload/direct").rstrip("/")
+# Signs local/memory URLs and upload tokens; shared by every worker, so there is no random default
+STORAGE_SIGNING_KEY = os.getenv("STORAGE_SIGNING_KEY", "")
+
+_client_lock = threading.Lock()
+_storage_client = None
+_buckets: Dict[str, storage.Bucket] = {}
+_executor: Optional[ThreadPoolExecutor] = None
+
+storage_uploads_total = register(Counter(
+    "storage_uploads_total",
+    "Write-once uploads by outcome",
+    ("result",),  # known (no request), exists (one existence check), uploaded
+))
+
+def get_storage_client() -> storage.Client:
+    """Process-wide GCS client, created on first use and reused for every call"""
+    global _storage_client
+    if _storage_client is None:
+        with _client_lock:
+            if _storage_client is None:
+                client = storage.Client()
+                # Default requests pool keeps 10 connections; match it to the storage thread pool
+                adapter = HTTPAdapter(
+                    pool_connections=STORAGE_MAX_CONNECTIONS,
+                    pool_maxsize=STORAGE_MAX_CONNECTIONS,
+                    max_retries=STORAGE_MAX_RETRIES,
+                )
+                client._http.mount("https://", adapter)
+                _storage_client = client
+    return _storage_client
+
+def get_bucket(bucket_name: str) -> storage.Bucket:
+    """Cached bucket handle (no network call; the bucket is not reloaded)"""
+    bucket = _buckets.get(bucket_name)
+    if bucket is None:
+        with _client_lock:
+            bucket = _buckets.get(bucket_name)
+            if bucket is None:
+                bucket = _buckets[bucket_name] = get_storage_client().bucket(bucket_name)
+    return bucket
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _client_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=STORAGE_MAX_CONNECTIONS, thread_name_prefix="storage")
+    return _executor
+
+async def run_storage(fn, *args, **kwargs):
+    """Run a blocking storage call on the storage thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), lambda: fn(*args, **kwargs))
+
+def shutdown_storage():
+    """Stop the storage thread pool (called on app shutdown)"""
+    global _executor
+    with _client_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+def _read_content(content) -> bytes:
+    return bytes(content) if isinstance(content, (bytes, bytearray)) else content.read()
+
+
+# --- Streaming readers ---
+
+class UploadTooLarge(ValueError):
+    """The upload is bigger than the allowed maximum"""
+
+
+class SigningUnavailable(RuntimeError):
+    """The configured credentials can't sign URLs"""
+
+
+class HashingReader:
+    """
+    File wrapper that hashes bytes as they are read and stops past max_bytes.
+    Re-reads after a seek back (upload retries) are not hashed twice.
+    """
+
+    def __init__(self, file, max_bytes: int = STORAGE_MAX_UPLOAD_BYTES):
+        self.file = file
+        self.max_bytes = max_bytes
+        self.size = 0  # Bytes hashed so far = furthest position read
+        self._sha256 = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        position = self.file.tell()
+        data = self.file.read(size)
+        end = position + len(data)
+        if end > self.size:
+            self._sha256.update(data[self.size - position:] if position < self.size else data)
+            self.size = end
+            if self.size > self.max_bytes:
+                raise UploadTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+        return data
+
+    def consume(self, chunk_size: int = 1024 * 1024):
+        """Read to the end in chunks (hash and size check), then rewind"""
+        while self.read(chunk_size):
+            pass
+        self.file.seek(0)
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self.file.seek(offset, whence)
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+
+class RangeReader:
+    """Independent read-only view of bytes [start, start + length) of a file descriptor"""
+
+    def __init__(self, fd: int, start: int, length: int):
+        self.fd = fd
+        self.start = start
+        self.length = length
+        self.position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self.length - self.position
+        size = remaining if size is None or size < 0 else min(size, remaining)
+        data = os.pread(self.fd, size, self.start + self.position) if size > 0 else b""
+        self.position += len(data)
+        return data
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        base = {0: 0, 1: self.position, 2: self.length}[whence]
+        self.position = max(0, min(self.length, base + offset))
+        return self.position
+
+
+# --- URL signing for backends without their own ---
+
+def _signature(bucket_name: str, filename: str, method: str, expires: int, content_type: str) -> str:
+    if not STORAGE_SIGNING_KEY:
+        raise SigningUnavailable("STORAGE_SIGNING_KEY is not set")
+    message = "\n".join((method.upper(), bucket_name, filename, str(expires), content_type or ""))
+    return hmac.new(STORAGE_SIGNING_KEY.encode("utf-8"), message.encode("utf-8"), hashlib.sha256).hexdigest()
+
+def sign_url(url: str, bucket_name: str, filename: str, method: str, expiration: int, content_type: Optional[str]) -> str:
+    expires = int(time.time()) + expiration
+    query = {"method": method.upper(), "expires": expires}
+    if content_type:
+        query["content_type"] = content_type
+    query["signature"] = _signature(bucket_name, filename, method, expires, content_type)
+    return f"{url}?{urlencode(query)}"
+
+def verify_signature(bucket_name: str, filename: str, method: str, expires: int, signature: str,
+                     content_type: Optional[str] = None) -> bool:
+    """Check a URL produced by sign_url: right object, method and content type, not expired"""
+    if not STORAGE_SIGNING_KEY or expires < time.time():
+        return False
+    return hmac.compare_digest(_signature(bucket_name, filename, method, expires, content_type), signature)
+
+def upload_token(bucket_name: str, filename: str) -> str:
+    """Proof that this API issued the upload target for an object, checked when the upload completes"""
+    return _signature(bucket_name, filename, "COMPLETE", 0, None)
+
+def verify_upload_token(bucket_name: str, filename: str, token: str) -> bool:
+    if not STORAGE_SIGNING_KEY:
+        return False
+    return hmac.compare_digest(upload_token(bucket_name, filename), token or "")
+
+
+# --- Backends ---
+
+class StorageBackend:
+    """Where artifacts go. Every method blocks; use the async wrappers from request handlers."""
+
+    name = "base"
+
+    def __init__(self):
+        # (bucket, name) -> URL of objects known to exist, for write-once uploads
+        self.known: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self.known_lock = threading.Lock()
+
+    def upload(self, content, filename: str, content_type: str, bucket_name: str, public: bool = False,
+               metadata: Optional[Dict[str, str]] = None) -> str:
+        """Store bytes or a file object and return the object's public URL"""
+        raise NotImplementedError
+
+    def upload_stream(self, stream, filename: str, content_type: str, bucket_name: str, size: Optional[int] = None,
+                      public: bool = False, metadata: Optional[Dict[str, str]] = None) -> str:
+        """Store a file object read in chunks; backends without streaming read it whole"""
+        return self.upload(stream.read(), filename, content_type, bucket_name, public, metadata)
+
+    def read(self, filename: str, bucket_name: str) -> bytes:
+        raise NotImplementedError
+
+    def exists(self, filename: str, bucket_name: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, filename: str, bucket_name: str) -> bool:
+        """Delete an object; returns False if it was already gone"""
+        raise NotImplementedError
+
+    def public_url(self, filename: str, bucket_name: str) -> str:
+        raise NotImplementedError
+
+    def signed_url(self, filename: str, bucket_name: str, method: str = "GET", expiration: int = STORAGE_SIGNED_URL_TTL,
+                   content_type: Optional[str] = None) -> str:
+        return sign_url(self.public_url(filename, bucket_name), bucket_name, filename, method, expiration, content_type)
+
+    def signed_upload(self, filename: str, bucket_name: str, content_type: str, max_bytes: int,
+                      expiration: int = STORAGE_SIGNED_URL_TTL) -> Dict[str, object]:
+        """
+        Target for a client to PUT the object to directly: the URL plus the
+        headers the client must send. Default: the signed direct-upload route.
+        """
+        url = f"{STORAGE_UPLOAD_URL}/{quote(bucket_name)}/{quote(filename)}"
+        return {
+            "url": sign_url(url, bucket_name, filename, "PUT", expiration, content_type),
+            "method": "PUT",
+            "headers": {"Content-Type": content_type},
+        }
+
+    def stat(self, filename: str, bucket_name: str) -> Optional[Dict[str, object]]:
+        """Size and content type of an object, or None if it doesn't exist"""
+        raise NotImplementedError
+
+    def check(self, bucket_name: str) -> bool:
+        """Whether the bucket is reachable"""
+        return True
+
+
+class GCSStorageBackend(StorageBackend):
+    """Google Cloud Storage through the shared client"""
+
+    name = "gcs"
+
+    def upload(self, content, filename: str, content_type: str, bucket_name: str, public: bool = False,
+               metadata: Optional[Dict[str, str]] = None) -> str:
+        blob = get_bucket(bucket_name).blob(filename)
+        if metadata:
+            blob.metadata = metadata
+        if isinstance(content, (bytes, bytearray)):
+            blob.upload_from_string(content, content_type=content_type)
+        else:
+            blob.upload_from_file(content, content_type=content_type)
+        if public:
+            blob.make_public()
+        return blob.public_url
+
+    def upload_stream(self, stream, filename: str, content_type: str, bucket_name: str, size: Optional[int] = None,
+                      public: bool = False, metadata: Optional[Dict[str, str]] = None) -> str:
+        if size and size >= STORAGE_COMPOSITE_THRESHOLD:
+            try:
+                fd = stream.fileno()
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                fd = None  # In-memory file: one resumable upload instead
+            if fd is not None:
+                return self._upload_composite(fd, filename, content_type, bucket_name, size, public, metadata)
+
+        # Resumable upload: one STORAGE_CHUNK_SIZE buffer in memory at a time
+        blob = get_bucket(bucket_name).blob(filename, chunk_size=STORAGE_CHUNK_SIZE)
+        if metadata:
+            blob.metadata = metadata
+        blob.upload_from_file(stream, size=size, content_type=content_type)
+        if public:
+            blob.make_public()
+        return blob.public_url
+
+    def _upload_composite(self, fd: int, filename: str, content_type: str, bucket_name: str, size: int,
+                          public: bool, metadata: Optional[Dict[str, str]]) -> str:
+        """Upload parts of the file in parallel, compose them into one object and drop the parts"""
+        bucket = get_bucket(bucket_name)
+        part_size = -(-size // STORAGE_COMPOSITE_PARTS)
+        prefix = f"{filename}.part-{secrets.token_hex(4)}"
+        ranges = [(start, min(part_size, size - start)) for start in range(0, size, part_size)]
+
+        def send_part(index: int):
+            start, length = ranges[index]
+            part = bucket.blob(f"{prefix}-{index}", chunk_size=STORAGE_CHUNK_SIZE)
+            part.upload_from_file(RangeReader(fd, start, length), size=length, content_type=content_type)
+            return part
+
+        with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="storage-part") as pool:
+            parts = list(pool.map(send_part, range(len(ranges))))
+        try:
+            blob = bucket.blob(filename)
+            blob.content_type = content_type
+            if metadata:
+                blob.metadata = metadata
+            blob.compose(parts)
+        finally:
+            for part in parts:
+                try:
+                    part.delete()
+                except Exception as e:
+                    print(f"Error deleting upload part {part.name}: {e}")
+        if public:
+            blob.make_public()
+        return blob.public_url
+
+    def read(self, filename: str, bucket_name: str) -> bytes:
+        return get_bucket(bucket_name).blob(filename).download_as_bytes()
+
+    def exists(self, filename: str, bucket_name: str) -> bool:
+        return get_bucket(bucket_name).blob(filename).exists()
+
+    def delete(self, filename: str, bucket_name: str) -> bool:
+        try:
+            get_bucket(bucket_name).blob(filename).delete()
+            return True
+        except Exception as e:
+            if getattr(e, "code", None) == 404:
+                return False
+            raise e
+
+    def public_url(self, filename: str, bucket_name: str) -> str:
+        return get_bucket(bucket_name).blob(filename).public_url
+
+    def signed_url(self, filename: str, bucket_name: str, method: str = "GET", expiration: int = STORAGE_SIGNED_URL_TTL,
+                   content_type: Optional[str] = None) -> str:
+        """V4 signed URL for one object"""
+        blob = get_bucket(bucket_name).blob(filename)
+        options = {"version": "v4", "expiration": timedelta(seconds=expiration), "method": method}
+        if content_type:
+            options["content_type"] = content_type
+        return blob.generate_signed_url(**self._signing_credentials(options))
+
+    def signed_upload(self, filename: str, bucket_name: str, content_type: str, max_bytes: int,
+                      expiration: int = STORAGE_SIGNED_URL_TTL) -> Dict[str, object]:
+        # GCS itself rejects bodies outside the signed length range; the ACL header
+        # makes the object public-read like /upload does (the bucket uses object ACLs)
+        headers = {"x-goog-content-length-range": f"0,{max_bytes}", "x-goog-acl": "public-read"}
+        options = {
+            "version": "v4",
+            "expiration": timedelta(seconds=expiration),
+            "method": "PUT",
+            "content_type": content_type,
+            "headers": dict(headers),  # generate_signed_url adds Host to the dict it is given
+        }
+        url = get_bucket(bucket_name).blob(filename).generate_signed_url(**self._signing_credentials(options))
+        return {"url": url, "method": "PUT", "headers": {"Content-Type": content_type, **headers}}
+
+    def _signing_credentials(self, options: dict) -> dict:
+        credentials = get_storage_client()._credentials
+        if not isinstance(credentials, Signing):
+            if not hasattr(credentials, "service_account_email"):
+                # User ADC (gcloud auth application-default login) has no identity to sign as
+                raise SigningUnavailable(
+                    "Signed URLs need service-account credentials; "
+                    f"{type(credentials).__module__}.{type(credentials).__name__} can't sign"
+                )
+            # Metadata-server credentials can't sign locally; sign through IAM with an access token
+            credentials.refresh(google.auth.transport.requests.Request())
+            options["service_account_email"] = credentials.service_account_email
+            options["access_token"] = credentials.token
+        return options
+
+    def stat(self, filename: str, bucket_name: str) -> Optional[Dict[str, object]]:
+        blob = get_bucket(bucket_name).get_blob(filename)
+        if blob is None:
+            return None
+        return {"size": blob.size, "content_type": blob.content_type}
+
+    def check(self, bucket_name: str) -> bool:
+        return get_bucket(bucket_name).exists()
+
+
+METADATA_SUFFIX = ".metadata.json"  # Local-backend sidecar holding an object's metadata
+
+
+class LocalStaticFiles(StaticFiles):
+    """Static route for the local backend; metadata sidecars and partial writes are not served"""
+
+    async def get_response(self, path: str, scope):
+        if path.endswith((METADATA_SUFFIX, ".tmp")):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Files under ``root/<bucket>/<filename>``, served at ``public_base``
+    by the LocalStaticFiles route main.py mounts. Everything stored is public
+    except the metadata sidecars.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str = STORAGE_LOCAL_DIR, public_base: str = STORAGE_PUBLIC_URL):
+        super().__init__()
+        self.root = os.path.abspath(root)
+        self.public_base = public_base
+
+    def path(self, filename: str, bucket_name: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, bucket_name, filename))
+        if not path.startswith(self.root + os.sep) or path.endswith(METADATA_SUFFIX):
+            raise ValueError(f"Invalid object name: {filename}")
+        return path
+
+    def upload(self, content, filename: str, content_type: str, bucket_name: str, public: bool = False,
+               metadata: Optional[Dict[str, str]] = None) -> str:
+        if isinstance(content, (bytes, bytearray)):
+            content = io.BytesIO(content)
+        return self.upload_stream(content, filename, content_type, bucket_name, None, public, metadata)
+
+    def upload_stream(self, stream, filename: str, content_type: str, bucket_name: str, size: Optional[int] = None,
+                      public: bool = False, metadata: Optional[Dict[str, str]] = None) -> str:
+        path = self.path(filename, bucket_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if metadata:
+            self._write(path + METADATA_SUFFIX, io.BytesIO(json.dumps(metadata).encode("utf-8")))
+        self._write(path, stream)
+        return self.public_url(filename, bucket_name)
+
+    def _write(self, path: str, stream):
+        temp_path = f"{path}.{secrets.token_hex(4)}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                while True:
+                    chunk = stream.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+            os.replace(temp_path, path)  # Readers never see a half-written file
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def read(self, filename: str, bucket_name: str) -> bytes:
+        with open(self.path(filename, bucket_name), "rb") as f:
+            return f.read()
+
+    def exists(self, filename: str, bucket_name: str) -> bool:
+        return os.path.isfile(self.path(filename, bucket_name))
+
+    def stat(self, filename: str, bucket_name: str) -> Optional[Dict[str, object]]:
+        try:
+            return {"size": os.path.getsize(self.path(filename, bucket_name)), "content_type": None}
+        except FileNotFoundError:
+            return None
+
+    def delete(self, filename: str, bucket_name: str) -> bool:
+        path = self.path(filename, bucket_name)
+        if os.path.exists(path + METADATA_SUFFIX):
+            os.remove(path + METADATA_SUFFIX)
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def public_url(self, filename: str, bucket_name: str) -> str:
+        return f"{self.public_base}/{quote(bucket_name)}/{quote(filename)}"
+
+    def route_path(self) -> str:
+        """Path the static route is mounted at"""
+        return urlparse(self.public_base).path or "/"
+
+
+class MemoryStorageBackend(StorageBackend):
+    """Process-local objects; nothing leaves the process"""
+
+    name = "memory"
+
+    def __init__(self, public_base: str = "memory://"):
+        super().__init__()
+        self.public_base = public_base if public_base.endswith("/") else public_base + "/"
+        self.objects: Dict[Tuple[str, str], Tuple[bytes, str, Dict[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def upload(self, content, filename: str, content_type: str, bucket_name: str, public: bool = False,
+               metadata: Optional[Dict[str, str]] = None) -> str:
+        data = _read_content(content)
+        with self._lock:
+            self.objects[(bucket_name, filename)] = (data, content_type, metadata or {})
+        return self.public_url(filename, bucket_name)
+
+    def read(self, filename: str, bucket_name: str) -> bytes:
+        with self._lock:
+            entry = self.objects.get((bucket_name, filename))
+        if entry is None:
+            raise FileNotFoundError(f"{bucket_name}/{filename}")
+        return entry[0]
+
+    def exists(self, filename: str, bucket_name: str) -> bool:
+        with self._lock:
+            return (bucket_name, filename) in self.objects
+
+    def stat(self, filename: str, bucket_name: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            entry = self.objects.get((bucket_name, filename))
+        return {"size": len(entry[0]), "content_type": entry[1]} if entry else None
+
+    def delete(self, filename: str, bucket_name: str) -> bool:
+        with self._lock:
+            return self.objects.pop((bucket_name, filename), None) is not None
+
+    def public_url(self, filename: str, bucket_name: str) -> str:
+        return f"{self.public_base}{quote(bucket_name)}/{quote(filename)}"
+
+
+def create_storage_backend(backend: str = STORAGE_BACKEND) -> StorageBackend:
+    """Build the configured storage backend"""
+    if backend == "gcs":
+        return GCSStorageBackend()
+    if backend == "local":
+        return LocalStorageBackend()
+    if backend == "memory":
+        return MemoryStorageBackend()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+storage_backend = create_storage_backend()
+
+
+def check_signing_key(backend: Optional[StorageBackend] = None):
+    """
+    Startup check for STORAGE_SIGNING_KEY. The local and memory backends sign
+    every URL they hand out with it, so they refuse to run without one; on
+    GCS only direct uploads need it.
+    """
+    backend = backend or storage_backend
+    if STORAGE_SIGNING_KEY:
+        return
+    if not isinstance(backend, GCSStorageBackend):
+        raise RuntimeError(f"STORAGE_SIGNING_KEY must be set for the {type(backend).__name__}: "
+                           "its signed URLs have to verify on every worker and across restarts")
+    print("⚠️ STORAGE_SIGNING_KEY is not set: direct uploads (/api/upload/signed-url) are disabled")
+
+
+# --- Blocking API ---
+
+def content_address(data: bytes, filename: str, sha256: Optional[str] = None) -> str:
+    """Object name for content-addressed storage: the requested folder, the SHA-256, the extension"""
+    directory, base = posixpath.split(filename)
+    digest = sha256 or hashlib.sha256(data).hexdigest()
+    return posixpath.join(directory, digest + posixpath.splitext(base)[1].lower())
+
+def _known_url(bucket_name: str, filename: str) -> Optional[str]:
+    backend = storage_backend
+    with backend.known_lock:
+        url = backend.known.get((bucket_name, filename))
+        if url is not None:
+            backend.known.move_to_end((bucket_name, filename))
+        return url
+
+def _remember(bucket_name: str, filename: str, url: Optional[str]):
+    backend = storage_backend
+    with backend.known_lock:
+        if url is None:
+            backend.known.pop((bucket_name, filename), None)
+            return
+        backend.known[(bucket_name, filename)] = url
+        while len(backend.known) > STORAGE_KNOWN_OBJECTS:
+            backend.known.popitem(last=False)
+
+def upload_once(content, filename: str, content_type: str, bucket_name: str = DEFAULT_BUCKET, public: bool = False,
+                metadata: Optional[Dict[str, str]] = None, size: Optional[int] = None) -> str:
+    """
+    Write-once upload for names that identify their bytes: objects this
+    process has seen cost nothing, others one existence check, and only
+    missing ones are sent.
+    """
+    url = _known_url(bucket_name, filename)
+    if url is not None:
+        storage_uploads_total.inc(result="known")
+        return url
+    if storage_backend.exists(filename, bucket_name):
+        url = storage_backend.public_url(filename, bucket_name)
+        storage_uploads_total.inc(result="exists")
+    elif isinstance(content, (bytes, bytearray)):
+        url = storage_backend.upload(content, filename, content_type, bucket_name, public, metadata)
+        storage_uploads_total.inc(result="uploaded")
+    else:
+        url = storage_backend.upload_stream(content, filename, content_type, bucket_name, size, public, metadata)
+        storage_uploads_total.inc(result="uploaded")
+    _remember(bucket_name, filename, url)
+    return url
+
+def upload_blob(content, filename: str, content_type: str, bucket_name: str = DEFAULT_BUCKET, public: bool = False,
+                content_addressed: Optional[bool] = None) -> str:
+    """Upload bytes or a file object and return the object's public URL"""
+    if STORAGE_CONTENT_ADDRESSED if content_addressed is None else content_addressed:
+        data = _read_content(content)
+        return upload_once(data, content_address(data, filename), content_type, bucket_name, public, {"alias": filename})
+    return storage_backend.upload(content, filename, content_type, bucket_name, public)
+
+def upload_blob_stream(file, filename: str, content_type: str, bucket_name: str = DEFAULT_BUCKET,
+                       size: Optional[int] = None, public: bool = False, content_addressed: Optional[bool] = None,
+                       max_bytes: Optional[int] = None) -> Dict[str, object]:
+    """
+    Stream a (seekable) file to the backend in chunks, hashing on the way.
+    Returns the URL, object name, size and SHA-256; raises UploadTooLarge.
+    """
+    max_bytes = STORAGE_MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    if size is None and file.seekable():
+        size = file.seek(0, os.SEEK_END)
+        file.seek(0)
+    if size is not None and size > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+
+    reader = HashingReader(file, max_bytes)
+    content_addressed = STORAGE_CONTENT_ADDRESSED if content_addressed is None else content_addressed
+    if content_addressed or (size or 0) >= STORAGE_COMPOSITE_THRESHOLD:
+        # The name needs the hash first, and composite parts upload out of order
+        reader.consume()
+
+    if content_addressed:
+        name = content_address(b"", filename, reader.sha256)
+        url = upload_once(reader, name, content_type, bucket_name, public, {"alias": filename}, size)
+    else:
+        name = filename
+        url = storage_backend.upload_stream(reader, name, content_type, bucket_name, size, public)
+    return {"url": url, "name": name, "size": reader.size, "sha256": reader.sha256}
+
+def read_blob(filename: str, bucket_name: str = DEFAULT_BUCKET) -> bytes:
+    return storage_backend.read(filename, bucket_name)
+
+def blob_exists(filename: str, bucket_name: str = DEFAULT_BUCKET) -> bool:
+    return storage_backend.exists(filename, bucket_name)
+
+def delete_blob(filename: str, bucket_name: str = DEFAULT_BUCKET) -> bool:
+    """Delete an object; returns False if it was already gone"""
+    _remember(bucket_name, filename, None)
+    return storage_backend.delete(filename, bucket_name)
+
+def blob_public_url(filename: str, bucket_name: str = DEFAULT_BUCKET) -> str:
+    return storage_backend.public_url(filename, bucket_name)
+
+def blob_signed_url(filename: str, bucket_name: str = DEFAULT_BUCKET, method: str = "GET",
+                    expiration: int = STORAGE_SIGNED_URL_TTL, content_type: Optional[str] = None) -> str:
+    return storage_backend.signed_url(filename, bucket_name, method, expiration, content_type)
+
+def blob_signed_upload(filename: str, content_type: str, bucket_name: str = DEFAULT_BUCKET,
+                       max_bytes: Optional[int] = None, expiration: int = STORAGE_SIGNED_URL_TTL) -> Dict[str, object]:
+    max_bytes = STORAGE_MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    token = upload_token(bucket_name, filename)
+    target = storage_backend.signed_upload(filename, bucket_name, content_type, max_bytes, expiration)
+    return {**target, "expires_at": int(time.time()) + expiration, "upload_token": token}
+
+def blob_stat(filename: str, bucket_name: str = DEFAULT_BUCKET) -> Optional[Dict[str, object]]:
+    return storage_backend.stat(filename, bucket_name)
 
 def upload_to_gcs(file, filename: str, content_type: str, bucket_name: str):
-    """Uploads a file to the given GCS bucket."""
+    """Uploads a file to the given bucket."""
+    return upload_blob(file, filename, content_type, bucket_name)
+
+
+# --- Async API ---
+
+async def upload(content, filename: str, content_type: str, bucket_name: str = DEFAULT_BUCKET, public: bool = False,
+                 content_addressed: Optional[bool] = None) -> str:
+    return await run_storage(upload_blob, content, filename, content_type, bucket_name, public, content_addressed)
+
+async def upload_stream(file, filename: str, content_type: str, bucket_name: str = DEFAULT_BUCKET,
+                        size: Optional[int] = None, public: bool = False, content_addressed: Optional[bool] = None,
+                        max_bytes: Optional[int] = None) -> Dict[str, object]:
+    return await run_storage(upload_blob_stream, file, filename, content_type, bucket_name, size, public,
+                             content_addressed, max_bytes)
+
+async def read(filename: str, bucket_name: str = DEFAULT_BUCKET) -> bytes:
+    return await run_storage(read_blob, filename, bucket_name)
+
+async def exists(filename: str, bucket_name: str = DEFAULT_BUCKET) -> bool:
+    return await run_storage(blob_exists, filename, bucket_name)
+
+async def delete(filename: str, bucket_name: str = DEFAULT_BUCKET) -> bool:
+    return await run_storage(delete_blob, filename, bucket_name)
+
+async def signed_url(filename: str, bucket_name: str = DEFAULT_BUCKET, method: str = "GET",
+                     expiration: int = STORAGE_SIGNED_URL_TTL, content_type: Optional[str] = None) -> str:
+    return await run_storage(blob_signed_url, filename, bucket_name, method, expiration, content_type)
 
-    # Initialize the GCS client
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(filename)
+async def signed_upload(filename: str, content_type: str, bucket_name: str = DEFAULT_BUCKET,
+                        max_bytes: Optional[int] = None, expiration: int = STORAGE_SIGNED_URL_TTL) -> Dict[str, object]:
+    return await run_storage(blob_signed_upload, filename, content_type, bucket_name, max_bytes, expiration)
 
-    # Upload the file
-    blob.upload_from_file(file, content_type=content_type)
+async def stat(filename: str, bucket_name: str = DEFAULT_BUCKET) -> Optional[Dict[str, object]]:
+    return await run_storage(blob_stat, filename, bucket_name)
 
-    # Return the public URL
-    return blob.public_url
+async def check(bucket_name: str = DEFAULT_BUCKET) -> bool:
+    return await run_storage(storage_backend.check, bucket_name)
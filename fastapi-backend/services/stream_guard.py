@@ -0,0 +1,61 @@
+"""
+Client Disconnect Guard
+Wraps the async generators behind StreamingResponse so that a client going
+away cancels the upstream work right away. Without it the generator only
+notices on its next write, after the whole LLM completion has been paid for.
+"""
+import asyncio
+import os
+from typing import Any, AsyncIterator
+from fastapi import Request
+from services.llm_metrics import cancelled_streams_total
+
+DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "0.5"))
+
+
+async def _wait_for_disconnect(request: Request, interval: float):
+    while not await request.is_disconnected():
+        await asyncio.sleep(interval)
+
+
+async def guard_disconnect(
+    request: Request,
+    stream: AsyncIterator[Any],
+    stream_name: str,
+    interval: float = DISCONNECT_POLL_INTERVAL
+) -> AsyncIterator[Any]:
+    """
+    Relay ``stream`` until it finishes or the client disconnects; ``stream_name``
+    labels cancelled_streams_total.
+    On disconnect the pending step of ``stream`` is cancelled, which unwinds
+    the chain, releases semaphores and lets single-flight drop the upstream call.
+    """
+    iterator = stream.__aiter__()
+    watcher = asyncio.create_task(_wait_for_disconnect(request, interval))
+    step = None
+    finished = False
+    try:
+        while True:
+            step = asyncio.ensure_future(iterator.__anext__())
+            await asyncio.wait({step, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not step.done():
+                break
+            try:
+                chunk = step.result()
+            except StopAsyncIteration:
+                finished = True
+                return
+            except BaseException:
+                finished = True
+                raise
+            step = None
+            yield chunk
+    finally:
+        watcher.cancel()
+        if step is not None and not step.done():
+            step.cancel()
+            await asyncio.gather(step, return_exceptions=True)
+        if not finished:
+            cancelled_streams_total.inc(stream=stream_name)
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
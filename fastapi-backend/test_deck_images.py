@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for eager deck image generation
+Uses a fake image service so no OpenAI or storage calls are made.
+"""
+
+import asyncio
+import json
+from services.deck_image_service import DeckImagePrefetcher, stream_slide_events
+
+
+def section(title, *queries):
+    images = "".join(f'<IMG query="{query}" />' for query in queries)
+    return f'<SECTION layout="left"><H1>{title}</H1>{images}<BULLETS><DIV><P>Point</P></DIV></BULLETS></SECTION>\n'
+
+
+class FakeImageService:
+    def __init__(self, delay=0.01, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.cancelled = 0
+
+    async def generate_presentation_image(self, prompt, model, size):
+        self.calls.append(prompt)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if prompt in self.fail:
+                raise RuntimeError(f"content policy: {prompt}")
+            return f"https://storage.googleapis.com/deck/{prompt.replace(' ', '_')}.png"
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+
+
+async def chunked(text, size=16, delay=0.0):
+    for start in range(0, len(text), size):
+        await asyncio.sleep(delay)
+        yield text[start:start + size]
+
+
+def collect(xml_stream, service, max_concurrency=4):
+    def factory(on_event, user_email=None):
+        return DeckImagePrefetcher(on_event, max_concurrency=max_concurrency, image_service=service)
+
+    async def run():
+        return [json.loads(line[len("data: "):]) async for line in stream_slide_events(xml_stream, True, None, factory)]
+
+    return asyncio.run(run())
+
+
+def test_image_events_follow_their_slide():
+    deck = "<PRESENTATION>" + "".join(section(f"Slide {n}", f"query number {n}") for n in range(4)) + "</PRESENTATION>"
+    # Instant images: they finish before their slide has fully streamed
+    events = collect(chunked(deck, delay=0.001), FakeImageService(delay=0))
+
+    statuses = [event["status"] for event in events]
+    assert statuses[-2:] == ["slides_complete", "complete"] and statuses.count("image_ready") == 4
+    for n in range(4):
+        slide_at = next(i for i, e in enumerate(events) if e["status"] == "slide" and e["slide"]["index"] == n)
+        image_at = next(i for i, e in enumerate(events) if e["status"] == "image_ready" and e["slide_index"] == n)
+        assert slide_at < image_at
+
+
+def test_concurrency_is_capped():
+    deck = "".join(section(f"Slide {n}", f"query {n} a", f"query {n} b") for n in range(5))
+    service = FakeImageService(delay=0.02)
+    events = collect(chunked(deck, size=len(deck)), service, max_concurrency=2)
+
+    assert service.peak == 2 and len(service.calls) == 10
+    assert sum(e["status"] == "image_ready" for e in events) == 10
+
+
+def test_duplicate_queries_are_generated_once_but_reported_per_slide():
+    deck = section("One", "shared query") + section("Two", "shared query")
+    service = FakeImageService()
+    events = collect(chunked(deck), service)
+
+    assert service.calls == ["shared query"]
+    assert sorted(e["slide_index"] for e in events if e["status"] == "image_ready") == [0, 1]
+
+
+def test_duplicate_after_a_failure_still_gets_an_error():
+    async def slow_tail():
+        async for chunk in chunked(section("One", "blocked query")):
+            yield chunk
+        await asyncio.sleep(0.05)  # The first generation has failed by now
+        async for chunk in chunked(section("Two", "blocked query")):
+            yield chunk
+
+    service = FakeImageService(delay=0.005, fail={"blocked query"})
+    events = collect(slow_tail(), service)
+
+    errors = [e for e in events if e["status"] == "image_error"]
+    assert service.calls == ["blocked query"]
+    assert [e["slide_index"] for e in errors] == [0, 1]
+    assert all("content policy" in e["message"] for e in errors)
+
+
+def test_disconnect_cancels_images_in_flight():
+    service = FakeImageService(delay=10)
+    deck = section("One", "slow query a") + section("Two", "slow query b")
+
+    def factory(on_event, user_email=None):
+        return DeckImagePrefetcher(on_event, image_service=service)
+
+    async def run():
+        stream = stream_slide_events(chunked(deck, size=len(deck)), True, None, factory)
+        first = await stream.__anext__()
+        await asyncio.sleep(0.01)  # Let the generations start
+        await stream.aclose()  # What StreamingResponse does when the client goes away
+        await asyncio.sleep(0.01)
+        return json.loads(first[len("data: "):])
+
+    first = asyncio.run(run())
+    assert first["status"] == "slide"
+    assert service.calls == ["slow query a", "slow query b"] and service.cancelled == 2
+
+
+if __name__ == "__main__":
+    print("🔄 Testing eager deck images")
+    test_image_events_follow_their_slide()
+    test_concurrency_is_capped()
+    test_duplicate_queries_are_generated_once_but_reported_per_slide()
+    test_duplicate_after_a_failure_still_gets_an_error()
+    test_disconnect_cancels_images_in_flight()
+    print("✅ Deck image checks passed")
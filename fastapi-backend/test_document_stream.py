@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test script for token-level document streaming
+Uses a fake chain and a fake uploader so no OpenAI or GCS calls are made.
+"""
+
+import asyncio
+import io
+import os
+from docx import Document
+from services import document_pipeline
+from services.docx_renderer import DOCX_STREAMING_THRESHOLD
+from services import partnership_agreement_service as service
+
+AGREEMENT = "# PARTNERSHIP AGREEMENT\n\nThis agreement is made between Acme and Globex."
+
+DATA = {
+    "party1_name": "Acme",
+    "party1_address": "1 Road",
+    "party2_name": "Globex",
+    "party2_address": "2 Street",
+    "partnership_purpose": "Joint venture",
+    "partnership_duration": "2 years",
+    "profit_sharing_ratio": "50/50",
+    "responsibilities_party1": ["Engineering"],
+    "responsibilities_party2": ["Sales"],
+    "effective_date": "2025-01-01",
+}
+
+
+class FakeChain:
+    def __init__(self, text=AGREEMENT, chunk=8):
+        self.text = text
+        self.chunk = chunk
+        self.calls = 0
+
+    async def astream(self, inputs):
+        self.calls += 1
+        for start in range(0, len(self.text), self.chunk):
+            await asyncio.sleep(0.001)
+            yield self.text[start:start + self.chunk]
+
+
+UPLOADS = {}
+
+
+def fake_upload_document(content, filename, content_type, bucket_name=None):
+    UPLOADS[filename] = content
+    return f"https://storage.googleapis.com/deck123/{filename}"
+
+
+def run_with_fakes(coro_fn, fake=None, upload=fake_upload_document):
+    fake = fake or FakeChain()
+    pipeline = service.partnership_agreement_pipeline
+    originals = pipeline.chain, document_pipeline.upload_document
+    pipeline.chain, document_pipeline.upload_document = fake, upload
+    try:
+        return fake, asyncio.run(coro_fn())
+    finally:
+        pipeline.chain, document_pipeline.upload_document = originals
+
+
+def test_chunks_stream_before_render_and_result():
+    async def collect():
+        return [event async for event in service.stream_partnership_agreement(DATA)]
+
+    _, events = run_with_fakes(collect)
+    statuses = [event["status"] for event in events]
+
+    assert statuses[0] == "chunk" and statuses.count("chunk") > 1
+    assert statuses[-4:] == ["rendering", "uploading", "uploaded", "complete"]
+    assert set(events[-2]["timings"]) == {"docx"}
+    assert "".join(e["content"] for e in events if e["status"] == "chunk") == AGREEMENT
+    assert events[-1]["data"]["document_url"].endswith(".docx")
+    assert "Partnership_Agreement_Acme_Globex_" in events[-1]["data"]["document_url"]
+
+
+def test_generate_and_stream_share_one_generation():
+    async def both():
+        streamed = [event async for event in service.stream_partnership_agreement(DATA)]
+        return streamed
+
+    async def concurrently():
+        return await asyncio.gather(both(), service.generate_partnership_agreement(DATA))
+
+    fake, (events, result) = run_with_fakes(concurrently)
+    assert fake.calls == 1
+    assert result == events[-1]["data"]
+    assert result["word_count"] == len(AGREEMENT.split())
+
+
+def test_rendered_docx_contains_headings_and_body():
+    run_with_fakes(lambda: service.generate_partnership_agreement(DATA))
+    docx_bytes = next(content for name, content in UPLOADS.items() if name.endswith(".docx"))
+    texts = [p.text for p in Document(io.BytesIO(docx_bytes)).paragraphs]
+    assert "Partnership Agreement" in texts
+    assert "This agreement is made between Acme and Globex." in texts
+
+
+def test_long_documents_upload_from_a_temp_file():
+    clause = "\n\n## Clause\nEach party shall keep the other's **confidential** information private."
+    long_text = AGREEMENT + clause * (DOCX_STREAMING_THRESHOLD // len(clause) + 1)
+    uploaded = {}
+
+    def streaming_upload(content, filename, content_type, bucket_name=None):
+        if filename.endswith(".docx"):
+            uploaded["path"] = content.name
+            uploaded["is_bytes"] = isinstance(content, bytes)
+            uploaded["docx"] = content.read()
+        return f"https://storage.googleapis.com/deck123/{filename}"
+
+    run_with_fakes(lambda: service.generate_partnership_agreement({**DATA, "party1_name": "Streamed"}),
+                   FakeChain(long_text, chunk=4096), streaming_upload)
+
+    # The zip never came back as bytes; it was read from disk and the file removed afterwards
+    assert uploaded["is_bytes"] is False and not os.path.exists(uploaded["path"])
+    texts = [p.text for p in Document(io.BytesIO(uploaded["docx"])).paragraphs]
+    assert "This agreement is made between Acme and Globex." in texts and texts.count("Clause") > 100
+
+
+def test_logo_fetch_overlaps_generation():
+    order = []
+
+    class SlowLogoCache:
+        async def get(self, url):
+            order.append("logo started")
+            await asyncio.sleep(0.02)
+            order.append("logo done")
+            return None
+
+    async def collect():
+        events = []
+        async for event in service.stream_partnership_agreement({**DATA, "logo_url": "https://example.com/logo.png"}):
+            if not events:
+                order.append("first chunk")
+            events.append(event)
+        return events
+
+    original = document_pipeline.logo_cache
+    document_pipeline.logo_cache = SlowLogoCache()
+    try:
+        fake, events = run_with_fakes(collect)
+    finally:
+        document_pipeline.logo_cache = original
+
+    # The fetch starts with generation and doesn't hold up the chunks
+    assert order == ["logo started", "first chunk", "logo done"]
+    assert events[-1]["status"] == "complete"
+
+
+if __name__ == "__main__":
+    print("🔄 Testing document streaming")
+    test_chunks_stream_before_render_and_result()
+    test_generate_and_stream_share_one_generation()
+    test_rendered_docx_contains_headings_and_body()
+    test_long_documents_upload_from_a_temp_file()
+    test_logo_fetch_overlaps_generation()
+    print("✅ Document streaming checks passed")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming OOXML writer
+Checks the streamed .docx against the python-docx render of the same content.
+"""
+
+import io
+import os
+import random
+import tempfile
+import tracemalloc
+from docx import Document
+from PIL import Image
+from services import docx_renderer
+from services.docx_renderer import RenderSpec, render_docx, render_docx_file, write_docx_stream
+from services.logo_cache import prepare_logo
+
+SECTION = """{number}. Section {number}
+The Provider shall deliver the **Services** described in *Schedule {number}* & keep records < 7 years.
+- Obligation with __emphasis__
+  - Nested obligation
+1. A numbered clause that ends with a full stop.
+| Item | Owner |
+|------|-------|
+| Report {number} | Provider |
+---
+"""
+
+
+def long_content(sections=12, repeat=1):
+    return "# Privacy Policy\n" + "".join(SECTION.format(number=n) for n in range(1, sections + 1)) * repeat
+
+
+def make_logo():
+    buffer = io.BytesIO()
+    Image.new("RGBA", (800, 400), (200, 40, 40, 255)).save(buffer, format="PNG")
+    return prepare_logo(buffer.getvalue())
+
+
+def describe(docx_bytes):
+    doc = Document(io.BytesIO(docx_bytes))
+    paragraphs = [
+        (p.style.name, p.text, [(r.text, bool(r.bold), bool(r.italic)) for r in p.runs])
+        for p in doc.paragraphs
+    ]
+    tables = [[[cell.text for cell in row.cells] for row in table.rows] for table in doc.tables]
+    section = doc.sections[0]
+    header = section.header
+    return {
+        "paragraphs": paragraphs,
+        "tables": tables,
+        "margins": (section.top_margin, section.left_margin),
+        "header_tables": len(header.tables),
+        "header_images": len([rel for rel in header.part.rels.values() if "image" in rel.reltype]),
+        "footer_xml_has_page": "PAGE" in section.footer._element.xml,
+    }
+
+
+def streamed(spec, content, logo):
+    out = io.BytesIO()
+    write_docx_stream(spec, content, logo, out, flush_every=4)
+    return out.getvalue()
+
+
+def test_stream_matches_python_docx_with_logo_and_page_numbers():
+    spec = RenderSpec("Privacy Policy", numbered_sections=12, header="logo_and_page_number", footer_page_numbers=True, top_margin=1.5)
+    logo = make_logo()
+    content = long_content()
+
+    expected = describe(render_docx(spec, {}, content, logo, use_skeleton=True))
+    actual = describe(streamed(spec, content, logo))
+
+    assert actual == expected
+    assert actual["header_images"] == 1 and actual["footer_xml_has_page"]
+
+
+def test_render_switches_to_streaming_above_threshold():
+    spec = RenderSpec("Terms of Service", numbered_sections=15)
+    content = long_content(repeat=3)
+    calls = []
+
+    def recording_writer(*args, **kwargs):
+        calls.append(len(args[1]))
+        return write_docx_stream(*args, **kwargs)
+
+    originals = docx_renderer.DOCX_STREAMING_THRESHOLD, docx_renderer.write_docx_stream
+    docx_renderer.DOCX_STREAMING_THRESHOLD, docx_renderer.write_docx_stream = len(content), recording_writer
+    try:
+        short = render_docx(spec, {}, content[:len(content) // 2])
+        long = render_docx(spec, {}, content)
+    finally:
+        docx_renderer.DOCX_STREAMING_THRESHOLD, docx_renderer.write_docx_stream = originals
+
+    assert calls == [len(content)]
+    assert describe(long)["paragraphs"][-1] == describe(render_docx(spec, {}, content, use_skeleton=False))["paragraphs"][-1]
+    assert describe(short)["paragraphs"]
+
+
+def test_stream_memory_stays_flat():
+    spec = RenderSpec("Terms of Service", numbered_sections=15)
+    write_docx_stream(spec, long_content(), None, io.BytesIO())  # Build the skeleton first
+
+    def peak(repeat):
+        content = long_content(repeat=repeat)
+        tracemalloc.start()
+        write_docx_stream(spec, content, None, io.BytesIO())
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak_bytes
+
+    small, large = peak(2), peak(100)
+    # 50x the content, roughly the same working memory
+    assert large < small * 1.5
+
+
+def test_file_render_never_holds_the_zip():
+    spec = RenderSpec("Terms of Service", numbered_sections=15)
+    # Random words, so the zip stays large enough to tell apart from the working set
+    rng = random.Random(0)
+    words = lambda n: " ".join("%08x" % rng.getrandbits(32) for _ in range(n))
+    body = [words(200) for _ in range(2000)]
+    content = "# Terms\n" + "".join(f"{n}. Clause {n}\n{text}\n" for n, text in enumerate(body, 1))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "terms.docx")
+        render_docx_file(spec, {}, long_content(), None, path)  # Build the skeleton first
+
+        tracemalloc.start()
+        size = render_docx_file(spec, {}, content, None, path)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        assert size == os.path.getsize(path)
+        assert peak_bytes < size / 2  # Less than the finished file, let alone the document tree
+        with open(path, "rb") as f:
+            assert Document(f).paragraphs[-1].text == body[-1]
+
+
+if __name__ == "__main__":
+    print("🔄 Testing streaming OOXML writer")
+    test_stream_matches_python_docx_with_logo_and_page_numbers()
+    test_render_switches_to_streaming_above_threshold()
+    test_stream_memory_stays_flat()
+    test_file_render_never_holds_the_zip()
+    print("✅ Streaming writer checks passed")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM response cache
+Uses LangChain's fake chat model so no OpenAI calls are made.
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+from langchain.prompts import PromptTemplate
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from services import llm_cache
+from services.llm_cache import CachedChain, InMemoryLLMCache, SQLiteLLMCache, cache_stats
+
+RESPONSE = "# First Main Topic\n- Key point about this topic\n- Another important aspect\n"
+
+
+async def stream_all(chain, inputs):
+    return [chunk async for chunk in chain.astream(inputs)]
+
+
+def run_cache_roundtrip(cache, name):
+    model = FakeListChatModel(responses=[RESPONSE, "a different answer"])
+    chain = CachedChain(name, PromptTemplate.from_template("Outline about {prompt}"), model, cache=cache)
+
+    first = asyncio.run(stream_all(chain, {"prompt": "solar"}))
+    second = asyncio.run(stream_all(chain, {"prompt": "solar"}))
+
+    assert "".join(first) == RESPONSE
+    assert "".join(second) == RESPONSE
+    assert len(second) > 1, "cached completions are replayed as a chunked stream"
+    assert cache_stats[name] == {"hits": 1, "misses": 1}
+
+    # Different variables are a different key
+    third = asyncio.run(chain.ainvoke({"prompt": "wind"}))
+    assert third == "a different answer"
+    assert cache_stats[name] == {"hits": 1, "misses": 2}
+
+
+def test_in_memory_cache():
+    run_cache_roundtrip(InMemoryLLMCache(maxsize=8, ttl=60), "test_memory")
+
+
+def test_sqlite_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        run_cache_roundtrip(SQLiteLLMCache(os.path.join(tmp, "cache.sqlite3"), ttl=60), "test_sqlite")
+
+
+def test_lru_eviction_and_ttl():
+    cache = InMemoryLLMCache(maxsize=2, ttl=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None and cache.get("a") == "1"
+
+    expired = InMemoryLLMCache(maxsize=2, ttl=-1)
+    expired.set("a", "1")
+    assert expired.get("a") is None
+
+
+def test_sqlite_runs_off_the_event_loop():
+    class RecordingCache(SQLiteLLMCache):
+        threads = set()
+
+        def get(self, key):
+            self.threads.add(threading.get_ident())
+            return super().get(key)
+
+        def set(self, key, value):
+            self.threads.add(threading.get_ident())
+            super().set(key, value)
+
+    async def run(chain):
+        loop_thread = threading.get_ident()
+        await chain.ainvoke({"prompt": "solar"})
+        return loop_thread
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RecordingCache(os.path.join(tmp, "cache.sqlite3"), ttl=60)
+        chain = CachedChain("test_sqlite_thread", PromptTemplate.from_template("{prompt}"),
+                            FakeListChatModel(responses=[RESPONSE]), cache=cache)
+        loop_thread = asyncio.run(run(chain))
+
+    assert RecordingCache.threads and loop_thread not in RecordingCache.threads
+
+
+def test_caching_is_off_by_default():
+    if os.environ.get("LLM_CACHE_BACKEND"):
+        return  # Explicitly configured for this run
+    assert llm_cache.llm_cache is None
+    model = FakeListChatModel(responses=["first", "second"])
+    chain = CachedChain("test_default_off", PromptTemplate.from_template("{prompt}"), model)
+
+    # A repeated creative prompt gets a fresh completion
+    assert asyncio.run(chain.ainvoke({"prompt": "solar"})) == "first"
+    assert asyncio.run(chain.ainvoke({"prompt": "solar"})) == "second"
+
+
+if __name__ == "__main__":
+    print("🔄 Testing LLM cache")
+    test_in_memory_cache()
+    test_sqlite_cache()
+    test_lru_eviction_and_ttl()
+    test_sqlite_runs_off_the_event_loop()
+    test_caching_is_off_by_default()
+    print("✅ LLM cache checks passed")
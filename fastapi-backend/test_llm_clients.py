@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared OpenAI client registry
+Only builds clients; no requests are sent to OpenAI.
+"""
+
+import asyncio
+import os
+from langchain.prompts import PromptTemplate
+from services import llm_clients
+from services.llm_cache import CachedChain
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+
+def reset_registry():
+    asyncio.run(llm_clients.close_clients())
+
+
+def test_clients_are_built_lazily():
+    reset_registry()
+    spec = llm_clients.chat_model("gpt-4o-mini", temperature=0.7, streaming=True)
+
+    # Declaring a model opens nothing
+    assert llm_clients._http_client is None and llm_clients._async_http_client is None
+    assert not llm_clients._chat_models
+
+    model = spec.build()
+    assert llm_clients._http_client is not None and llm_clients._async_http_client is not None
+    assert model.model_name == "gpt-4o-mini" and model.streaming
+    reset_registry()
+
+
+def test_registry_returns_shared_instances():
+    reset_registry()
+    first = llm_clients.get_chat_model("gpt-4o", 0.3)
+    assert llm_clients.get_chat_model("gpt-4o", 0.3) is first
+    assert llm_clients.chat_model("gpt-4o", temperature=0.3).build() is first
+    assert llm_clients.get_chat_model("gpt-4o", 0.7) is not first
+
+    # Every client rides on the same httpx pools
+    assert llm_clients.get_openai_client() is llm_clients.get_openai_client()
+    assert llm_clients.get_openai_client()._client is llm_clients.get_http_client()
+    assert llm_clients.get_async_openai_client()._client is llm_clients.get_async_http_client()
+    reset_registry()
+
+
+def test_chains_rebind_after_close():
+    reset_registry()
+    chain = CachedChain("test_rebind", PromptTemplate.from_template("{prompt}"), llm_clients.chat_model("gpt-4o", 0.3))
+    before = chain.chain
+    assert chain.chain is before
+
+    reset_registry()
+    after = chain.chain
+    # The chain picks up the new model instead of one bound to the closed pool
+    assert after is not before
+    assert not llm_clients.get_async_http_client().is_closed
+    reset_registry()
+
+
+if __name__ == "__main__":
+    print("🔄 Testing OpenAI client registry")
+    test_clients_are_built_lazily()
+    test_registry_returns_shared_instances()
+    test_chains_rebind_after_close()
+    print("✅ Client registry checks passed")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for LLM instrumentation and the /metrics exposition
+Uses LangChain's fake chat model so no OpenAI calls are made.
+"""
+
+import asyncio
+from langchain.prompts import PromptTemplate
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from services.llm_cache import CachedChain, InMemoryLLMCache
+from services.llm_metrics import Counter, Histogram, llm_requests_total, llm_time_to_first_token, render_metrics
+
+RESPONSE = "# First Main Topic\n- Key point about this topic\n- Another important aspect\n"
+
+
+async def stream_all(chain, inputs):
+    return [chunk async for chunk in chain.astream(inputs)]
+
+
+def test_misses_are_instrumented_and_hits_are_not():
+    model = FakeListChatModel(responses=[RESPONSE])
+    chain = CachedChain("test_metrics", PromptTemplate.from_template("{prompt}"), model, cache=InMemoryLLMCache())
+    asyncio.run(stream_all(chain, {"prompt": "solar"}))
+    asyncio.run(stream_all(chain, {"prompt": "solar"}))
+
+    assert llm_requests_total.value(chain="test_metrics", model="unknown", status="success") == 1
+    assert llm_time_to_first_token.mean(chain="test_metrics", model="unknown") is not None
+    exposition = render_metrics()
+    assert 'llm_completion_tokens_count{chain="test_metrics",model="unknown"} 1' in exposition
+    assert 'llm_cache_hits_total{chain="test_metrics"} 1' in exposition
+
+
+def test_counter_exposition():
+    counter = Counter("test_requests_total", "Requests by outcome", ("chain", "status"))
+    counter.inc(chain="slides", status="success")
+    counter.inc(2, chain="slides", status="success")
+    counter.inc(chain="outline", status="error")
+
+    assert counter.render() == [
+        "# HELP test_requests_total Requests by outcome",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{chain="outline",status="error"} 1',
+        'test_requests_total{chain="slides",status="success"} 3',
+    ]
+
+
+def test_histogram_exposition():
+    histogram = Histogram("test_latency_seconds", "Call latency", (0.1, 1.0), ("chain",))
+    for value in (0.05, 0.5, 3.0):
+        histogram.observe(value, chain="slides")
+
+    # Buckets are cumulative and end with +Inf, followed by _sum and _count
+    assert histogram.render() == [
+        "# HELP test_latency_seconds Call latency",
+        "# TYPE test_latency_seconds histogram",
+        'test_latency_seconds_bucket{chain="slides",le="0.1"} 1',
+        'test_latency_seconds_bucket{chain="slides",le="1.0"} 2',
+        'test_latency_seconds_bucket{chain="slides",le="+Inf"} 3',
+        'test_latency_seconds_sum{chain="slides"} 3.55',
+        'test_latency_seconds_count{chain="slides"} 3',
+    ]
+
+
+def test_render_metrics_is_valid_text_format():
+    exposition = render_metrics()
+    assert exposition.endswith("\n")
+    for line in exposition.splitlines():
+        if line.startswith("#"):
+            assert line.split(" ", 2)[1] in ("HELP", "TYPE")
+            continue
+        name, value = line.rsplit(" ", 1)
+        float(value)
+        assert name.split("{", 1)[0].replace("_", "").isalnum()
+    assert "# TYPE llm_time_to_first_token_seconds histogram" in exposition
+    assert "# TYPE llm_requests_total counter" in exposition
+
+
+if __name__ == "__main__":
+    print("🔄 Testing LLM metrics")
+    test_misses_are_instrumented_and_hits_are_not()
+    test_counter_exposition()
+    test_histogram_exposition()
+    test_render_metrics_is_valid_text_format()
+    print("✅ LLM metrics checks passed")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test script for the logo asset cache
+Uses an httpx MockTransport so no network calls are made.
+"""
+
+import asyncio
+import io
+import tempfile
+import httpx
+from docx import Document
+from PIL import Image
+from services.logo_cache import DiskLogoStore, LogoCache, prepare_logo
+from services.docx_renderer import add_logo_to_header
+
+URL = "https://example.com/logo.png"
+
+
+def make_png(size=(1024, 1024)):
+    buffer = io.BytesIO()
+    Image.new("RGBA", size, (20, 120, 200, 255)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class FakeServer:
+    """httpx MockTransport handler serving one logo with an ETag"""
+
+    def __init__(self, content, content_type="image/png"):
+        self.content = content
+        self.content_type = content_type
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=self.content, headers={"ETag": '"v1"', "Content-Type": self.content_type})
+
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self))
+
+
+def test_logo_is_resized_to_header_box():
+    raw = make_png()
+    asset = prepare_logo(raw, dpi=300)
+    with Image.open(io.BytesIO(asset.data)) as image:
+        assert image.size == (180, 180)  # Square logo fits the 0.6" height
+    assert (asset.width, asset.height) == (0.6, 0.6)
+    assert len(asset.data) < len(raw)
+
+
+def test_cache_hits_then_revalidates_with_etag():
+    server = FakeServer(make_png())
+    cache = LogoCache(ttl=60, client=server.client())
+
+    async def run():
+        first = await cache.get(URL)
+        assert await cache.get(URL) is first
+        assert len(server.requests) == 1
+
+        first.checked_at -= 120  # Make the entry stale
+        assert await cache.get(URL) is first
+        assert server.requests[-1].headers["If-None-Match"] == '"v1"'
+
+    asyncio.run(run())
+
+
+def test_concurrent_lookups_share_one_download():
+    server = FakeServer(make_png())
+    cache = LogoCache(client=server.client())
+
+    async def run():
+        return await asyncio.gather(*(cache.get(URL) for _ in range(5)))
+
+    assets = asyncio.run(run())
+    assert len(server.requests) == 1
+    assert all(asset is assets[0] for asset in assets)
+
+
+def test_rejects_non_images_and_oversized_bodies():
+    html = FakeServer(b"<html>Not found</html>", content_type="image/png")
+    assert asyncio.run(LogoCache(client=html.client()).get(URL)) is None
+
+    big = FakeServer(make_png())
+    assert asyncio.run(LogoCache(client=big.client(), max_bytes=100).get(URL)) is None
+
+
+def test_disk_store_survives_a_new_process():
+    with tempfile.TemporaryDirectory() as directory:
+        server = FakeServer(make_png((400, 100)))
+        asyncio.run(LogoCache(client=server.client(), disk=DiskLogoStore(directory)).get(URL))
+
+        fresh = LogoCache(client=FakeServer(b"").client(), disk=DiskLogoStore(directory))
+        asset = asyncio.run(fresh.get(URL))
+        assert asset is not None and (asset.width, asset.height) == (1.0, 0.25)
+
+
+def test_header_uses_cached_asset():
+    asset = prepare_logo(make_png())
+    doc = Document()
+    add_logo_to_header(doc, asset, page_number=True)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    assert len(doc.sections[0].header.tables) == 1
+    assert len(doc.inline_shapes) == 0  # Picture lives in the header part
+
+
+if __name__ == "__main__":
+    print("🔄 Testing logo cache")
+    test_logo_is_resized_to_header_box()
+    test_cache_hits_then_revalidates_with_etag()
+    test_concurrent_lookups_share_one_download()
+    test_rejects_non_images_and_oversized_bodies()
+    test_disk_store_survives_a_new_process()
+    test_header_uses_cached_asset()
+    print("✅ Logo cache checks passed")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for the markdown block tokenizer and the style-driven DOCX renderer
+"""
+
+import io
+import zipfile
+from docx import Document
+from services.docx_renderer import RenderSpec, render_docx
+from services.markdown_blocks import block_text, parse_document, parse_inline
+
+SAMPLE = """# Terms of Service
+**1. Acceptance of Terms**
+By using the service you *agree* to these ***terms***.
+2. Payment
+1. The Client shall pay within thirty days.
+- First bullet with **bold**
+  - Nested bullet
+---
+| Plan | Price |
+|------|-------|
+| Basic | $10 |
+13. Not a heading
+"""
+
+
+def test_inline_bold_and_italic():
+    assert parse_inline("a **b** *c* ***d*** __e__ snake_case_name") == [
+        ("a ", False, False), ("b", True, False), (" ", False, False), ("c", False, True),
+        (" ", False, False), ("d", True, True), (" ", False, False), ("e", True, False),
+        (" snake_case_name", False, False),
+    ]
+
+
+def test_blocks_cover_headings_lists_tables_and_rules():
+    blocks = parse_document(SAMPLE, numbered_sections=12)
+    summary = [(block["type"], block.get("level"), block_text(block)) for block in blocks]
+    assert summary == [
+        ("heading", 1, "Terms of Service"),
+        ("heading", 1, "1. Acceptance of Terms"),
+        ("paragraph", None, "By using the service you agree to these terms."),
+        ("heading", 1, "2. Payment"),
+        ("numbered", None, "1. The Client shall pay within thirty days."),
+        ("bullet", 1, "First bullet with bold"),
+        ("bullet", 2, "Nested bullet"),
+        ("rule", None, ""),
+        ("table", None, "Plan\tPrice\nBasic\t$10"),
+        ("numbered", None, "13. Not a heading"),
+    ]
+
+
+def test_rendered_paragraphs_use_named_styles():
+    docx_bytes = render_docx(RenderSpec("Terms", numbered_sections=12), {}, SAMPLE)
+    doc = Document(io.BytesIO(docx_bytes))
+    styles = [(p.style.name, p.text) for p in doc.paragraphs]
+    assert styles[:4] == [
+        ("Title", "Terms"),
+        ("Heading 1", "Terms of Service"),
+        ("Heading 1", "1. Acceptance of Terms"),
+        ("Normal", "By using the service you agree to these terms."),
+    ]
+    assert ("List Bullet 2", "Nested bullet") in styles
+    assert doc.tables[0].cell(1, 1).text == "$10"
+
+    # Body runs carry no inline font, only bold/italic
+    document_xml = zipfile.ZipFile(io.BytesIO(docx_bytes)).read("word/document.xml").decode()
+    body = document_xml.split("Terms of Service", 1)[1]
+    assert "w:rFonts" not in body and "w:sz " not in body
+
+
+if __name__ == "__main__":
+    print("🔄 Testing markdown block tokenizer")
+    test_inline_bold_and_italic()
+    test_blocks_cover_headings_lists_tables_and_rules()
+    test_rendered_paragraphs_use_named_styles()
+    print("✅ Markdown block checks passed")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script for the deterministic NDA render cache and content-hash uploads
+Runs on the in-memory storage backend so no network calls are made.
+"""
+
+import asyncio
+import io
+import time
+import zipfile
+from services import document_pipeline, storage_service
+from services.document_pipeline import content_digest, render_cache
+from services.nda_service import generate_nda, nda_pipeline
+from services.render_pool import RenderPool
+from services.storage_service import MemoryStorageBackend
+
+DATA = {
+    "disclosing_party": "Acme Corp",
+    "receiving_party": "Jane Doe",
+    "purpose": "evaluating a partnership",
+    "duration": "2 years",
+    "governing_law": "Delaware",
+    "effective_date": "2025-01-01",
+}
+
+
+class SlowMemoryStorage(MemoryStorageBackend):
+    """In-memory backend that records uploads and how many ran at once"""
+
+    def __init__(self, latency=0.0):
+        super().__init__()
+        self.uploads = []
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def upload(self, content, filename, content_type, bucket_name, public=False, metadata=None):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+            self.uploads.append(filename)
+        return super().upload(content, filename, content_type, bucket_name, public, metadata)
+
+
+class CountingPool(RenderPool):
+    def __init__(self):
+        super().__init__(kind="inline")
+        self.calls = 0
+
+    async def run(self, fn, *args):
+        self.calls += 1
+        return await super().run(fn, *args)
+
+
+def run_with_fakes(coro_fn, latency=0.0):
+    storage, pool = SlowMemoryStorage(latency), CountingPool()
+    originals = document_pipeline.render_pool, storage_service.storage_backend
+    document_pipeline.render_pool, storage_service.storage_backend = pool, storage
+    render_cache.clear()
+    try:
+        return storage, pool, asyncio.run(coro_fn())
+    finally:
+        document_pipeline.render_pool, storage_service.storage_backend = originals
+        render_cache.clear()
+
+
+def test_repeat_nda_is_a_cache_lookup():
+    async def twice():
+        first = await generate_nda(DATA)
+        second = await generate_nda({**DATA, "receiving_party": "  Jane   Doe "})
+        return first, second
+
+    storage, pool, (first, second) = run_with_fakes(twice)
+
+    assert pool.calls == 1
+    assert len(storage.uploads) == 3
+    assert first["urls"] == second["urls"]
+    assert all(url.startswith("memory://deck123/NDA_Acme_Corp_Jane_Doe_") for url in first["urls"].values())
+
+
+def test_rerender_reuses_content_addressed_objects():
+    async def across_restart():
+        first = await generate_nda(DATA)
+        render_cache.clear()  # A fresh worker process has an empty cache
+        second = await generate_nda(DATA)
+        return first, second
+
+    storage, pool, (first, second) = run_with_fakes(across_restart)
+
+    assert pool.calls == 2
+    assert len(storage.uploads) == 3
+    assert first["urls"] == second["urls"]
+
+
+def test_formats_upload_concurrently():
+    async def collect():
+        return [event async for event in nda_pipeline.stream(DATA)]
+
+    storage, _, events = run_with_fakes(collect, latency=0.2)
+
+    assert storage.max_in_flight == 3
+    uploaded = next(event for event in events if event["status"] == "uploaded")
+    assert set(uploaded["timings"]) == {"html", "markdown", "docx"}
+    assert all(seconds >= 0.2 for seconds in uploaded["timings"].values())
+
+
+def test_docx_digest_ignores_zip_timestamps():
+    def packed(date_time):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr(zipfile.ZipInfo("word/document.xml", date_time), "<w:document/>")
+        return buffer.getvalue()
+
+    earlier, later = packed((2025, 1, 1, 0, 0, 0)), packed((2025, 6, 1, 12, 30, 0))
+    assert earlier != later
+    assert content_digest(earlier, "docx") == content_digest(later, "docx")
+    assert content_digest(b"<html>a</html>", "html") != content_digest(b"<html>b</html>", "html")
+
+
+if __name__ == "__main__":
+    print("🔄 Testing NDA render cache")
+    test_repeat_nda_is_a_cache_lookup()
+    test_rerender_reuses_content_addressed_objects()
+    test_formats_upload_concurrently()
+    test_docx_digest_ignores_zip_timestamps()
+    print("✅ NDA render cache checks passed")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for structured outline streaming (parser + top-up of missing topics)
+Uses fake outline chains so no OpenAI calls are made.
+"""
+
+import asyncio
+from services import presentation_service
+from services.outline_stream_parser import OutlineStreamParser
+
+SAMPLE_OUTLINE = """# The Rise of **Solar**
+- Solar prices dropped sharply
+- Adoption is accelerating
+
+# Wind Power
+* Offshore farms scale quickly
+- Onshore remains cheapest
+"""
+
+
+class FakeStreamChain:
+    def __init__(self, text):
+        self.text = text
+        self.calls = []
+
+    async def astream(self, inputs):
+        self.calls.append(inputs)
+        for start in range(0, len(self.text), 5):
+            yield self.text[start:start + 5]
+
+
+def test_parser_emits_topics_and_bullets_across_chunks():
+    parser = OutlineStreamParser()
+    events = []
+    for start in range(0, len(SAMPLE_OUTLINE), 3):
+        events.extend(parser.feed(SAMPLE_OUTLINE[start:start + 3]))
+    events.extend(parser.close())
+
+    assert [e["status"] for e in events] == [
+        "topic_started", "bullet", "bullet", "topic_complete",
+        "topic_started", "bullet", "bullet", "topic_complete",
+    ]
+    assert events[0]["title"] == "The Rise of Solar"
+    assert events[-1]["topic"] == {"index": 1, "title": "Wind Power", "bullets": ["Offshore farms scale quickly", "Onshore remains cheapest"]}
+
+
+def test_parser_caps_extra_topics():
+    parser = OutlineStreamParser(max_topics=1)
+    events = parser.feed(SAMPLE_OUTLINE) + parser.close()
+    assert parser.topic_count == 1
+    assert all(e.get("topic_index", 0) == 0 for e in events)
+
+
+def run_outline(number_of_cards, first, topup):
+    async def collect():
+        return [e async for e in presentation_service.generate_outline_events("Renewables", number_of_cards, "English")]
+
+    originals = presentation_service.outline_chain, presentation_service.outline_topup_chain
+    presentation_service.outline_chain, presentation_service.outline_topup_chain = first, topup
+    try:
+        return asyncio.run(collect())
+    finally:
+        presentation_service.outline_chain, presentation_service.outline_topup_chain = originals
+
+
+def test_missing_topics_are_topped_up():
+    topup = FakeStreamChain("# Hydro Power\n- Reliable baseload\n- Pumped storage\n")
+    events = run_outline(3, FakeStreamChain(SAMPLE_OUTLINE), topup)
+
+    assert topup.calls[0]["missingCount"] == 1
+    assert "- Wind Power" in topup.calls[0]["existingTopics"]
+    complete = events[-1]
+    assert complete["status"] == "complete" and complete["valid"] and complete["total_topics"] == 3
+    assert complete["outline"][2] == "# Hydro Power\n- Reliable baseload\n- Pumped storage"
+
+
+def test_exact_outline_needs_no_topup():
+    topup = FakeStreamChain("")
+    events = run_outline(2, FakeStreamChain(SAMPLE_OUTLINE), topup)
+    assert topup.calls == []
+    assert "topping_up" not in [e["status"] for e in events]
+    assert events[-1]["valid"]
+
+
+if __name__ == "__main__":
+    print("🔄 Testing structured outline streaming")
+    test_parser_emits_topics_and_bullets_across_chunks()
+    test_parser_caps_extra_topics()
+    test_missing_topics_are_topped_up()
+    test_exact_outline_needs_no_topup()
+    print("✅ Outline events parsed and topped up")
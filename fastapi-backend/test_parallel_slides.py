@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script for parallel per-slide generation (ordered merge + bounded concurrency)
+Uses a fake slide chain so no OpenAI calls are made.
+"""
+
+import asyncio
+import random
+from services import presentation_service
+from services.slide_stream_parser import SlideStreamParser
+
+
+class FakeSlideChain:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def ainvoke(self, inputs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(random.uniform(0, 0.02))
+        self.in_flight -= 1
+        return (
+            f"```xml\n<SECTION layout=\"{inputs['SECTION_LAYOUT']}\">"
+            f"<H1>Slide {inputs['SLIDE_NUMBER']}</H1><{inputs['COMPONENT']}></{inputs['COMPONENT']}>"
+            f"</SECTION>\n```"
+        )
+
+
+async def collect(outline, max_concurrency):
+    chunks = []
+    async for chunk in presentation_service.generate_slides_parallel(
+        title="Deck", outline=outline, language="English", tone="Professional", max_concurrency=max_concurrency
+    ):
+        chunks.append(chunk)
+    return "".join(chunks)
+
+
+def test_parallel_slides_are_ordered_and_bounded():
+    fake = FakeSlideChain()
+    original = presentation_service.slide_chain
+    presentation_service.slide_chain = fake
+    try:
+        outline = [f"Topic {i}" for i in range(12)]
+        xml = asyncio.run(collect(outline, max_concurrency=3))
+    finally:
+        presentation_service.slide_chain = original
+
+    assert fake.max_in_flight <= 3
+    assert xml.startswith("<PRESENTATION>") and xml.endswith("</PRESENTATION>")
+    assert "```" not in xml
+
+    parser = SlideStreamParser()
+    slides = parser.feed(xml) + parser.close()
+    assert [s["title"] for s in slides] == [f"Slide {i + 1}" for i in range(12)]
+    for previous, current in zip(slides, slides[1:]):
+        assert previous["component"] != current["component"]
+        assert previous["layout"] != current["layout"]
+
+
+if __name__ == "__main__":
+    print("🔄 Testing parallel slide generation")
+    test_parallel_slides_are_ordered_and_bounded()
+    print("✅ Slides merged in order with bounded concurrency")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for patching one slide of a stored presentation
+Needs the generated Prisma client (`prisma generate`); the database itself is
+replaced by an in-memory table so nothing is written.
+"""
+
+import asyncio
+import json
+import weakref
+from types import SimpleNamespace
+from services.presentation_db_service import PresentationDBService
+
+
+class FakePresentationTable:
+    def __init__(self, rows):
+        self.rows = rows
+        self.updates = []
+
+    def _record(self, row):
+        return SimpleNamespace(dict=lambda: dict(row))
+
+    async def find_unique(self, where, include=None):
+        row = self.rows.get(where["id"])
+        return self._record(row) if row else None
+
+    async def update(self, where, data, include=None):
+        self.updates.append(data)
+        self.rows[where["id"]].update(data)
+        return self._record(self.rows[where["id"]])
+
+
+def make_service(slides):
+    table = FakePresentationTable({"deck-1": {"id": "deck-1", "title": "Deck", "content": json.dumps({"slides": slides})}})
+    service = PresentationDBService.__new__(PresentationDBService)
+    service.db = SimpleNamespace(presentation=table)
+    service._connected = True
+    service._slide_locks = weakref.WeakValueDictionary()
+    return service, table
+
+
+def plate_slide(slide_id, title):
+    return {"id": slide_id, "layoutType": "left", "content": [{"type": "h1", "children": [{"text": title}]}]}
+
+
+def test_update_presentation_slide_patches_one_plate_slide():
+    slides = [plate_slide("s1", "One"), plate_slide("s2", "Two"), plate_slide("s3", "Three")]
+    service, table = make_service(slides)
+
+    result = asyncio.run(service.update_presentation_slide("deck-1", 1, plate_slide("new", "Two, again")))
+
+    assert result["content"]["slides"] == [slides[0], plate_slide("s2", "Two, again"), slides[2]]
+    assert len(table.updates) == 1 and json.loads(table.updates[0]["content"]) == result["content"]
+
+
+def test_update_presentation_slide_rejects_parser_dicts_and_missing_decks():
+    service, table = make_service([plate_slide("s1", "One")])
+
+    try:
+        asyncio.run(service.update_presentation_slide("deck-1", 0, {"index": 0, "title": "One", "xml": "<SECTION/>"}))
+        assert False, "a non-PlateSlide was saved"
+    except ValueError:
+        pass
+    assert asyncio.run(service.update_presentation_slide("missing", 0, plate_slide("s1", "One"))) is None
+    assert not table.updates
+
+
+def test_concurrent_slide_updates_are_not_lost():
+    service, _ = make_service([plate_slide("s1", "One"), plate_slide("s2", "Two")])
+
+    async def patch_both():
+        await asyncio.gather(
+            service.update_presentation_slide("deck-1", 0, plate_slide("x", "First")),
+            service.update_presentation_slide("deck-1", 1, plate_slide("y", "Second")),
+        )
+        return await service.get_presentation("deck-1")
+
+    slides = asyncio.run(patch_both())["content"]["slides"]
+    assert [slide["content"][0]["children"][0]["text"] for slide in slides] == ["First", "Second"]
+    # The lock is dropped once both updates have released it
+    assert len(service._slide_locks) == 0
+
+
+if __name__ == "__main__":
+    print("🔄 Testing stored slide patches")
+    test_update_presentation_slide_patches_one_plate_slide()
+    test_update_presentation_slide_rejects_parser_dicts_and_missing_decks()
+    test_concurrent_slide_updates_are_not_lost()
+    print("✅ Slide patch checks passed")
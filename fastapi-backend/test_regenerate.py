@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test script for single slide / outline topic regeneration
+Uses fake chains so no OpenAI calls are made.
+"""
+
+import asyncio
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from services import presentation_service
+from services.plate_slides import replace_slide, slide_summary
+
+# Stored slides as the editor saves them (PlateSlide)
+INTRO_SLIDE = {
+    "id": "slide-1",
+    "layoutType": "right",
+    "rootImage": {"query": "solar farm at sunrise"},
+    "content": [
+        {"type": "h1", "children": [{"text": "Intro"}]},
+        {"type": "column_group", "children": [
+            {"type": "column", "children": [{"type": "h3", "children": [{"text": "Cheap"}]}, {"type": "p", "children": [{"text": "Costs fell"}]}]},
+            {"type": "column", "children": [{"type": "h3", "children": [{"text": "Clean"}]}]},
+        ]},
+    ],
+}
+NEXT_SLIDE = {
+    "id": "slide-3",
+    "layoutType": "vertical",
+    "content": [
+        {"type": "h2", "children": [{"text": "Next"}]},
+        {"type": "visualization-list", "visualizationType": "timeline", "children": []},
+    ],
+}
+
+
+class FakeChain:
+    def __init__(self, output):
+        self.output = output
+        self.calls = []
+
+    async def ainvoke(self, inputs):
+        self.calls.append(inputs)
+        return self.output(inputs) if callable(self.output) else self.output
+
+
+def with_chain(name, fake, coro_fn):
+    original = getattr(presentation_service, name)
+    setattr(presentation_service, name, fake)
+    try:
+        return asyncio.run(coro_fn())
+    finally:
+        setattr(presentation_service, name, original)
+
+
+def test_regenerated_slide_avoids_neighbour_layouts():
+    fake = FakeChain(lambda inputs: (
+        f"```xml\n<SECTION layout=\"{inputs['SECTION_LAYOUT']}\"><H1>New slide</H1>"
+        f"<{inputs['COMPONENT']}><DIV><H3>Point</H3><P>Detail</P></DIV></{inputs['COMPONENT']}></SECTION>\n```"
+    ))
+    neighbours = ({"title": "Intro", "layout": "right", "component": "COLUMNS"}, {"title": "Next", "layout": "vertical", "component": "ICONS"})
+
+    result = with_chain("slide_regenerate_chain", fake, lambda: presentation_service.regenerate_slide(
+        title="Deck", outline=["A", "B", "C"], language="English", tone="Professional",
+        slide_index=1, neighbour_slides=neighbours, previous_slide="<SECTION layout=\"right\"></SECTION>"
+    ))
+
+    inputs = fake.calls[0]
+    assert inputs["SECTION_LAYOUT"] == "left"
+    assert inputs["COMPONENT"] not in ("COLUMNS", "ICONS")
+    assert inputs["NEIGHBOUR_COMPONENTS"] == "COLUMNS, ICONS"
+    assert "\"Intro\"" in inputs["NEIGHBOUR_SLIDES"]
+    assert result["xml"].startswith("<SECTION") and "```" not in result["xml"]
+    assert result["slide"]["title"] == "New slide" and result["slide"]["index"] == 1
+
+
+def test_stored_plate_slides_are_used_as_context():
+    fake = FakeChain("<SECTION layout=\"left\"><H1>New slide</H1></SECTION>")
+
+    with_chain("slide_regenerate_chain", fake, lambda: presentation_service.regenerate_slide(
+        title="Deck", outline=["A", "B", "C"], language="English", tone="Professional",
+        slide_index=1, neighbour_slides=(INTRO_SLIDE, NEXT_SLIDE), previous_slide=slide_summary(INTRO_SLIDE)
+    ))
+
+    inputs = fake.calls[0]
+    assert inputs["NEIGHBOUR_COMPONENTS"] == "COLUMNS, TIMELINE"
+    assert inputs["SECTION_LAYOUT"] == "left" and inputs["COMPONENT"] not in ("COLUMNS", "TIMELINE")
+    assert '"Intro" (COLUMNS component, right layout)' in inputs["NEIGHBOUR_SLIDES"]
+    assert '"Next" (TIMELINE component, vertical layout)' in inputs["NEIGHBOUR_SLIDES"]
+    assert inputs["PREVIOUS_SLIDE"] == "# Intro\n[COLUMNS]\n- Cheap Costs fell\n- Clean\n[image: solar farm at sunrise]"
+
+
+def test_replace_slide_keeps_the_deck_in_plate_shape():
+    content = {"slides": [INTRO_SLIDE, {"id": "slide-2", "content": []}, NEXT_SLIDE], "outline": ["A", "B", "C"]}
+    new_slide = {"id": "client-id", "layoutType": "left", "content": [{"type": "h1", "children": [{"text": "New"}]}]}
+
+    patched = replace_slide(content, 1, new_slide)
+
+    assert patched["slides"][1] == {**new_slide, "id": "slide-2"}  # Stored id is kept
+    assert patched["slides"][0] is INTRO_SLIDE and patched["slides"][2] is NEXT_SLIDE
+    assert patched["outline"] == ["A", "B", "C"] and content["slides"][1]["id"] == "slide-2"
+    assert replace_slide({"slides": []}, 0, new_slide)["slides"] == [new_slide]
+
+    for slide, index in (({"index": 1, "xml": "<SECTION/>"}, 1), (new_slide, 5)):
+        try:
+            replace_slide(content, index, slide)
+            assert False, "invalid patch was accepted"
+        except (ValueError, IndexError):
+            pass
+
+
+def test_identical_regenerate_calls_both_reach_the_model():
+    originals = {name: getattr(presentation_service, name).model for name in ("slide_regenerate_chain", "outline_topic_chain")}
+    presentation_service.slide_regenerate_chain.model = FakeListChatModel(
+        responses=[f"<SECTION layout=\"left\"><H1>Take {n}</H1></SECTION>" for n in range(1, 4)])
+    presentation_service.outline_topic_chain.model = FakeListChatModel(responses=["# Hydro\n- One", "# Tidal\n- Two"])
+
+    def slide():
+        return presentation_service.regenerate_slide(
+            title="Deck", outline=["A", "B"], language="English", tone="Professional", slide_index=0, instructions="shorter")
+
+    async def run():
+        first = await slide()
+        # Concurrent identical calls are not coalesced either
+        second, third = await asyncio.gather(slide(), slide())
+        topics = [await presentation_service.regenerate_outline_topic(
+            prompt="Energy", outline=["# Solar\n- Cheap"], topic_index=0, language="English") for _ in range(2)]
+        return [first, second, third], topics
+
+    try:
+        slides, topics = asyncio.run(run())
+    finally:
+        for name, model in originals.items():
+            getattr(presentation_service, name).model = model
+
+    assert sorted(s["slide"]["title"] for s in slides) == ["Take 1", "Take 2", "Take 3"]
+    assert [t["title"] for t in topics] == ["Hydro", "Tidal"]
+    # Nothing is cached even when LLM_CACHE_BACKEND is switched on
+    assert presentation_service.slide_regenerate_chain.cache is None
+    assert presentation_service.outline_topic_chain.cache is None
+
+
+def test_regenerated_topic_keeps_its_index():
+    fake = FakeChain("# Hydro Power\n- Reliable baseload\n- Pumped storage\n# Extra topic\n- ignored")
+    outline = ["# Solar\n- Cheap", "# Wind\n- Offshore", "# Storage\n- Batteries"]
+
+    topic = with_chain("outline_topic_chain", fake, lambda: presentation_service.regenerate_outline_topic(
+        prompt="Renewables", outline=outline, topic_index=1, language="English"
+    ))
+
+    assert fake.calls[0]["currentTopic"] == "Wind" and fake.calls[0]["topicNumber"] == 2
+    assert topic == {
+        "index": 1,
+        "title": "Hydro Power",
+        "bullets": ["Reliable baseload", "Pumped storage"],
+        "markdown": "# Hydro Power\n- Reliable baseload\n- Pumped storage",
+    }
+
+
+if __name__ == "__main__":
+    print("🔄 Testing single slide / topic regeneration")
+    test_regenerated_slide_avoids_neighbour_layouts()
+    test_stored_plate_slides_are_used_as_context()
+    test_replace_slide_keeps_the_deck_in_plate_shape()
+    test_identical_regenerate_calls_both_reach_the_model()
+    test_regenerated_topic_keeps_its_index()
+    print("✅ Regeneration checks passed")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the render worker pool
+Renders real .docx files in worker processes; no network calls are made.
+"""
+
+import asyncio
+import io
+import os
+import tempfile
+from docx import Document
+from PIL import Image
+from services.docx_renderer import RenderSpec, render_docx
+from services.logo_cache import prepare_logo
+from services.render_pool import RenderPool, RenderWorkerCrashed
+
+CONTENT = "# Terms\n\n1. Acceptance\nBy using the **service** you agree.\n2. Liability\nNone."
+
+
+def worker_pid():
+    return os.getpid()
+
+
+def crash_worker_logged(attempts_log):
+    with open(attempts_log, "a") as f:
+        f.write("x")
+    os._exit(1)
+
+
+def test_process_pool_renders_off_the_main_process():
+    pool = RenderPool(kind="process", workers=1)
+
+    async def run():
+        pid = await pool.run(worker_pid)
+        docx_bytes = await pool.run(render_docx, RenderSpec("Terms of Service", numbered_sections=15), {}, CONTENT)
+        return pid, docx_bytes
+
+    try:
+        pid, docx_bytes = asyncio.run(run())
+    finally:
+        pool.shutdown()
+
+    assert pid != os.getpid()
+    texts = [p.text for p in Document(io.BytesIO(docx_bytes)).paragraphs]
+    assert texts[:3] == ["Terms of Service", "Terms", "1. Acceptance"]
+
+
+def test_crashing_job_is_not_resubmitted():
+    pool = RenderPool(kind="process", workers=1)
+
+    async def run(attempts_log):
+        try:
+            await pool.run(crash_worker_logged, attempts_log)
+            assert False, "a crashed job returned a result"
+        except RenderWorkerCrashed:
+            pass
+        # Later jobs get a fresh pool
+        return await pool.run(worker_pid)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        attempts_log = os.path.join(tmp, "attempts")
+        try:
+            assert asyncio.run(run(attempts_log)) != os.getpid()
+        finally:
+            pool.shutdown()
+        with open(attempts_log) as f:
+            assert f.read() == "x"  # The poison job ran once, not again on the new pool
+
+
+def test_inline_pool_matches_process_output():
+    spec = RenderSpec("Terms of Service", numbered_sections=15)
+    inline = asyncio.run(RenderPool(kind="inline").run(render_docx, spec, {}, CONTENT))
+    texts = [p.text for p in Document(io.BytesIO(inline)).paragraphs]
+    assert "By using the service you agree." in texts
+
+
+def test_skeleton_render_matches_fresh_document():
+    buffer = io.BytesIO()
+    Image.new("RGBA", (512, 512), (0, 0, 0, 255)).save(buffer, format="PNG")
+    logo = prepare_logo(buffer.getvalue())
+    spec = RenderSpec("Terms of Service", numbered_sections=15, header="logo_and_page_number", top_margin=1.5)
+
+    fresh = render_docx(spec, {}, CONTENT, logo, use_skeleton=False)
+    skeleton = render_docx(spec, {}, CONTENT, logo, use_skeleton=True)
+
+    fresh_doc, skeleton_doc = Document(io.BytesIO(fresh)), Document(io.BytesIO(skeleton))
+    assert [p.text for p in fresh_doc.paragraphs] == [p.text for p in skeleton_doc.paragraphs]
+    header = skeleton_doc.sections[0].header
+    assert len(header.tables) == 1 and header.part.related_parts  # Logo image lives in the header part
+    assert skeleton_doc.sections[0].top_margin == fresh_doc.sections[0].top_margin
+    assert len(skeleton) < len(fresh)
+
+
+if __name__ == "__main__":
+    print("🔄 Testing render worker pool")
+    test_process_pool_renders_off_the_main_process()
+    test_crashing_job_is_not_resubmitted()
+    test_inline_pool_matches_process_output()
+    test_skeleton_render_matches_fresh_document()
+    print("✅ Render pool checks passed")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Test script for the signed-URL direct upload flow
+Runs on the in-memory storage backend so no network calls are made. The
+database registration step needs the generated Prisma client and is not run.
+"""
+
+import os
+from urllib.parse import parse_qs, urlparse
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from google.cloud import storage
+from google.oauth2 import credentials as credentials_module
+from google.oauth2 import service_account
+from routers import storage as storage_router
+from services import storage_service
+from services.storage_service import GCSStorageBackend, MemoryStorageBackend
+
+BUCKET = "test-bucket"
+# Deployments set STORAGE_SIGNING_KEY in the environment; there is no default
+storage_service.STORAGE_SIGNING_KEY = "test-signing-key"
+
+
+def run_with_app(fn):
+    app = FastAPI()
+    app.include_router(storage_router.router, prefix="/api")
+    backend = MemoryStorageBackend()
+    originals = os.environ.get("GCS_BUCKET_NAME"), storage_service.storage_backend
+    os.environ["GCS_BUCKET_NAME"] = BUCKET
+    storage_service.storage_backend = backend
+    try:
+        return backend, fn(TestClient(app))
+    finally:
+        storage_service.storage_backend = originals[1]
+        storage_service.shutdown_storage()
+        if originals[0] is None:
+            os.environ.pop("GCS_BUCKET_NAME", None)
+        else:
+            os.environ["GCS_BUCKET_NAME"] = originals[0]
+
+
+def test_client_puts_straight_to_the_signed_target():
+    def flow(client):
+        issued = client.post("/api/upload/signed-url", json={"filename": "deck.pdf", "content_type": "application/pdf"}).json()
+        put = client.put(issued["upload_url"], content=b"%PDF-1.7", headers=issued["headers"])
+        return issued, put
+
+    backend, (issued, put) = run_with_app(flow)
+
+    assert issued["method"] == "PUT" and issued["headers"] == {"Content-Type": "application/pdf"}
+    assert issued["object_name"].startswith("uploads/") and issued["object_name"].endswith("_deck.pdf")
+    assert put.status_code == 200 and put.json()["size"] == 8
+    assert backend.read(issued["object_name"], BUCKET) == b"%PDF-1.7"
+    assert issued["public_url"] == backend.public_url(issued["object_name"], BUCKET)
+
+
+def test_direct_target_rejects_tampering_and_oversize():
+    def flow(client):
+        issued = client.post("/api/upload/signed-url", json={"filename": "a.png", "content_type": "image/png"}).json()
+        other_object = issued["upload_url"].replace(issued["object_name"].split("/")[1], "other.png")
+        wrong_type = client.put(issued["upload_url"], content=b"x", headers={"Content-Type": "text/html"})
+        tampered = client.put(other_object, content=b"x", headers=issued["headers"])
+
+        original_limit = storage_service.STORAGE_MAX_UPLOAD_BYTES
+        storage_service.STORAGE_MAX_UPLOAD_BYTES = 4
+        try:
+            too_large = client.put(issued["upload_url"], content=b"12345", headers=issued["headers"])
+            refused = client.post("/api/upload/signed-url", json={"filename": "b.png", "content_type": "image/png", "size": 5})
+        finally:
+            storage_service.STORAGE_MAX_UPLOAD_BYTES = original_limit
+        return wrong_type, tampered, too_large, refused
+
+    backend, (wrong_type, tampered, too_large, refused) = run_with_app(flow)
+
+    assert wrong_type.status_code == 403 and tampered.status_code == 403
+    assert too_large.status_code == 413 and refused.status_code == 413
+    assert not backend.objects
+
+
+def test_completion_checks_the_token_and_the_object():
+    def flow(client):
+        issued = client.post("/api/upload/signed-url", json={"filename": "a.png", "content_type": "image/png"}).json()
+        forged = client.post("/api/upload/complete", json={"object_name": issued["object_name"], "upload_token": "0" * 64})
+        missing = client.post("/api/upload/complete", json={"object_name": issued["object_name"], "upload_token": issued["upload_token"]})
+        return forged, missing
+
+    _, (forged, missing) = run_with_app(flow)
+
+    assert forged.status_code == 403
+    assert missing.status_code == 404  # Token is fine but nothing was uploaded
+
+
+def test_gcs_signed_upload_caps_the_length_and_is_public():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    credentials = service_account.Credentials.from_service_account_info({
+        "type": "service_account",
+        "client_email": "uploader@test.iam.gserviceaccount.com",
+        "private_key": key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode(),
+        "token_uri": "https://oauth2.googleapis.com/token",
+    })
+    storage_service._storage_client = storage.Client(project="test", credentials=credentials)
+    storage_service._buckets.clear()
+    try:
+        target = GCSStorageBackend().signed_upload("uploads/a.mp4", BUCKET, "video/mp4", 1000, expiration=300)
+    finally:
+        storage_service._storage_client = None
+        storage_service._buckets.clear()
+
+    query = parse_qs(urlparse(target["url"]).query)
+    assert target["url"].startswith(f"https://storage.googleapis.com/{BUCKET}/uploads/a.mp4?")
+    assert target["headers"] == {
+        "Content-Type": "video/mp4",
+        "x-goog-content-length-range": "0,1000",
+        "x-goog-acl": "public-read",
+    }
+    # Both headers are signed, so the client must send them: the size cap and a public object
+    signed_headers = query["X-Goog-SignedHeaders"][0].split(";")
+    assert "x-goog-content-length-range" in signed_headers and "x-goog-acl" in signed_headers
+    assert query["X-Goog-Expires"] == ["300"]
+
+
+def test_user_credentials_get_a_clear_501():
+    user_credentials = credentials_module.Credentials(token="user-token")
+    storage_service._storage_client = storage.Client(project="test", credentials=user_credentials)
+    storage_service._buckets.clear()
+    app = FastAPI()
+    app.include_router(storage_router.router, prefix="/api")
+    originals = os.environ.get("GCS_BUCKET_NAME"), storage_service.storage_backend
+    os.environ["GCS_BUCKET_NAME"] = BUCKET
+    storage_service.storage_backend = GCSStorageBackend()
+    try:
+        response = TestClient(app).post("/api/upload/signed-url", json={"filename": "a.png", "content_type": "image/png"})
+    finally:
+        storage_service.storage_backend = originals[1]
+        storage_service._storage_client = None
+        storage_service._buckets.clear()
+        storage_service.shutdown_storage()
+        if originals[0] is None:
+            os.environ.pop("GCS_BUCKET_NAME", None)
+        else:
+            os.environ["GCS_BUCKET_NAME"] = originals[0]
+
+    assert response.status_code == 501
+    assert "service-account credentials" in response.json()["detail"]
+
+
+def test_missing_signing_key_fails_loudly():
+    original_key = storage_service.STORAGE_SIGNING_KEY
+    storage_service.STORAGE_SIGNING_KEY = ""
+    try:
+        try:
+            storage_service.check_signing_key(MemoryStorageBackend())
+            assert False, "memory backend started without a signing key"
+        except RuntimeError as e:
+            assert "STORAGE_SIGNING_KEY" in str(e)
+        storage_service.check_signing_key(GCSStorageBackend())  # Only direct uploads need it on GCS
+
+        _, response = run_with_app(lambda client: client.post(
+            "/api/upload/signed-url", json={"filename": "a.png", "content_type": "image/png"}))
+        accepted = storage_service.verify_upload_token(BUCKET, "uploads/a.png", "")
+    finally:
+        storage_service.STORAGE_SIGNING_KEY = original_key
+
+    assert response.status_code == 501 and "STORAGE_SIGNING_KEY" in response.json()["detail"]
+    assert not accepted
+
+
+if __name__ == "__main__":
+    print("🔄 Testing signed-URL uploads")
+    test_client_puts_straight_to_the_signed_target()
+    test_direct_target_rejects_tampering_and_oversize()
+    test_completion_checks_the_token_and_the_object()
+    test_gcs_signed_upload_caps_the_length_and_is_public()
+    test_user_credentials_get_a_clear_501()
+    test_missing_signing_key_fails_loudly()
+    print("✅ Signed upload checks passed")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for single-flight request coalescing
+Uses LangChain's fake chat model so no OpenAI calls are made.
+"""
+
+import asyncio
+from langchain.prompts import PromptTemplate
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from services.llm_cache import CachedChain
+from services.single_flight import SingleFlight, coalesced, single_flight_coalesced
+
+RESPONSE = "# First Main Topic\n- Key point about this topic\n"
+
+
+async def stream_all(chain, inputs):
+    return "".join([chunk async for chunk in chain.astream(inputs)])
+
+
+def test_concurrent_streams_share_one_model_call():
+    # The second response would only ever be seen if a second upstream call were made
+    model = FakeListChatModel(responses=[RESPONSE, "a second call"], sleep=0.01)
+    chain = CachedChain("test_single_flight", PromptTemplate.from_template("{prompt}"), model, cache=None)
+
+    async def run():
+        return await asyncio.gather(*[stream_all(chain, {"prompt": "solar"}) for _ in range(3)])
+
+    results = asyncio.run(run())
+    assert results == [RESPONSE] * 3
+    assert single_flight_coalesced.value(name="test_single_flight") == 2
+
+
+def test_late_subscriber_replays_from_start():
+    flight = SingleFlight()
+
+    async def source():
+        for chunk in ["a", "b", "c"]:
+            await asyncio.sleep(0.01)
+            yield chunk
+
+    async def run():
+        first = flight.stream("key", source)
+        head = await first.__anext__()
+        second = flight.stream("key", source)
+        rest = [chunk async for chunk in first]
+        return [head] + rest, [chunk async for chunk in second]
+
+    first, second = asyncio.run(run())
+    assert first == second == ["a", "b", "c"]
+    assert flight.in_flight() == 0
+
+
+def test_coalesced_decorator_runs_once():
+    calls = []
+
+    @coalesced("test_decorator")
+    async def generate(data: dict):
+        calls.append(data)
+        await asyncio.sleep(0.01)
+        return {"url": "https://example.com/doc.docx"}
+
+    async def run():
+        same = await asyncio.gather(generate({"title": "A"}), generate({"title": "A"}))
+        other = await generate({"title": "B"})
+        return same, other
+
+    same, other = asyncio.run(run())
+    assert same[0] == same[1] and other["url"]
+    assert calls == [{"title": "A"}, {"title": "B"}]
+
+
+if __name__ == "__main__":
+    print("🔄 Testing single-flight coalescing")
+    test_concurrent_streams_share_one_model_call()
+    test_late_subscriber_replays_from_start()
+    test_coalesced_decorator_runs_once()
+    print("✅ Single-flight checks passed")
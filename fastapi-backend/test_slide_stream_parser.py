@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for the incremental slide stream parser
+"""
+
+from services.slide_stream_parser import SlideStreamParser
+
+SAMPLE_DECK = """```xml
+<PRESENTATION>
+
+<SECTION layout="left">
+  <H1>Why Renewable Energy Matters</H1>
+  <BULLETS>
+    <DIV><H3>Falling Costs</H3><P>Solar prices dropped 89% in a decade & keep falling</P></DIV>
+    <DIV><P>Wind is now the cheapest new power in most markets</P></DIV>
+  </BULLETS>
+  <IMG query="vast solar farm at sunrise with rows of panels stretching to the horizon" />
+</SECTION>
+
+<SECTION layout="right">
+  <H1>Core Technologies</H1>
+  <ICONS>
+    <DIV><ICON query="sun"><H3>Solar</H3><P>Photovoltaic generation</P></DIV>
+    <DIV><ICON query="wind" /><H3>Wind</H3><P>Onshore and offshore turbines</P></DIV>
+  </ICONS>
+  <IMG query="offshore wind turbines in the north sea under a dramatic cloudy sky">
+</SECTION>
+
+<SECTION layout="vertical">
+  <H1>Growth</H1>
+  <CHART charttype="vertical-bar">
+    <TABLE>
+      <TR><TD type="label"><VALUE>2022</VALUE></TD><TD type="data"><VALUE>45</VALUE></TD></TR>
+      <TR><TD type="label"><VALUE>2023</VALUE></TD><TD type="data"><VALUE>72</VALUE></TD></TR>
+    </TABLE>
+  </CHART>
+</SECTION>
+
+</PRESENTATION>
+```"""
+
+
+def parse_in_chunks(text: str, size: int):
+    parser = SlideStreamParser()
+    slides = []
+    for i in range(0, len(text), size):
+        slides.extend(parser.feed(text[i:i + size]))
+    slides.extend(parser.close())
+    return slides
+
+
+def test_slides_are_identical_for_any_chunking():
+    expected = parse_in_chunks(SAMPLE_DECK, len(SAMPLE_DECK))
+    assert len(expected) == 3
+    for size in (1, 2, 3, 7, 64):
+        assert parse_in_chunks(SAMPLE_DECK, size) == expected
+
+
+def test_slide_structure():
+    first, second, third = parse_in_chunks(SAMPLE_DECK, 5)
+
+    assert first["index"] == 0
+    assert first["layout"] == "left"
+    assert first["title"] == "Why Renewable Energy Matters"
+    assert first["component"] == "BULLETS"
+    assert first["items"][0] == {
+        "heading": "Falling Costs",
+        "text": "Solar prices dropped 89% in a decade & keep falling",
+    }
+    assert first["items"][1]["heading"] is None
+    assert first["images"] == ["vast solar farm at sunrise with rows of panels stretching to the horizon"]
+
+    assert second["component"] == "ICONS"
+    assert second["icons"] == ["sun", "wind"]
+    assert [item["icon"] for item in second["items"]] == ["sun", "wind"]
+    assert len(second["images"]) == 1
+
+    assert third["component"] == "CHART"
+    assert third["chart_type"] == "vertical-bar"
+    assert third["items"] == [{"label": "2022", "data": "45"}, {"label": "2023", "data": "72"}]
+
+
+def test_slide_emitted_when_section_closes():
+    parser = SlideStreamParser()
+    head, tail = SAMPLE_DECK.split("</SECTION>", 1)
+    assert parser.feed(head) == []
+    slides = parser.feed("</SECTION>")
+    assert len(slides) == 1 and slides[0]["component"] == "BULLETS"
+
+
+def test_unclosed_trailing_section_is_flushed():
+    parser = SlideStreamParser()
+    assert parser.feed('<SECTION layout="left"><H1>Cut off</H1><BULLETS><DIV><P>Half') == []
+    slides = parser.close()
+    assert len(slides) == 1
+    assert slides[0]["title"] == "Cut off"
+    assert slides[0]["items"] == [{"heading": None, "text": "Half"}]
+
+
+def test_images_reported_when_tag_closes():
+    for size in (1, 4, 64, len(SAMPLE_DECK)):
+        seen = []
+        parser = SlideStreamParser(on_image=lambda index, query: seen.append((index, query, parser.slide_count)))
+        for i in range(0, len(SAMPLE_DECK), size):
+            parser.feed(SAMPLE_DECK[i:i + size])
+        assert [(index, query) for index, query, _ in seen] == [
+            (0, "vast solar farm at sunrise with rows of panels stretching to the horizon"),
+            (1, "offshore wind turbines in the north sea under a dramatic cloudy sky"),
+        ]
+        # Reported before the owning slide was emitted
+        assert all(emitted == index for index, _, emitted in seen)
+
+
+if __name__ == "__main__":
+    print("🔄 Testing slide stream parser")
+    print("=" * 50)
+    test_slides_are_identical_for_any_chunking()
+    test_slide_structure()
+    test_slide_emitted_when_section_closes()
+    test_unclosed_trailing_section_is_flushed()
+    test_images_reported_when_tag_closes()
+    print("✅ All slide stream parser checks passed")
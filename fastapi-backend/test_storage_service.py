@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared storage layer
+Uses an anonymous GCS client, in-memory buckets and a temp directory so no network calls are made.
+"""
+
+import asyncio
+import io
+import tempfile
+import threading
+from urllib.parse import parse_qs, urlparse
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from google.cloud import storage
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from google.oauth2 import service_account
+from services import storage_service
+from services.storage_service import LocalStaticFiles, LocalStorageBackend, MemoryStorageBackend
+
+BUCKET = "test-bucket"
+# Deployments set STORAGE_SIGNING_KEY in the environment; there is no default
+storage_service.STORAGE_SIGNING_KEY = "test-signing-key"
+
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.public_url = f"https://storage.googleapis.com/{BUCKET}/{name}"
+
+    def upload_from_string(self, content, content_type=None):
+        self.bucket.objects[self.name] = (content, content_type, threading.current_thread().name)
+
+    def upload_from_file(self, file, content_type=None):
+        self.upload_from_string(file.read(), content_type)
+
+    def exists(self):
+        return self.name in self.bucket.objects
+
+    def delete(self):
+        if self.name not in self.bucket.objects:
+            error = Exception("Not Found")
+            error.code = 404
+            raise error
+        del self.bucket.objects[self.name]
+
+    def make_public(self):
+        self.bucket.public.add(self.name)
+
+
+class FakeBucket:
+    def __init__(self):
+        self.objects = {}
+        self.public = set()
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+
+def test_one_client_with_a_sized_connection_pool():
+    original = storage_service.storage.Client
+    storage_service.storage.Client = storage.Client.create_anonymous_client
+    storage_service._storage_client = None
+    storage_service._buckets.clear()
+    try:
+        client = storage_service.get_storage_client()
+        assert storage_service.get_storage_client() is client
+        adapter = client._http.get_adapter("https://storage.googleapis.com")
+        assert adapter._pool_maxsize == storage_service.STORAGE_MAX_CONNECTIONS
+        assert storage_service.get_bucket(BUCKET) is storage_service.get_bucket(BUCKET)
+    finally:
+        storage_service.storage.Client = original
+        storage_service._storage_client = None
+        storage_service._buckets.clear()
+
+
+def test_async_calls_run_on_the_storage_pool():
+    bucket = FakeBucket()
+    storage_service._buckets[BUCKET] = bucket
+
+    async def run():
+        url = await storage_service.upload(b"hello", "a.txt", "text/plain", BUCKET, public=True)
+        found = await storage_service.exists("a.txt", BUCKET)
+        deleted = await storage_service.delete("a.txt", BUCKET)
+        deleted_again = await storage_service.delete("a.txt", BUCKET)
+        return url, found, deleted, deleted_again
+
+    try:
+        url, found, deleted, deleted_again = asyncio.run(run())
+    finally:
+        storage_service._buckets.pop(BUCKET, None)
+        storage_service.shutdown_storage()
+
+    assert url.endswith("/a.txt") and "a.txt" in bucket.public
+    assert found and deleted and not deleted_again
+
+
+def test_upload_accepts_file_objects():
+    bucket = FakeBucket()
+    storage_service._buckets[BUCKET] = bucket
+    try:
+        storage_service.upload_to_gcs(io.BytesIO(b"png"), "logo.png", "image/png", BUCKET)
+        asyncio.run(storage_service.upload(b"docx", "doc.docx", "application/octet-stream", BUCKET))
+    finally:
+        storage_service._buckets.pop(BUCKET, None)
+        storage_service.shutdown_storage()
+
+    assert bucket.objects["logo.png"][:2] == (b"png", "image/png")
+    assert bucket.objects["doc.docx"][2].startswith("storage")
+
+
+def test_signed_urls_sign_locally_with_a_service_account():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    credentials = service_account.Credentials.from_service_account_info({
+        "type": "service_account",
+        "client_email": "renderer@test.iam.gserviceaccount.com",
+        "private_key": key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode(),
+        "token_uri": "https://oauth2.googleapis.com/token",
+    })
+    storage_service._storage_client = storage.Client(project="test", credentials=credentials)
+    storage_service._buckets.clear()
+    try:
+        url = asyncio.run(storage_service.signed_url("docs/a.docx", BUCKET, method="PUT", content_type="text/plain"))
+    finally:
+        storage_service._storage_client = None
+        storage_service._buckets.clear()
+        storage_service.shutdown_storage()
+
+    assert url.startswith(f"https://storage.googleapis.com/{BUCKET}/docs/a.docx?")
+    assert "X-Goog-Signature=" in url and "X-Goog-Expires=900" in url
+
+
+def use_backend(backend, fn):
+    original = storage_service.storage_backend
+    storage_service.storage_backend = backend
+    try:
+        return asyncio.run(fn())
+    finally:
+        storage_service.storage_backend = original
+        storage_service.shutdown_storage()
+
+
+def test_local_backend_serves_files_from_the_static_route():
+    with tempfile.TemporaryDirectory() as root:
+        backend = LocalStorageBackend(root, "/files")
+
+        async def run():
+            url = await storage_service.upload(b"%PDF", "docs/Report 1.pdf", "application/pdf", BUCKET)
+            return url, await storage_service.exists("docs/Report 1.pdf", BUCKET)
+
+        url, found = use_backend(backend, run)
+        backend.upload(b"PNG", "logos/a.png", "image/png", BUCKET, metadata={"alias": "logos/Acme.png"})
+        app = FastAPI()
+        app.mount(backend.route_path(), LocalStaticFiles(directory=backend.root), name="files")
+        client = TestClient(app)
+        response = client.get(url)
+
+        assert url == f"/files/{BUCKET}/docs/Report%201.pdf" and found
+        assert response.status_code == 200 and response.content == b"%PDF"
+        # Metadata sidecars sit next to the objects but are never served
+        assert client.get(f"/files/{BUCKET}/logos/a.png").status_code == 200
+        assert client.get(f"/files/{BUCKET}/logos/a.png.metadata.json").status_code == 404
+        for name in ("../../escape.txt", "logos/a.png.metadata.json"):
+            try:
+                backend.upload(b"x", name, "text/plain", BUCKET)
+                assert False, f"invalid object name {name} was accepted"
+            except ValueError:
+                pass
+
+
+def test_memory_backend_round_trip_and_signed_urls():
+    backend = MemoryStorageBackend()
+
+    async def run():
+        url = await storage_service.upload(io.BytesIO(b"hello"), "a.txt", "text/plain", BUCKET)
+        data = await storage_service.read("a.txt", BUCKET)
+        signed = await storage_service.signed_url("a.txt", BUCKET, method="PUT", content_type="text/plain")
+        deleted = await storage_service.delete("a.txt", BUCKET)
+        return url, data, signed, deleted, await storage_service.exists("a.txt", BUCKET)
+
+    url, data, signed, deleted, still_there = use_backend(backend, run)
+
+    assert url == f"memory://{BUCKET}/a.txt" and data == b"hello"
+    assert deleted and not still_there
+    query = {key: values[0] for key, values in parse_qs(urlparse(signed).query).items()}
+    expires = int(query["expires"])
+    assert storage_service.verify_signature(BUCKET, "a.txt", "PUT", expires, query["signature"], "text/plain")
+    assert not storage_service.verify_signature(BUCKET, "b.txt", "PUT", expires, query["signature"], "text/plain")
+    assert not storage_service.verify_signature(BUCKET, "a.txt", "GET", expires, query["signature"], "text/plain")
+    assert not storage_service.verify_signature(BUCKET, "a.txt", "PUT", 1, query["signature"], "text/plain")
+
+
+def test_content_addressed_uploads_dedupe_and_never_overwrite():
+    with tempfile.TemporaryDirectory() as root:
+        backend = LocalStorageBackend(root, "/files")
+        uploads = []
+        original_upload = backend.upload
+
+        def counting_upload(*args, **kwargs):
+            uploads.append(args[1])
+            return original_upload(*args, **kwargs)
+
+        backend.upload = counting_upload
+
+        async def run():
+            first = await storage_service.upload(b"logo-a", "logos/logo_Acme.png", "image/png", BUCKET, content_addressed=True)
+            again = await storage_service.upload(b"logo-a", "logos/logo_Acme_v2.png", "image/png", BUCKET, content_addressed=True)
+            other = await storage_service.upload(b"logo-b", "logos/logo_Acme.png", "image/png", BUCKET, content_addressed=True)
+            return first, again, other
+
+        before = storage_service.storage_uploads_total.value(result="known")
+        first, again, other = use_backend(backend, run)
+
+        # Same bytes -> same object, sent once; same name with new bytes -> a new object
+        assert first == again != other
+        assert len(uploads) == 2
+        assert storage_service.storage_uploads_total.value(result="known") == before + 1
+        name = first.rsplit("/", 1)[1]
+        assert len(name) == 64 + len(".png") and first.startswith(f"/files/{BUCKET}/logos/")
+        with open(backend.path(f"logos/{name}", BUCKET) + ".metadata.json") as f:
+            assert f.read() == '{"alias": "logos/logo_Acme.png"}'
+
+        # A new process (empty known-object cache) pays one existence check, no upload
+        restarted = LocalStorageBackend(root, "/files")
+        url = use_backend(restarted, lambda: storage_service.upload(
+            b"logo-a", "logos/x.png", "image/png", BUCKET, content_addressed=True))
+        assert url == first and restarted.known
+
+        # Deleting forgets the object so it is uploaded again
+        use_backend(restarted, lambda: storage_service.delete(f"logos/{name}", BUCKET))
+        assert not restarted.known and not restarted.exists(f"logos/{name}", BUCKET)
+
+
+if __name__ == "__main__":
+    print("🔄 Testing shared storage layer")
+    test_one_client_with_a_sized_connection_pool()
+    test_async_calls_run_on_the_storage_pool()
+    test_upload_accepts_file_objects()
+    test_signed_urls_sign_locally_with_a_service_account()
+    test_local_backend_serves_files_from_the_static_route()
+    test_memory_backend_round_trip_and_signed_urls()
+    test_content_addressed_uploads_dedupe_and_never_overwrite()
+    print("✅ Storage layer checks passed")
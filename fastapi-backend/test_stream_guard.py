@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test script for client disconnect handling on streaming endpoints
+Uses LangChain's fake chat model and a fake request so no network is involved.
+"""
+
+import asyncio
+from langchain.prompts import PromptTemplate
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from services.llm_cache import CachedChain
+from services.llm_metrics import cancelled_streams_total, llm_requests_total, llm_tokens_saved_total
+from services.single_flight import SingleFlight
+from services.stream_guard import guard_disconnect
+
+RESPONSE = "<PRESENTATION><SECTION layout=\"left\"><H1>Slide</H1></SECTION></PRESENTATION>"
+
+
+class FakeRequest:
+    """Reports a disconnect once ``disconnect_after`` seconds have passed"""
+
+    def __init__(self, disconnect_after: float):
+        self.loop_time = asyncio.get_running_loop().time
+        self.deadline = self.loop_time() + disconnect_after
+
+    async def is_disconnected(self) -> bool:
+        return self.loop_time() >= self.deadline
+
+
+def test_disconnect_cancels_upstream_chain():
+    model = FakeListChatModel(responses=[RESPONSE, RESPONSE], sleep=0.01)
+    chain = CachedChain("test_disconnect", PromptTemplate.from_template("{prompt}"), model, cache=None)
+
+    async def run():
+        # One full run so the chain has an expected completion size
+        full = [chunk async for chunk in chain.astream({"prompt": "warmup"})]
+        request = FakeRequest(disconnect_after=0.1)
+        partial = [chunk async for chunk in guard_disconnect(request, chain.astream({"prompt": "deck"}), "test_disconnect", interval=0.01)]
+        await asyncio.sleep(0.05)
+        return full, partial
+
+    full, partial = asyncio.run(run())
+    assert 0 < len(partial) < len(full)
+    assert cancelled_streams_total.value(stream="test_disconnect") == 1
+    assert llm_requests_total.value(chain="test_disconnect", model="unknown", status="cancelled") == 1
+    assert llm_tokens_saved_total.value(chain="test_disconnect", model="unknown") > 0
+
+
+def test_completed_stream_is_not_counted():
+    async def source():
+        for chunk in ["a", "b"]:
+            yield chunk
+
+    async def run():
+        request = FakeRequest(disconnect_after=60)
+        return [chunk async for chunk in guard_disconnect(request, source(), "test_complete", interval=0.01)]
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert cancelled_streams_total.value(stream="test_complete") == 0
+
+
+def test_shared_call_survives_until_last_waiter_leaves():
+    flight = SingleFlight()
+    started = []
+
+    async def slow():
+        started.append(True)
+        await asyncio.sleep(10)
+
+    async def run():
+        first = asyncio.create_task(flight.do("key", slow))
+        second = asyncio.create_task(flight.do("key", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        still_running = flight.in_flight() == 1
+        second.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        await asyncio.sleep(0)
+        return still_running
+
+    assert asyncio.run(run())
+    assert started == [True]
+
+
+if __name__ == "__main__":
+    print("🔄 Testing disconnect handling")
+    test_disconnect_cancels_upstream_chain()
+    test_completed_stream_is_not_counted()
+    test_shared_call_survives_until_last_waiter_leaves()
+    print("✅ Disconnect checks passed")
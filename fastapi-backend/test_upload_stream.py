@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming chunked uploads through /upload
+Uses a temp directory and an in-memory GCS bucket so no network calls are made.
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import tracemalloc
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers import storage as storage_router
+from services import storage_service
+from services.storage_service import GCSStorageBackend, HashingReader, LocalStorageBackend
+
+BUCKET = "test-bucket"
+
+
+class FakeBlob:
+    def __init__(self, bucket, name, chunk_size=None):
+        self.bucket = bucket
+        self.name = name
+        self.chunk_size = chunk_size
+        self.content_type = None
+        self.metadata = None
+        self.public_url = f"https://storage.googleapis.com/{BUCKET}/{name}"
+
+    def upload_from_file(self, stream, size=None, content_type=None):
+        data = bytearray()
+        while True:
+            chunk = stream.read(self.chunk_size or 1024 * 1024)
+            if not chunk:
+                break
+            data += chunk
+        assert size is None or len(data) == size
+        self.bucket.objects[self.name] = bytes(data)
+
+    def compose(self, sources):
+        self.bucket.objects[self.name] = b"".join(self.bucket.objects[source.name] for source in sources)
+        self.bucket.composed.append((self.name, [source.name for source in sources]))
+
+    def delete(self):
+        del self.bucket.objects[self.name]
+
+    def make_public(self):
+        self.bucket.public.add(self.name)
+
+
+class FakeBucket:
+    def __init__(self):
+        self.objects = {}
+        self.composed = []
+        self.public = set()
+
+    def blob(self, name, chunk_size=None):
+        return FakeBlob(self, name, chunk_size)
+
+
+def random_file(size):
+    file = tempfile.TemporaryFile()
+    block = os.urandom(64 * 1024)
+    written = 0
+    while written < size:
+        written += file.write(block[:size - written])
+    file.seek(0)
+    return file
+
+
+def file_sha256(file):
+    file.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(1024 * 1024), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def with_backend(backend, fn):
+    original = storage_service.storage_backend
+    storage_service.storage_backend = backend
+    try:
+        return fn()
+    finally:
+        storage_service.storage_backend = original
+        storage_service.shutdown_storage()
+
+
+def test_upload_endpoint_streams_to_local_storage():
+    app = FastAPI()
+    app.include_router(storage_router.router, prefix="/api")
+    original_bucket, original_limit = os.environ.get("GCS_BUCKET_NAME"), storage_service.STORAGE_MAX_UPLOAD_BYTES
+    os.environ["GCS_BUCKET_NAME"] = BUCKET
+    with tempfile.TemporaryDirectory() as root, random_file(3 * 1024 * 1024 + 17) as upload:
+        backend = LocalStorageBackend(root, "/files")
+        expected = file_sha256(upload)
+        try:
+            def post(limit):
+                storage_service.STORAGE_MAX_UPLOAD_BYTES = limit
+                upload.seek(0)
+                return TestClient(app).post("/api/upload", files={"file": ("My Logo.png", upload, "image/png")})
+
+            ok = with_backend(backend, lambda: post(10 * 1024 * 1024))
+            too_large = with_backend(backend, lambda: post(1024 * 1024))
+        finally:
+            storage_service.STORAGE_MAX_UPLOAD_BYTES = original_limit
+            if original_bucket is None:
+                os.environ.pop("GCS_BUCKET_NAME", None)
+            else:
+                os.environ["GCS_BUCKET_NAME"] = original_bucket
+
+        body = ok.json()
+        assert ok.status_code == 200 and body["sha256"] == expected and body["size"] == 3 * 1024 * 1024 + 17
+        assert body["url"].startswith(f"/files/{BUCKET}/uploads/") and body["url"].endswith("_MyLogo.png")
+        stored = backend.path(body["url"].split(f"/files/{BUCKET}/", 1)[1], BUCKET)
+        with open(stored, "rb") as f:
+            assert hashlib.sha256(f.read()).hexdigest() == expected
+        assert too_large.status_code == 413
+
+
+def test_upload_endpoint_makes_gcs_objects_public():
+    app = FastAPI()
+    app.include_router(storage_router.router, prefix="/api")
+    bucket = FakeBucket()
+    storage_service._buckets[BUCKET] = bucket
+    original_bucket = os.environ.get("GCS_BUCKET_NAME")
+    os.environ["GCS_BUCKET_NAME"] = BUCKET
+    try:
+        response = with_backend(GCSStorageBackend(), lambda: TestClient(app).post(
+            "/api/upload", files={"file": ("notes.txt", io.BytesIO(b"hello"), "text/plain")}))
+    finally:
+        storage_service._buckets.pop(BUCKET, None)
+        if original_bucket is None:
+            os.environ.pop("GCS_BUCKET_NAME", None)
+        else:
+            os.environ["GCS_BUCKET_NAME"] = original_bucket
+
+    # The returned URL is the object's public URL, so the object has to be readable there
+    assert response.status_code == 200 and response.json()["url"].endswith("_notes.txt")
+    assert bucket.public and bucket.public == set(bucket.objects)
+
+
+def test_stream_memory_is_flat():
+    def peak(size):
+        with tempfile.TemporaryDirectory() as root, random_file(size) as upload:
+            backend = LocalStorageBackend(root, "/files")
+            tracemalloc.start()
+            with_backend(backend, lambda: storage_service.upload_blob_stream(upload, "big.bin", "application/octet-stream", BUCKET))
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return peak_bytes
+
+    small, large = peak(2 * 1024 * 1024), peak(24 * 1024 * 1024)
+    # 12x the bytes, same working set (one read chunk at a time)
+    assert large < small * 1.5 and large < 4 * 1024 * 1024
+
+
+def test_large_gcs_uploads_compose_parallel_parts():
+    bucket = FakeBucket()
+    storage_service._buckets[BUCKET] = bucket
+    originals = storage_service.STORAGE_COMPOSITE_THRESHOLD, storage_service.STORAGE_COMPOSITE_PARTS
+    storage_service.STORAGE_COMPOSITE_THRESHOLD, storage_service.STORAGE_COMPOSITE_PARTS = 1024 * 1024, 4
+    try:
+        with random_file(3 * 1024 * 1024 + 5) as upload:
+            expected = file_sha256(upload)
+            result = with_backend(GCSStorageBackend(), lambda: asyncio.run(
+                storage_service.upload_stream(upload, "uploads/big.bin", "application/octet-stream", BUCKET)))
+            upload.seek(0)
+            original_bytes = upload.read()
+    finally:
+        storage_service.STORAGE_COMPOSITE_THRESHOLD, storage_service.STORAGE_COMPOSITE_PARTS = originals
+        storage_service._buckets.pop(BUCKET, None)
+
+    assert result["sha256"] == expected and result["size"] == len(original_bytes)
+    assert bucket.objects == {"uploads/big.bin": original_bytes}  # Parts were deleted after compose
+    name, parts = bucket.composed[0]
+    assert name == "uploads/big.bin" and len(parts) == 4
+
+
+def test_small_gcs_uploads_are_resumable_in_chunks():
+    bucket = FakeBucket()
+    storage_service._buckets[BUCKET] = bucket
+    try:
+        url = with_backend(GCSStorageBackend(), lambda: storage_service.upload_blob_stream(
+            io.BytesIO(b"x" * 1000), "uploads/small.txt", "text/plain", BUCKET))["url"]
+    finally:
+        storage_service._buckets.pop(BUCKET, None)
+
+    assert url.endswith("/uploads/small.txt") and bucket.objects["uploads/small.txt"] == b"x" * 1000
+    assert not bucket.composed
+
+
+def test_hashing_reader_does_not_double_count_retried_chunks():
+    reader = HashingReader(io.BytesIO(b"abcdefghij"), max_bytes=10)
+    reader.read(6)
+    reader.seek(2)  # An upload retry rewinds and resends
+    assert reader.read() == b"cdefghij"
+    assert reader.size == 10 and reader.sha256 == hashlib.sha256(b"abcdefghij").hexdigest()
+
+    # Unknown sizes are still capped while streaming
+    capped = HashingReader(io.BytesIO(b"x" * 20), max_bytes=10)
+    try:
+        while capped.read(4):
+            pass
+        assert False, "limit was not enforced"
+    except storage_service.UploadTooLarge:
+        assert capped.size == 12
+
+
+if __name__ == "__main__":
+    print("🔄 Testing streaming uploads")
+    test_upload_endpoint_streams_to_local_storage()
+    test_upload_endpoint_makes_gcs_objects_public()
+    test_stream_memory_is_flat()
+    test_large_gcs_uploads_compose_parallel_parts()
+    test_small_gcs_uploads_are_resumable_in_chunks()
+    test_hashing_reader_does_not_double_count_retried_chunks()
+    print("✅ Streaming upload checks passed")